@@ -0,0 +1,103 @@
+'''
+Stand-in for `dbt run-operation` that answers the macros dbt-generator calls with synthetic output, in dbt's
+JSON log format, after a configurable delay. Used by the benchmarks and tests, installed on PATH as `dbt`.
+
+Environment:
+    FAKE_DBT_LATENCY  seconds to sleep per call, emulating dbt startup and warehouse time (default 0)
+    FAKE_DBT_COLUMNS  columns per table (default 20)
+    FAKE_DBT_TABLES   tables per schema for the schema-level macros (default 10)
+    FAKE_DBT_LOG      file to append one JSON line per call to, with the macro name and seconds spent
+'''
+import os
+import sys
+import json
+import time
+from pathlib import Path
+
+from synthetic import SOURCE_NAME, table_names, synthetic_columns
+from dbt_generator.operation_output import BATCH_BEGIN, BATCH_END
+from dbt_generator.generate_base_models import render_base_model, render_source_yaml
+
+
+def event(name, msg):
+    return json.dumps({'info': {'name': name, 'level': 'info', 'msg': msg}, 'data': {'msg': msg}})
+
+
+def payload(value):
+    return '\n'.join([BATCH_BEGIN, json.dumps(value), BATCH_END])
+
+
+def render_snapshot_macro(macro_name, args):
+    from dbt_generator.native_macros import NativeMacros
+    sql = NativeMacros([str(Path(__file__).resolve().parent.parent / 'macros')]).call(macro_name, **args)
+    return '\n'.join([event('JinjaLogInfo', sql), payload(sql)])
+
+
+def run_macro(macro_name, args, columns, tables):
+    if macro_name == 'macro_create_base_model':
+        column_names = [name for name, _ in synthetic_columns(args['table_name'], columns)]
+        model = render_base_model(args['table_name'], args['source_name'], column_names, args.get('case_sensitive_cols'),
+                                  args.get('leading_commas'), args.get('materialized'), args.get('use_snapshot'))
+        return event('JinjaLogInfo', model)
+    if macro_name == 'macro_create_base_models_batch':
+        return payload({table: render_base_model(table, args['source_name'],
+                                                 [name for name, _ in synthetic_columns(table, columns)],
+                                                 args.get('case_sensitive_cols'), args.get('leading_commas'),
+                                                 args.get('materialized'), args.get('use_snapshot'))
+                        for table in args['table_names']})
+    if macro_name == 'macro_get_base_model_columns':
+        return payload({table: synthetic_columns(table, columns) for table in args['table_names']})
+    if macro_name == 'macro_get_schema_catalog':
+        return payload({table: {'last_altered': None, 'columns': synthetic_columns(table, columns)}
+                        for table in table_names(tables)})
+    if macro_name == 'macro_get_schemas_columns':
+        return payload({schema: {table: synthetic_columns(table, columns) for table in table_names(tables)}
+                        for schema in args.get('schema_names') or [SOURCE_NAME]})
+    if macro_name == 'generate_source':
+        names = json.loads(args['table_names']) if args.get('table_names') else table_names(tables)
+        yaml = render_source_yaml(args['database_name'], args['schema_name'],
+                                  {table: synthetic_columns(table, columns) for table in names},
+                                  args.get('generate_columns'), args.get('include_descriptions'), True, '', '',
+                                  args.get('name'), args.get('include_database'), args.get('include_schema'))
+        return event('JinjaLogInfo', yaml)
+    if macro_name in ('macro_create_snapshot', 'macro_create_soft_delete_snapshot'):
+        return render_snapshot_macro(macro_name, args)
+    raise ValueError(f'fake dbt does not implement {macro_name}')
+
+
+def main(argv):
+    import yaml
+    start = time.perf_counter()
+    macro_name = argv[argv.index('run-operation') + 1]
+    args = yaml.safe_load(argv[argv.index('--args') + 1]) if '--args' in argv else {}
+    time.sleep(float(os.environ.get('FAKE_DBT_LATENCY', 0)))
+
+    print(event('MainReportVersion', 'Running with dbt=1.7.0'))
+    try:
+        print(run_macro(macro_name, args, int(os.environ.get('FAKE_DBT_COLUMNS', 20)),
+                        int(os.environ.get('FAKE_DBT_TABLES', 10))))
+        status = 0
+    except Exception as e:
+        print(event('RunningOperationUncaughtError', f'Encountered an error while running operation: {e}'))
+        status = 1
+
+    if os.environ.get('FAKE_DBT_LOG'):
+        with open(os.environ['FAKE_DBT_LOG'], 'a') as file:
+            file.write(json.dumps({'macro': macro_name, 'seconds': time.perf_counter() - start}) + '\n')
+    return status
+
+
+def install(bin_path):
+    '''
+    Write a `dbt` script running this file into bin_path and return the directory, to put first on PATH
+    '''
+    os.makedirs(bin_path, exist_ok=True)
+    script = os.path.join(bin_path, 'dbt')
+    with open(script, 'w') as file:
+        file.write(f'#!/bin/sh\nexec "{sys.executable}" "{Path(__file__).resolve()}" "$@"\n')
+    os.chmod(script, 0o755)
+    return bin_path
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,183 @@
+'''
+Time dbt-generator commands end to end against a synthetic project and a fake dbt, and write the results as JSON.
+
+    python benchmarks/run_benchmarks.py --tables 500 --columns 50 --latency 0.5 -j 8 -o results.json
+    python benchmarks/run_benchmarks.py --tables 500 --columns 50 --compare results.json
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+
+import click
+
+import synthetic
+import fake_dbt
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+
+
+class Project:
+    '''
+    Synthetic dbt project in a temporary directory, with the fake dbt first on PATH
+    '''
+
+    def __init__(self, path, tables, columns, rules, latency):
+        self.path = Path(path)
+        self.sources = str(self.path / 'sources.yml')
+        self.models = str(self.path / 'models' / 'base')
+        self.transforms = str(self.path / 'transforms.yml')
+        self.seed = str(self.path / 'dbt_snapshot_seed.csv')
+        self.dbt_log = str(self.path / 'fake_dbt.log')
+        self.trace = str(self.path / 'timings.json')
+        names = synthetic.table_names(tables)
+        synthetic.write_sources_yml(self.sources, names)
+        synthetic.write_base_models(self.models, names, columns)
+        synthetic.write_transforms(self.transforms, rules)
+        synthetic.write_snapshot_seed(self.seed, names)
+        bin_path = fake_dbt.install(str(self.path / 'bin'))
+        self.env = dict(os.environ, PATH=bin_path + os.pathsep + os.environ.get('PATH', ''),
+                        PYTHONPATH=str(PACKAGE_DIR) + os.pathsep + os.environ.get('PYTHONPATH', ''),
+                        FAKE_DBT_LATENCY=str(latency), FAKE_DBT_COLUMNS=str(columns), FAKE_DBT_TABLES=str(tables),
+                        FAKE_DBT_LOG=self.dbt_log, PYTHONWARNINGS='ignore')
+
+    def out(self, name):
+        return str(self.path / 'out' / name)
+
+    def run(self, args):
+        '''
+        Run a dbt-generator command and return (seconds, dbt calls, seconds spent in dbt, {category: seconds})
+        with the time spent in each phase of the command (dbt, parse, io, job...) from its --timings-json
+        '''
+        for path in (self.dbt_log, self.trace):
+            if os.path.exists(path):
+                os.remove(path)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'dbt_generator.dbt_generator', '--timings-json', self.trace] + args,
+                       cwd=self.path, env=self.env, check=True, stdout=subprocess.DEVNULL)
+        seconds = time.perf_counter() - start
+        calls = []
+        if os.path.exists(self.dbt_log):
+            with open(self.dbt_log) as file:
+                calls = [json.loads(line) for line in file]
+        return seconds, len(calls), sum(call['seconds'] for call in calls), self.phases()
+
+    def phases(self):
+        '''
+        Total the spans of the last run by category. Spans nest (a job contains its dbt call and write)
+        and jobs overlap with --jobs, so the totals are time spent in each phase, not shares of the run.
+        '''
+        if not os.path.exists(self.trace):
+            return {}
+        with open(self.trace) as file:
+            events = json.load(file)['traceEvents']
+        phases = {}
+        for event in events:
+            phases[event['cat']] = phases.get(event['cat'], 0.0) + event['dur'] / 1e6
+        return phases
+
+
+def scenarios(project, jobs):
+    '''
+    Return {name: (setup args or None, timed args)}. Setup commands run untimed before each timed run.
+    '''
+    jobs = ['-j', str(jobs)]
+    macros = str(PACKAGE_DIR / 'macros')
+    def generate(name):
+        return ['generate', '-s', project.sources, '-o', project.out(name)]
+
+    cached = ['generate', '-s', project.sources, '-o', project.out('generate-cached'), '--cache', 'True',
+              '--cache-dir', project.out('cache'), '--batch', 'True']
+    transforms = ['--split-columns', 'True', '--id-as-int', 'True', '--convert-timestamp', 'True']
+    snapshots = ['generate-snapshots', '--system_name', synthetic.SYSTEM_NAME, '-s', project.out('snapshots'),
+                 '-m', project.out('snapshot-models'), '--seed-path', project.seed]
+    return {
+        'generate': (None, generate('generate') + jobs),
+        'generate-batch': (None, generate('generate-batch') + ['--batch', 'True']),
+        'generate-cached': (cached, cached),
+        'transform': (None, ['transform', '-m', project.models, '-t', project.transforms, '-o', project.out('transform')] + jobs),
+        'bq-transform': (None, ['bq-transform', '-m', project.models, '-o', project.out('bq-transform')] + transforms + jobs),
+        'sf-transform': (None, ['sf-transform', '-m', project.models, '-o', project.out('sf-transform')] + transforms + jobs),
+        'generate-snapshots': (None, snapshots + jobs),
+        'generate-snapshots-native': (None, snapshots + ['--native', 'True', '--macros-path', macros] + jobs),
+    }
+
+
+def get_version():
+    try:
+        return subprocess.check_output(['git', 'describe', '--always', '--dirty'], cwd=PACKAGE_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results, baseline_file):
+    with open(baseline_file) as file:
+        baseline = {result['scenario']: result for result in json.load(file)['results']}
+    print(f'{"scenario":<28}{"baseline":>10}{"current":>10}{"ratio":>8}')
+    for result in results:
+        before = baseline.get(result['scenario'])
+        if before is None:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('nan')
+        print(f'{result["scenario"]:<28}{before["seconds"]:>10.3f}{result["seconds"]:>10.3f}{ratio:>8.2f}')
+
+
+@click.command(help='Benchmark dbt-generator commands against a synthetic project and a fake dbt')
+@click.option('--tables', type=int, default=50, help='(default=50) Tables in the synthetic source')
+@click.option('--columns', type=int, default=30, help='(default=30) Columns per table')
+@click.option('--rules', type=int, default=100, help='(default=100) Rules in the synthetic transforms .yml')
+@click.option('--latency', type=float, default=0.0, help='(default=0) Seconds each fake dbt call takes')
+@click.option('-j', '--jobs', type=int, default=1, help='(default=1) --jobs passed to the commands')
+@click.option('--repeat', type=int, default=1, help='(default=1) Runs per scenario; the median is reported')
+@click.option('--scenario', 'selected', type=str, multiple=True, help='(optional) Only run these scenarios, can be repeated')
+@click.option('-o', '--output', type=click.Path(dir_okay=False), default=None, help='(optional) Write the results to this JSON file')
+@click.option('--compare', 'baseline', type=click.Path(exists=True, dir_okay=False), default=None, help='(optional) Compare with the results of an earlier run')
+def main(tables, columns, rules, latency, jobs, repeat, selected, output, baseline):
+    with tempfile.TemporaryDirectory(prefix='dbt_generator_bench_') as path:
+        start = time.perf_counter()
+        project = Project(path, tables, columns, rules, latency)
+        setup_seconds = time.perf_counter() - start
+        results = []
+        for name, (setup, args) in scenarios(project, jobs).items():
+            if selected and name not in selected:
+                continue
+            runs = []
+            for _ in range(repeat):
+                shutil.rmtree(project.out(name), ignore_errors=True)
+                if setup:
+                    project.run(setup)
+                runs.append(project.run(args))
+            seconds = statistics.median(run[0] for run in runs)
+            # the fastest run, for its dbt calls and phases
+            _, calls, dbt_seconds, phases = min(runs, key=lambda run: run[0])
+            results.append({'scenario': name, 'seconds': seconds, 'runs': [run[0] for run in runs],
+                            'dbt_calls': calls, 'dbt_seconds': dbt_seconds, 'phases': phases, 'command': args[0]})
+            phases_text = '  '.join(f'{category} {phase_seconds:.3f}s' for category, phase_seconds in sorted(phases.items())
+                                    if category != 'command')
+            print(f'{name:<28}{seconds:>8.3f}s  {calls:>6} dbt calls  {dbt_seconds:>8.3f}s in dbt  {phases_text}')
+
+    report = {
+        'version': get_version(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {'tables': tables, 'columns': columns, 'rules': rules, 'latency': latency, 'jobs': jobs,
+                       'repeat': repeat},
+        'setup_seconds': setup_seconds,
+        'results': results,
+    }
+    if output:
+        with open(output, 'w') as file:
+            json.dump(report, file, indent=2)
+    if baseline:
+        compare(results, baseline)
+
+
+if __name__ == '__main__':
+    main()
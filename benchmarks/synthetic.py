@@ -0,0 +1,84 @@
+'''
+Synthetic sources, base models, transforms and snapshot seeds for the benchmarks. Everything is derived from
+table names, so the fake dbt and the generators agree on the columns of a table without sharing state.
+'''
+import os
+import csv
+import sys
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from dbt_generator.generate_base_models import render_base_model  # noqa: E402
+from dbt_generator.snapshot_seed import SEED_COLUMNS  # noqa: E402
+
+
+SOURCE_NAME = 'BENCH'
+SYSTEM_NAME = 'BENCH'
+WORDS = ['ACCOUNT', 'CUSTOMER', 'AMOUNT', 'CURRENCY', 'CODE', 'NAME', 'STATUS', 'DATE', 'OWNER', 'REGION', 'TYPE',
+         'EMAIL', 'PHONE', 'LAST', 'MODIFIED', 'TOTAL', 'BILLING', 'ADDRESS', 'NUMBER', 'PRODUCT']
+FIXED_COLUMNS = [('ID', 'NUMBER'), ('CREATED_AT', 'TIMESTAMP_NTZ'), ('UPDATED_AT', 'TIMESTAMP_NTZ'),
+                 ('_FIVETRAN_SYNCED', 'TIMESTAMP_TZ')]
+
+
+def table_names(count):
+    return [f'TABLE_{index:05d}' for index in range(count)]
+
+
+def synthetic_columns(table_name, count):
+    '''
+    Return [(column_name, data_type)] for a table: a few fixed columns, then compound words such as
+    CUSTOMERSTATUS3 that exercise column splitting
+    '''
+    seed = zlib.crc32(table_name.encode('utf-8'))
+    columns = FIXED_COLUMNS[:count]
+    index = 0
+    while len(columns) < count:
+        first = WORDS[(seed + index) % len(WORDS)]
+        second = WORDS[(seed // 7 + index * 3) % len(WORDS)]
+        data_type = 'NUMBER' if second in ('AMOUNT', 'TOTAL', 'NUMBER') else 'TEXT'
+        columns.append((f'{first}{second}{index}', data_type))
+        index += 1
+    return columns
+
+
+def write_sources_yml(path, tables):
+    lines = ['version: 2', '', 'sources:', f'  - name: {SOURCE_NAME}', '    database: RAW', '    tables:']
+    lines += [f'    - name: {table}' for table in tables]
+    with open(path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+
+def write_base_models(path, tables, columns):
+    os.makedirs(path, exist_ok=True)
+    for table in tables:
+        column_names = [name for name, _ in synthetic_columns(table, columns)]
+        with open(os.path.join(path, table + '.sql'), 'w') as file:
+            file.write(render_base_model(table, SOURCE_NAME, column_names, False, False, '', False))
+
+
+def write_transforms(path, rules):
+    '''
+    Write a transforms .yml with the given number of rules: a few patterns, then exact column renames
+    '''
+    lines = ['"*_at":', '  name: "{column}"', '  sql: cast({column} as timestamp)',
+             '^_fivetran_.*:', '  name: "{column}"',
+             'id:', '  name: id', '  sql: cast(id as integer)']
+    for index in range(max(rules - 3, 0)):
+        first, second = WORDS[index % len(WORDS)], WORDS[(index // len(WORDS)) % len(WORDS)]
+        lines += [f'{first}{second}{index}:'.lower(), f'  name: {first}_{second}_{index}'.lower()]
+    with open(path, 'w') as file:
+        file.write('\n'.join(lines) + '\n')
+
+
+def write_snapshot_seed(path, tables):
+    '''
+    Write a dbt_snapshot_seed.csv with one row per table, cycling through the snapshot variants
+    '''
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(SEED_COLUMNS)
+        for index, table in enumerate(tables):
+            variant = index % 4
+            writer.writerow([SYSTEM_NAME, SOURCE_NAME, table, 'ID', 'timestamp', 'UPDATED_AT', '',
+                             1, 0, int(variant in (1, 3)), 0, '', '', int(variant in (2, 3))])
@@ -0,0 +1,31 @@
+def iter_catalog_sources(file_path):
+    '''
+    Stream (unique_id, node) pairs of the sources in a dbt catalog.json without loading the whole file
+    '''
+    import ijson
+
+    with open(file_path, 'rb') as file:
+        yield from ijson.kvitems(file, 'sources')
+
+
+class Catalog:
+    '''
+    Columns of every source table in a catalog.json, indexed by (source_name, table_name)
+    '''
+
+    def __init__(self, file_path, source_names=None):
+        self.file_path = file_path
+        self.tables = {}
+        for unique_id, node in iter_catalog_sources(file_path):
+            # source.<project>.<source_name>.<table_name>
+            _, _, source_name, table_name = unique_id.split('.', 3)
+            if source_names and source_name not in source_names:
+                continue
+            columns = sorted(node['columns'].values(), key=lambda column: column['index'])
+            self.tables[(source_name, table_name)] = [(column['name'], column['type']) for column in columns]
+
+    def get_columns(self, source_name, table_name):
+        '''
+        Return the [(column_name, data_type)] of a table, or None if it is not in the catalog
+        '''
+        return self.tables.get((source_name, table_name))
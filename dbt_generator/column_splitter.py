@@ -0,0 +1,91 @@
+import os
+import gzip
+import sqlite3
+import hashlib
+from math import log
+from functools import lru_cache
+from .timings import timings
+
+
+# splitters loaded in this process, keyed by (words_file, cache_path), so a word list is read once per process
+splitters = {}
+
+
+def load_language_model(words_file=None):
+    '''
+    Return a wordninja language model. A .gz file replaces the default model, like wordninja.LanguageModel;
+    a plain text file lists domain words, one per line, that are ranked ahead of the default vocabulary.
+    '''
+    import wordninja  # loads its language model on import, so only pay for it when splitting
+    if words_file is None:
+        return wordninja.DEFAULT_LANGUAGE_MODEL
+    if words_file.endswith('.gz'):
+        return wordninja.LanguageModel(words_file)
+
+    with open(words_file) as file:
+        words = [word.strip().lower() for word in file if word.strip()]
+    default_words = os.path.join(os.path.dirname(os.path.abspath(wordninja.__file__)), 'wordninja', 'wordninja_words.txt.gz')
+    with gzip.open(default_words) as file:
+        words += file.read().decode().split()
+    words = list(dict.fromkeys(words))
+    # same Zipf's law costs as wordninja.LanguageModel, without writing the combined list to a .gz file
+    model = wordninja.LanguageModel.__new__(wordninja.LanguageModel)
+    model._wordcost = dict((word, log((index + 1) * log(len(words)))) for index, word in enumerate(words))
+    model._maxword = max(len(word) for word in words)
+    return model
+
+
+def hash_words_file(words_file):
+    if words_file is None:
+        return 'default'
+    with open(words_file, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+class ColumnSplitter:
+    '''
+    Split column names into words (currencycode => currency_code), memoized in a bounded LRU cache
+    and optionally in a SQLite file shared by runs and worker processes
+    '''
+
+    def __init__(self, words_file=None, cache_path=None, max_size=65536):
+        self.model = load_language_model(words_file)
+        self.model_key = hash_words_file(words_file)
+        self.connection = None
+        self.pending = []
+        if cache_path:
+            self.connection = sqlite3.connect(cache_path, timeout=30)
+            self.connection.execute('create table if not exists splits '
+                                    '(model text, name text, split text, primary key (model, name))')
+        self.split = lru_cache(maxsize=max_size)(self.split_uncached)
+
+    def split_uncached(self, column_name):
+        if self.connection is not None:
+            row = self.connection.execute('select split from splits where model = ? and name = ?',
+                                          (self.model_key, column_name)).fetchone()
+            if row is not None:
+                timings.count('split cache hits')
+                return row[0]
+        with timings.span('wordninja split', 'split'):
+            split = '_'.join(self.model.split(column_name))
+        if self.connection is not None:
+            self.pending.append((self.model_key, column_name, split))
+        return split
+
+    def flush(self):
+        '''
+        Save the splits computed since the last flush to the on-disk cache
+        '''
+        if self.connection is None or not self.pending:
+            return
+        with self.connection:
+            self.connection.executemany('insert or ignore into splits values (?, ?, ?)', self.pending)
+        self.pending = []
+
+
+def get_splitter(words_file=None, cache_path=None):
+    key = (words_file, cache_path)
+    if key not in splitters:
+        with timings.span('load language model', 'split', words_file=words_file):
+            splitters[key] = ColumnSplitter(words_file, cache_path)
+    return splitters[key]
@@ -1,22 +1,136 @@
 import os
 import click
-from .generate_base_models import *
-from .process_base_models import *
-import ast
-import pandas as pd
+from functools import partial
+
+# Commands import what they need when they run, so `dbt-generator <command> --help` and commands that
+# do not use yaml, wordninja, jinja2 or dbt do not pay for importing them.
 
 
 def get_file_name(file_path):
     return os.path.basename(file_path)
 
+def get_model_file_name(table, source_name, custom_prefix, model_prefix):
+    file_name = table + '.sql'
+    if model_prefix:
+        file_name = source_name + '_' + file_name
+    if custom_prefix:
+        file_name = custom_prefix + '_' + file_name
+    return file_name
+
+def write_model(output_path, file_name, query, transform=None):
+    if transform is not None:
+        transform(query, os.path.join(output_path, file_name))
+        return
+    from .output import write_output
+    write_output(os.path.join(output_path, file_name), query)
+
+def get_model_transform(transforms_path, dialect, drop_metadata, case_sensitive, split_columns, id_as_int, convert_timestamp):
+    '''
+    Return a function that transforms a generated model in memory and writes it, for generate --transforms and/or
+    --dialect, or None to write models as generated
+    '''
+    if not transforms_path and not dialect:
+        return None
+    from .transform_pipeline import transform_query
+    from .process_base_models import load_transforms_file, ProcessBaseModelsWithTransforms, ProcessBaseModelsBQ, ProcessBaseModelsSF
+    kwargs = {'drop_metadata': drop_metadata, 'case_sensitive': case_sensitive}
+    if transforms_path:
+        kwargs.update(transforms_file=transforms_path, transforms=load_transforms_file(transforms_path, case_sensitive))
+    if not dialect:
+        return partial(transform_query, ProcessBaseModelsWithTransforms, kwargs)
+    kwargs.update(split_columns=split_columns, id_as_int=id_as_int, convert_timestamp=convert_timestamp)
+    return partial(transform_query, {'bq': ProcessBaseModelsBQ, 'sf': ProcessBaseModelsSF}[dialect], kwargs)
+
+def save_base_model(save_model, table, source_name, case_sensitive, leading_commas, materialized, use_snapshot):
+    from .generate_base_models import generate_base_model
+    query = generate_base_model(table, source_name, case_sensitive, leading_commas, materialized, use_snapshot)
+    save_model(table, query)
+
+def report_failures(results):
+    from .job_pool import summarize_failures
+    summary = summarize_failures(results)
+    if summary:
+        raise click.ClickException(summary)
+
+def parse_shard_option(ctx, param, value):
+    '''
+    Turn --shard INDEX/COUNT into the Shard of the command, or None to do all the work
+    '''
+    if value is None:
+        return None
+    from .shards import Shard, parse_shard
+    try:
+        index, count = parse_shard(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return Shard(ctx.info_name, index, count)
+
+def report_results(results, shard=None, shard_manifest=None):
+    '''
+    Write the manifest of a --shard run, failed jobs included, then fail the command if any job failed
+    '''
+    if shard is not None:
+        shard.write_manifest(shard_manifest or f'dbt_generator_shard_{shard.index}_of_{shard.count}.json', results)
+    report_failures(results)
+
+def start_profiling(ctx, profile, timings_json, cprofile):
+    '''
+    Record timings and cProfile stats until the command finishes, then report them
+    '''
+    from .timings import timings
+    profiler = None
+    if cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    def report():
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(cprofile)
+        if profile:
+            print(timings.summary())
+        if timings_json:
+            timings.write_trace(timings_json)
+
+    ctx.call_on_close(report)
+    if profile or timings_json:
+        timings.enable()
+        ctx.with_resource(timings.span(ctx.invoked_subcommand, 'command'))
+    if profiler is not None:
+        profiler.enable()
+
 @click.group(help='Generate and process base dbt models')
-def dbt_generator():
-    pass
+@click.option('--warm-worker', type=bool, default=False, help='(default=False) Serve every dbt run-operation from one long-lived dbt process instead of starting dbt for each call')
+@click.option('--dbt-timeout', type=int, default=None, help='(optional) Seconds to wait for a run-operation in the warm worker before restarting it')
+@click.option('--profile', type=bool, default=False, help='(default=False) Time the dbt calls, parsing, writes and jobs of the command and print a summary table at the end')
+@click.option('--timings-json', type=click.Path(dir_okay=False), default=None, help='(optional) Write the timings to this file as trace events, viewable in chrome://tracing, Perfetto or speedscope')
+@click.option('--cprofile', type=click.Path(dir_okay=False), default=None, help='(optional) Write cProfile stats of the command to this file')
+@click.pass_context
+def dbt_generator(ctx, warm_worker, dbt_timeout, profile, timings_json, cprofile):
+    if profile or timings_json or cprofile:
+        start_profiling(ctx, profile, timings_json, cprofile)
+    if warm_worker:
+        from .dbt_worker import DbtWorkerPool
+        from .generate_base_models import set_dbt_worker
+        workers = DbtWorkerPool(timeout=dbt_timeout)
+        set_dbt_worker(workers)
+        ctx.call_on_close(workers.close)
+        # the worker is module state, so do not leave a closed pool behind for the next command in this process
+        ctx.call_on_close(partial(set_dbt_worker, None))
+
+@dbt_generator.result_callback()
+def report_output(*args, **kwargs):
+    from .output import output_stats
+    if output_stats.total():
+        print(output_stats.summary())
 
 @dbt_generator.command(help='Generate base models based on a .yml source')
-@click.option('-s', '--source-yml', type=click.Path(), help='Source .yml file to be used')
+@click.option('-s', '--source-yml', type=click.Path(), help='Source .yml file to be used, or a directory or glob of .yml files to generate every source in')
 @click.option('-o', '--output-path', type=click.Path(), help='Path to write generated models')
 @click.option('-m', '--model', type=str, default='', help='Select one model to generate')
+@click.option('--source', 'source_selector', type=str, multiple=True, help='(optional) Generate the sources matching this name or glob, can be repeated. Models are written to a directory per source')
+@click.option('--table', 'table_selector', type=str, multiple=True, help='(optional) Only generate the tables matching this name or glob, can be repeated')
+@click.option('--all-sources', type=bool, default=False, help='(default=False) Generate every source of the .yml files instead of --source-index, in a directory per source')
 @click.option('-c', '--custom_prefix', type=str, default='', help='Enter a Custom String Prefix for Model Filename')
 @click.option('--model-prefix', type=bool, default=False, help='Prefix model name with source_name + _')
 @click.option('--source-index', type=int, default=0, help='Index of the source to generate base models for')
@@ -25,21 +139,159 @@ def dbt_generator():
 @click.option('--leading-commas', type=bool, help='(default=False)  Whether you want your commas to be leading (vs trailing).', default=False)
 @click.option('--materialized', type=str, default='', help='Set materialization style (e.g. table, view, incremental) inside of the model config block. If not set, materialization style will be controlled by dbt_project.yml')
 @click.option('--use-snapshot', type=bool, help='(default=False)  Whether you want your base model to point to an EXISTING snapshot named (snp_ + source_name + table_name).', default=False)
-def generate(source_yml, output_path, source_index, model, custom_prefix, model_prefix, case_sensitive, leading_commas, materialized, use_snapshot):
-    tables, source_name = get_base_tables_and_source(source_yml, source_index)
-    if model:
-        tables = [model]
+@click.option('--batch', type=bool, help='(default=False) Fetch the columns of every table in one query and render all base models in a single run-operation', default=False)
+@click.option('-j', '--jobs', type=int, default=1, help='(default=1) Number of tables to generate concurrently')
+@click.option('--retries', type=int, default=0, help='(default=0) Number of times to retry a table after a dbt or warehouse error, with exponential backoff')
+@click.option('--from-catalog', type=click.Path(), default='', help='(optional) Render base models in Python from the columns in a dbt catalog.json (e.g. target/catalog.json), without calling dbt or the warehouse')
+@click.option('--from-store', type=click.Path(exists=True, dir_okay=False), default=None, help='(optional) Render base models in Python from the columns in a schema store filled by refresh-schema, without calling dbt or the warehouse')
+@click.option('--target-type', type=str, default='', help='(optional) Adapter type of the catalog (e.g. bigquery). Controls how --case-sensitive columns are quoted with --from-catalog and --from-store')
+@click.option('--quote-reserved', type=bool, default=False, help='(default=False) Quote columns named after a reserved word of the --target-type dialect (snowflake, bigquery, otherwise ANSI) with --from-catalog and --from-store')
+@click.option('--cache', type=bool, default=False, help='(default=False) Reuse previously generated models for tables whose columns and options have not changed')
+@click.option('--cache-dir', type=click.Path(), default='.dbt_generator_cache', help='(default=.dbt_generator_cache) Directory of the model cache')
+@click.option('--force', type=bool, default=False, help='(default=False) Regenerate every model even if it is in the cache')
+@click.option('--cache-max-age-days', type=int, default=None, help='(optional) Evict cache entries not used for this many days')
+@click.option('--cache-max-size-mb', type=int, default=None, help='(optional) Evict the least recently used cache entries above this size')
+@click.option('--transforms', 'transforms_path', type=click.Path(exists=True, dir_okay=False), default=None, help='(optional) Apply a transforms .yml to each model as it is generated, before --dialect, writing only the transformed model')
+@click.option('--dialect', type=click.Choice(['bq', 'sf']), default=None, help='(optional) Apply the bq-transform or sf-transform processing to each model as it is generated, writing only the transformed model')
+@click.option('--drop-metadata', type=bool, default=True, help='(default=True) With --transforms or --dialect, drop source columns prefixed with "_"')
+@click.option('--split-columns', type=bool, default=False, help='(default=False) With --dialect, split column names. E.g. currencycode => currency_code')
+@click.option('--id-as-int', type=bool, default=False, help='(default=False) With --dialect, convert id to int')
+@click.option('--convert-timestamp', type=bool, default=False, help='(default=False) With --dialect, convert timestamp to datetime')
+@click.option('--shard', type=str, default=None, callback=parse_shard_option, help='(optional) INDEX/COUNT: only do the tables assigned to shard INDEX (from 1) of COUNT by a stable hash, and write a shard manifest')
+@click.option('--shard-manifest', type=click.Path(dir_okay=False), default=None, help='(optional, default=dbt_generator_shard_INDEX_of_COUNT.json) Path to write the manifest of the --shard to')
+def generate(source_yml, output_path, source_index, model, source_selector, table_selector, all_sources, custom_prefix, model_prefix, case_sensitive, leading_commas, materialized, use_snapshot, batch, jobs, retries, from_catalog, from_store, target_type, quote_reserved, cache, cache_dir, force, cache_max_age_days, cache_max_size_mb, transforms_path, dialect, drop_metadata, split_columns, id_as_int, convert_timestamp, shard, shard_manifest):
+    from .generate_base_models import get_source_config, select_sources, matches
+    from .model_cache import ModelCache
+    from .job_pool import run_jobs
+    fan_out = all_sources or bool(source_selector) or not os.path.isfile(source_yml)
+    if fan_out:
+        sources = select_sources(source_yml, source_selector, table_selector + ((model,) if model else ()))
+        if not sources:
+            raise click.ClickException(f'No sources found in {source_yml}')
+    else:
+        source = get_source_config(source_yml, source_index)
+        tables = [model] if model else [table['name'] for table in source['tables'] if matches(table['name'], table_selector)]
+        sources = [(source, tables)]
+    if shard is not None:
+        selected = set(shard.select(f"{source['name']}.{table}" for source, tables in sources for table in tables))
+        sources = [(source, [table for table in tables if f"{source['name']}.{table}" in selected]) for source, tables in sources]
+        sources = [(source, tables) for source, tables in sources if tables]
+
+    catalog = None
+    if from_catalog:
+        from .catalog import Catalog
+        catalog = Catalog(from_catalog, [source['name'] for source, _ in sources])
+    elif from_store:
+        from .schema_store import SchemaStore
+        catalog = SchemaStore(from_store)
+    model_cache = ModelCache(cache_dir, cache_max_age_days, cache_max_size_mb) if cache else None
+    transform = get_model_transform(transforms_path, dialect, drop_metadata, case_sensitive, split_columns, id_as_int, convert_timestamp)
+
+    tasks = []
+    try:
+        for source, tables in sources:
+            source_output_path = os.path.join(output_path, source['name'].lower()) if fan_out else output_path
+            if from_catalog:
+                get_columns = partial(catalog.get_columns, source['name'])
+            elif from_store:
+                schema = source.get('schema', source['name'])
+                try:
+                    database = catalog.resolve_database(source.get('database'), schema)
+                except ValueError as e:
+                    raise click.ClickException(f'{e}: set database: for source {source["name"]}')
+                get_columns = partial(catalog.get_columns, database, schema)
+            else:
+                get_columns = None
+            tasks += generate_source(source['name'], tables, source_output_path, custom_prefix, model_prefix,
+                                     case_sensitive, leading_commas, materialized, use_snapshot, batch, get_columns,
+                                     from_catalog or from_store, target_type, quote_reserved, model_cache, force, fan_out, transform)
+        report_results(run_jobs(tasks, jobs, retries), shard, shard_manifest)
+    finally:
+        if model_cache:
+            model_cache.evict()
+
+def generate_source(source_name, tables, output_path, custom_prefix, model_prefix, case_sensitive, leading_commas, materialized, use_snapshot, batch, catalog, catalog_path, target_type, quote_reserved, model_cache, force, qualify_tasks, transform=None):
+    '''
+    Generate the base models of one source that can be rendered straight away (from the cache, a catalog or
+    the batch macro) and return (name, task) pairs for the tables that need a run-operation each.
+    catalog looks up [(column, data_type)] by table when rendering from a catalog or the schema store.
+    transform, from get_model_transform, transforms each model in memory before it is written.
+    '''
+    from .generate_base_models import get_base_model_columns, generate_base_models_batch, render_base_model
+    keys = {}
+    # each table is looked up once, with --from-store that is a query per table
+    catalog_columns = {table: catalog(table) for table in tables} if catalog else {}
+
+    def save_model(table, query):
+        write_model(output_path, get_model_file_name(table, source_name, custom_prefix, model_prefix), query, transform)
+        if table in keys:
+            model_cache.put(keys[table], query)
+
+    if model_cache:
+        options = {'case_sensitive': case_sensitive, 'leading_commas': leading_commas, 'materialized': materialized,
+                   'use_snapshot': use_snapshot, 'target_type': target_type, 'quote_reserved': quote_reserved,
+                   'renderer': 'catalog' if catalog else 'batch' if batch else 'macro'}
+        if catalog:
+            columns = {table: table_columns for table, table_columns in catalog_columns.items() if table_columns}
+        else:
+            columns = get_base_model_columns(tables, source_name)
+        pending = []
+        for table in tables:
+            if table in columns:
+                keys[table] = model_cache.fingerprint(source_name, table, columns[table], options)
+                query = None if force else model_cache.get(keys[table])
+                if query is not None:
+                    write_model(output_path, get_model_file_name(table, source_name, custom_prefix, model_prefix), query, transform)
+                    continue
+            pending.append(table)
+        print(f'{len(tables) - len(pending)} models unchanged in cache, generating {len(pending)}')
+        tables = pending
+
+    if catalog:
+        missing = []
+        for table in tables:
+            columns = catalog_columns[table]
+            if not columns:
+                missing.append(table)
+                continue
+            save_model(table, render_base_model(table, source_name, [name for name, _ in columns], case_sensitive,
+                                                leading_commas, materialized, use_snapshot, target_type, quote_reserved))
+        if missing:
+            raise click.ClickException(f'No columns found in {catalog_path} for tables: {", ".join(missing)}')
+        return []
+    if batch:
+        if tables:
+            models = generate_base_models_batch(tables, source_name, case_sensitive, leading_commas, materialized, use_snapshot)
+            missing = []
+            for table in tables:
+                if table not in models:
+                    missing.append(table)
+                    continue
+                save_model(table, models[table])
+            if missing:
+                raise click.ClickException(f'No columns found in source {source_name} for tables: {", ".join(missing)}')
+        return []
+    tasks = []
     for table in tables:
-        file_name = table + '.sql'
-        if model_prefix:
-            file_name = source_name + '_' + file_name
-        if custom_prefix:
-            file_name = custom_prefix + '_' + file_name
-        
-        query = generate_base_model(table, source_name, case_sensitive, leading_commas, materialized, use_snapshot)
-        file = open(os.path.join(output_path, file_name), 'w', newline='')
-        file.write(query)
-        file.close()
+        tasks.append((f'{source_name}.{table}' if qualify_tasks else table,
+                      partial(save_base_model, save_model, table, source_name,
+                              case_sensitive, leading_commas, materialized, use_snapshot)))
+    return tasks
+
+def watch_transforms(model_path, transforms_path, output_path, processor_class, processor_kwargs, debounce, poll_interval, shard):
+    '''
+    Transform every model, then keep re-transforming the models affected by changes to them or the transforms file
+    '''
+    from .watch import TransformWatch, get_watcher
+    if shard is not None:
+        raise click.UsageError('--watch cannot be used with --shard')
+    if not transforms_path:
+        raise click.UsageError('--watch needs the transforms file to watch, pass -t/--transforms-path')
+    watcher = get_watcher([model_path, os.path.dirname(os.path.abspath(transforms_path))], poll_interval)
+    transform_watch = TransformWatch(model_path, transforms_path, output_path, processor_kwargs['drop_metadata'],
+                                     processor_kwargs['case_sensitive'], processor_class, processor_kwargs)
+    transform_watch.run_all()
+    transform_watch.watch(watcher, debounce)
 
 @dbt_generator.command(help='Transform base models in a directory using a transforms.yml file')
 @click.option('-m', '--model-path', type=click.Path(), help='The path to models')
@@ -47,12 +299,26 @@ def generate(source_yml, output_path, source_index, model, custom_prefix, model_
 @click.option('-o', '--output-path', type=click.Path(), help='Path to write transformed models to')
 @click.option('--drop-metadata', type=bool, help='Optionally drop source columns prefixed with "_" if that designates metadata columns not needed in target', default=True)
 @click.option('--case-sensitive', type=bool, help='(default=False) treat column names as case-sensitive - otherwise force all to lower', default=False)
-def transform(model_path, transforms_path, output_path, drop_metadata, case_sensitive):
+@click.option('-j', '--jobs', type=int, default=1, help='(default=1) Number of processes to transform models with')
+@click.option('--incremental', type=bool, default=False, help='(default=False) Skip models whose input, transforms and options are unchanged since the last run')
+@click.option('--watch', type=bool, default=False, help='(default=False) Keep running and re-transform the models affected by every change to the models or the transforms file')
+@click.option('--debounce', type=float, default=0.1, help='(default=0.1) With --watch, seconds without changes to wait for before transforming')
+@click.option('--poll-interval', type=float, default=None, help='(optional) With --watch, poll for changes every N seconds instead of using inotify')
+@click.option('--shard', type=str, default=None, callback=parse_shard_option, help='(optional) INDEX/COUNT: only do the models assigned to shard INDEX (from 1) of COUNT by a stable hash, and write a shard manifest')
+@click.option('--shard-manifest', type=click.Path(dir_okay=False), default=None, help='(optional, default=dbt_generator_shard_INDEX_of_COUNT.json) Path to write the manifest of the --shard to')
+def transform(model_path, transforms_path, output_path, drop_metadata, case_sensitive, jobs, incremental, watch, debounce, poll_interval, shard, shard_manifest):
+    from .process_base_models import get_sql_files, load_transforms_file, ProcessBaseModelsWithTransforms
+    from .transform_pipeline import run_transforms
+    if watch:
+        watch_transforms(model_path, transforms_path, output_path, ProcessBaseModelsWithTransforms,
+                         {'drop_metadata': drop_metadata, 'case_sensitive': case_sensitive}, debounce, poll_interval, shard)
+        return
     sql_files = get_sql_files(model_path)
-    for sql_file in sql_files:
-        processor = ProcessBaseModelsWithTransforms(os.path.join(
-            model_path, sql_file), transforms_path, drop_metadata, case_sensitive)
-        processor.process_base_models(os.path.join(output_path, sql_file))
+    if shard is not None:
+        sql_files = shard.select(sorted(sql_files))
+    processor_kwargs = {'transforms_file': transforms_path, 'drop_metadata': drop_metadata, 'case_sensitive': case_sensitive,
+                        'transforms': load_transforms_file(transforms_path, case_sensitive)}
+    report_results(run_transforms(model_path, sql_files, output_path, ProcessBaseModelsWithTransforms, processor_kwargs, jobs, incremental), shard, shard_manifest)
 
 
 @dbt_generator.command(help='Transform one base model using a transforms.yml file')
@@ -62,42 +328,82 @@ def transform(model_path, transforms_path, output_path, drop_metadata, case_sens
 @click.option('--drop-metadata', type=bool, help='Toptionally drop source columns prefixed with "_" if that designates metadata columns not needed in target', default=True)
 @click.option('--case-sensitive', type=bool, help='(default=False) treat column names as case-sensitive - otherwise force all to lower', default=False)
 def transforms(model_path, transforms_path, output_path, drop_metadata, case_sensitive):
+    from .process_base_models import ProcessBaseModelsWithTransforms
     file_name = get_file_name(model_path)
     processor = ProcessBaseModelsWithTransforms(
-        model_path, transforms_path, drop_metadata, case_sensitive)
+        transforms_path, model_path, drop_metadata, case_sensitive)
     processor.process_base_models(os.path.join(output_path, file_name))
 
 
-@dbt_generator.command(help='Transform base models in a directory for BigQuery source')
-@click.option('-m', '--model-path', type=click.Path(), help='The path to models')
-@click.option('-o', '--output-path', type=click.Path(), help='Path to write transformed models to')
-@click.option('--drop-metadata', type=bool, help='Toptionally drop source columns prefixed with "_" if that designates metadata columns not needed in target', default=True)
-@click.option('--case-sensitive', type=bool, help='(default=False) treat column names as case-sensitive - otherwise force all to lower', default=False)
-@click.option('--split-columns', type=bool, help='Split column names. E.g. currencycode => currency_code', default=False)
-@click.option('--id-as-int', type=bool, help='Convert id to int', default=False)
-@click.option('--convert-timestamp', type=bool, help='Convert timestamp to datetime', default=False)
-def bq_transform(model_path, output_path, drop_metadata, case_sensitive, split_columns, id_as_int, convert_timestamp):
+WAREHOUSE_TRANSFORM_OPTIONS = [
+    click.option('-m', '--model-path', type=click.Path(), help='The path to models'),
+    click.option('-o', '--output-path', type=click.Path(), help='Path to write transformed models to'),
+    click.option('--drop-metadata', type=bool, help='Toptionally drop source columns prefixed with "_" if that designates metadata columns not needed in target', default=True),
+    click.option('--case-sensitive', type=bool, help='(default=False) treat column names as case-sensitive - otherwise force all to lower', default=False),
+    click.option('--split-columns', type=bool, help='Split column names. E.g. currencycode => currency_code', default=False),
+    click.option('--id-as-int', type=bool, help='Convert id to int', default=False),
+    click.option('--convert-timestamp', type=bool, help='Convert timestamp to datetime', default=False),
+    click.option('-j', '--jobs', type=int, default=1, help='(default=1) Number of processes to transform models with'),
+    click.option('--incremental', type=bool, default=False, help='(default=False) Skip models whose input, transforms and options are unchanged since the last run'),
+    click.option('--words-file', type=click.Path(exists=True, dir_okay=False), default=None, help='(optional) Domain words to split column names with, one per line, or a wordninja .txt.gz language model'),
+    click.option('--split-cache', type=click.Path(dir_okay=False), default=None, help='(optional) SQLite file to cache column name splits in across runs'),
+    click.option('--schema-store', type=click.Path(exists=True, dir_okay=False), default=None, help='(optional) Schema store filled by refresh-schema; columns that already have the target type are not cast'),
+    click.option('--schema-name', type=str, default=None, help='(optional, default=source name) Schema of the source tables in the schema store'),
+    click.option('--database-name', type=str, default=None, help='(optional) Database of the source tables in the schema store, needed when the store holds the schema for several databases'),
+    click.option('--alias-reserved', type=bool, default=False, help='(default=False) Quote columns named after a reserved word of the dialect and suffix their alias with _ (order => order_)'),
+    click.option('-t', '--transforms-path', type=click.Path(exists=True, dir_okay=False), default=None, help='(optional) Apply the rules of a transforms .yml first, in the same pass'),
+    click.option('--watch', type=bool, default=False, help='(default=False) Keep running and re-transform the models affected by every change to the models or the transforms file (needs -t)'),
+    click.option('--debounce', type=float, default=0.1, help='(default=0.1) With --watch, seconds without changes to wait for before transforming'),
+    click.option('--poll-interval', type=float, default=None, help='(optional) With --watch, poll for changes every N seconds instead of using inotify'),
+    click.option('--shard', type=str, default=None, callback=parse_shard_option, help='(optional) INDEX/COUNT: only do the models assigned to shard INDEX (from 1) of COUNT by a stable hash, and write a shard manifest'),
+    click.option('--shard-manifest', type=click.Path(dir_okay=False), default=None, help='(optional, default=dbt_generator_shard_INDEX_of_COUNT.json) Path to write the manifest of the --shard to'),
+]
+
+def warehouse_transform_options(command):
+    '''
+    Add the options shared by bq-transform and sf-transform to a command
+    '''
+    for option in reversed(WAREHOUSE_TRANSFORM_OPTIONS):
+        command = option(command)
+    return command
+
+def get_warehouse_processor_kwargs(drop_metadata, case_sensitive, split_columns, id_as_int, convert_timestamp, words_file, split_cache, schema_store, schema_name, database_name, alias_reserved):
+    return {'drop_metadata': drop_metadata, 'case_sensitive': case_sensitive, 'split_columns': split_columns,
+            'id_as_int': id_as_int, 'convert_timestamp': convert_timestamp, 'words_file': words_file,
+            'split_cache': split_cache, 'schema_store': schema_store, 'schema_name': schema_name,
+            'database_name': database_name, 'alias_reserved': alias_reserved}
+
+def warehouse_transform(processor_class, model_path, output_path, drop_metadata, case_sensitive, split_columns, id_as_int, convert_timestamp, jobs, incremental, words_file, split_cache, schema_store, schema_name, database_name, alias_reserved, transforms_path, watch, debounce, poll_interval, shard, shard_manifest):
+    '''
+    Transform base models in a directory with the conventions of processor_class, for bq-transform and sf-transform
+    '''
+    from .process_base_models import get_sql_files, load_transforms_file
+    from .transform_pipeline import run_transforms
+    processor_kwargs = get_warehouse_processor_kwargs(drop_metadata, case_sensitive, split_columns, id_as_int, convert_timestamp,
+                                                      words_file, split_cache, schema_store, schema_name, database_name, alias_reserved)
+    if watch:
+        watch_transforms(model_path, transforms_path, output_path, processor_class, processor_kwargs, debounce, poll_interval, shard)
+        return
     sql_files = get_sql_files(model_path)
-    for sql_file in sql_files:
-        processor = ProcessBaseModelsBQ(os.path.join(
-            model_path, sql_file), drop_metadata, case_sensitive, split_columns, id_as_int, convert_timestamp)
-        processor.process_base_models(os.path.join(output_path, sql_file))
+    if shard is not None:
+        sql_files = shard.select(sorted(sql_files))
+    if transforms_path:
+        processor_kwargs.update(transforms_file=transforms_path, transforms=load_transforms_file(transforms_path, case_sensitive))
+    report_results(run_transforms(model_path, sql_files, output_path, processor_class, processor_kwargs, jobs, incremental), shard, shard_manifest)
+
+
+@dbt_generator.command(help='Transform base models in a directory for BigQuery source')
+@warehouse_transform_options
+def bq_transform(**options):
+    from .process_base_models import ProcessBaseModelsBQ
+    warehouse_transform(ProcessBaseModelsBQ, **options)
 
 
 @dbt_generator.command(help='Transform base models in a directory for Snowflake source')
-@click.option('-m', '--model-path', type=click.Path(), help='The path to models')
-@click.option('-o', '--output-path', type=click.Path(), help='Path to write transformed models to')
-@click.option('--drop-metadata', type=bool, help='Toptionally drop source columns prefixed with "_" if that designates metadata columns not needed in target', default=True)
-@click.option('--case-sensitive', type=bool, help='(default=False) treat column names as case-sensitive - otherwise force all to lower', default=False)
-@click.option('--split-columns', type=bool, help='Split column names. E.g. currencycode => currency_code', default=False)
-@click.option('--id-as-int', type=bool, help='Convert id to int', default=False)
-@click.option('--convert-timestamp', type=bool, help='Convert timestamp to datetime', default=False)
-def sf_transform(model_path, output_path, drop_metadata, case_sensitive, split_columns, id_as_int, convert_timestamp):
-    sql_files = get_sql_files(model_path)
-    for sql_file in sql_files:
-        processor = ProcessBaseModelsSF(os.path.join(
-            model_path, sql_file), drop_metadata, case_sensitive, split_columns, id_as_int, convert_timestamp)
-        processor.process_base_models(os.path.join(output_path, sql_file))
+@warehouse_transform_options
+def sf_transform(**options):
+    from .process_base_models import ProcessBaseModelsSF
+    warehouse_transform(ProcessBaseModelsSF, **options)
 
 @dbt_generator.command(help='Generate source .yml.')
 @click.option('-o', '--output-path', type=click.Path(), help='Path to write generated .yml')
@@ -114,134 +420,281 @@ def sf_transform(model_path, output_path, drop_metadata, case_sensitive, split_c
 @click.option('--name', type=str, default='', help='(optional, default=schema_name): The name of your source')
 @click.option('--include_database', type=bool, default=False, help='(optional, default=False): Whether you want to add the database to your source definition')
 @click.option('--include_schema', type=bool, default=False, help='(optional, default=False): Whether you want to add the schema to your source definition')
-def source_yaml(output_path, custom_prefix, model_prefix, database_name, schema_name, table_names, generate_columns, include_descriptions, include_data_types, table_pattern, exclude, name, include_database, include_schema):
+@click.option('--from-store', type=click.Path(exists=True, dir_okay=False), default=None, help='(optional) Render the .yml in Python from a schema store filled by refresh-schema, without calling dbt or the warehouse')
+@click.option('--schemas', type=str, default='', help='(optional) Write a .yml for each of these schemas (comma separated, or a like pattern such as RAW_%) from one metadata query')
+@click.option('--all-schemas', type=bool, default=False, help='(default=False) Write a .yml for every schema of the database from one metadata query')
+def source_yaml(output_path, custom_prefix, model_prefix, database_name, schema_name, table_names, generate_columns, include_descriptions, include_data_types, table_pattern, exclude, name, include_database, include_schema, from_store, schemas, all_schemas):
+    from .generate_base_models import generate_source_yaml, render_source_yaml, filter_source_tables
+
+    def get_file_name(schema_name):
+        file_name = schema_name + '.yml'
+        if model_prefix:
+            file_name = database_name + '_' + file_name
+        if custom_prefix:
+            file_name = custom_prefix + '_' + file_name
+        return file_name
+
+    if schemas or all_schemas:
+        tables_by_schema = get_schemas_tables(database_name, schemas, from_store)
+        written = 0
+        for schema, tables in tables_by_schema.items():
+            tables = filter_source_tables(tables, parse_table_names(table_names), table_pattern, exclude)
+            if not tables:
+                continue
+            query = render_source_yaml(database_name, schema, tables, generate_columns, include_descriptions, include_data_types, '', '', schema, include_database, include_schema)
+            write_model(output_path, get_file_name(schema), query)
+            written += 1
+        print(f'Generated source yaml for {written} of {len(tables_by_schema)} schemas of {database_name}')
+        return
+
     if name == '': # default behavior for the function
         name = schema_name
-    
-    file_name = schema_name + '.yml'
-    if model_prefix:
-        file_name = database_name + '_' + file_name
-    if custom_prefix:
-        file_name = custom_prefix + '_' + file_name
-        
-    query = generate_source_yaml(database_name, schema_name, table_names, generate_columns, include_descriptions, include_data_types, table_pattern, exclude, name, include_database, include_schema)
-    file = open(os.path.join(output_path, file_name), 'w', newline='')
-    file.write(query)
-    file.close()
+    file_name = get_file_name(schema_name)
+    if from_store:
+        from .schema_store import SchemaStore
+        store = SchemaStore(from_store)
+        tables = {table: store.get_columns(database_name, schema_name, table) for table in store.get_tables(database_name, schema_name)}
+        tables = filter_source_tables(tables, parse_table_names(table_names))
+        if not tables:
+            raise click.ClickException(f'No tables of {database_name}.{schema_name} in {from_store}, run refresh-schema first')
+        query = render_source_yaml(database_name, schema_name, tables, generate_columns, include_descriptions, include_data_types, table_pattern, exclude, name, include_database, include_schema)
+    else:
+        query = generate_source_yaml(database_name, schema_name, table_names, generate_columns, include_descriptions, include_data_types, table_pattern, exclude, name, include_database, include_schema)
+    write_model(output_path, file_name, query)
+
+def get_schemas_tables(database_name, schemas, from_store):
+    '''
+    Return {schema: {table: [(column, data_type)]}} for --schemas (a list or a like pattern, all schemas if empty)
+    from the schema store, or from one information_schema query
+    '''
+    from .generate_base_models import get_schemas_columns, like_to_glob, matches
+    schema_names = [] if '%' in schemas else [schema.strip() for schema in schemas.split(',') if schema.strip()]
+    schema_pattern = schemas if '%' in schemas else ''
+    if not from_store:
+        return get_schemas_columns(database_name, schema_names, schema_pattern)
+    from .schema_store import SchemaStore
+    store = SchemaStore(from_store)
+    selected = {schema.upper() for schema in schema_names}
+    pattern = [like_to_glob(schema_pattern.upper())] if schema_pattern else []
+    return {schema: {table: store.get_columns(database_name, schema, table) for table in store.get_tables(database_name, schema)}
+            for schema in store.get_schemas(database_name)
+            if (not selected or schema in selected) and matches(schema, pattern)}
+
+def parse_table_names(table_names):
+    '''
+    Parse --table_names given as a list (["table_1", "table_2"]) or comma separated
+    '''
+    import json
+    if not table_names:
+        return []
+    try:
+        names = json.loads(table_names)
+    except ValueError:
+        names = table_names.strip('[]').split(',')
+    if isinstance(names, str):
+        names = [names]
+    return [name.strip().strip('\'"') for name in names if name.strip()]
+
+def pull_schema_catalog(store, database_name, schema_name, full):
+    from .generate_base_models import get_schema_catalog
+    changed_since = None if full else store.get_last_altered(database_name, schema_name)
+    catalog = get_schema_catalog(database_name, schema_name, changed_since)
+    # a table older than the last refresh that the store never saw, e.g. restored or moved in, has no columns yet
+    unseen = store.get_unseen(database_name, schema_name, catalog) if changed_since else []
+    if unseen:
+        print(f'Pulling every column of {database_name}.{schema_name} for tables not in the store: {", ".join(unseen)}')
+        catalog = get_schema_catalog(database_name, schema_name, None)
+    return catalog
+
+def print_drift(database_name, schema_name, drift):
+    for label, tables in (('added', drift.added), ('changed', drift.changed), ('removed', drift.removed)):
+        for table in tables:
+            print(f'{label}: {database_name}.{schema_name}.{table}')
+    count = len(drift.added) + len(drift.changed) + len(drift.removed)
+    print(f'{database_name}.{schema_name}: {count} tables changed')
+
+@dbt_generator.command(help='Pull the tables and columns of schemas into the local schema store')
+@click.option('-d', '--database_name', type=str, required=True, help='The database that your source data is in')
+@click.option('-s', '--schema_name', type=str, required=True, multiple=True, help='Schema to refresh, can be repeated')
+@click.option('--store', type=click.Path(dir_okay=False), default='.dbt_generator_schema.db', help='(default=.dbt_generator_schema.db) Path of the schema store')
+@click.option('--full', type=bool, default=False, help='(default=False) Pull the columns of every table, not only those altered since the last refresh')
+def refresh_schema(database_name, schema_name, store, full):
+    from .schema_store import SchemaStore
+    schema_store = SchemaStore(store)
+    for schema in schema_name:
+        drift = schema_store.update(database_name, schema, pull_schema_catalog(schema_store, database_name, schema, full))
+        print_drift(database_name, schema, drift)
+
+@dbt_generator.command(help='List the tables whose columns changed since the last refresh-schema')
+@click.option('-d', '--database_name', type=str, required=True, help='The database that your source data is in')
+@click.option('-s', '--schema_name', type=str, required=True, multiple=True, help='Schema to check, can be repeated')
+@click.option('--store', type=click.Path(dir_okay=False), default='.dbt_generator_schema.db', help='(default=.dbt_generator_schema.db) Path of the schema store')
+@click.option('--update', type=bool, default=False, help='(default=False) Save the pulled tables and columns to the store')
+def drift(database_name, schema_name, store, update):
+    from .schema_store import SchemaStore
+    schema_store = SchemaStore(store)
+    for schema in schema_name:
+        catalog = pull_schema_catalog(schema_store, database_name, schema, False)
+        if update:
+            schema_drift = schema_store.update(database_name, schema, catalog)
+        else:
+            schema_drift = schema_store.compare(database_name, schema, catalog)
+        print_drift(database_name, schema, schema_drift)
 
 @dbt_generator.command(help='Generate snapshots based on table. See DBT_SNAPSHOT_SEED.CSV in seeds directory.')
-@click.option('--system_name', type=str, default='', help='(required): The system_name that contains your source data. See dbt_snapshot_seed.csv seed file.')
+@click.option('--system_name', type=str, default='', help='(required unless --all-systems): The system_name that contains your source data. See dbt_snapshot_seed.csv seed file.')
 @click.option('-s', '--snapshot-path', type=click.Path(), help='(required): Path to write generated snapshot files.')
 @click.option('-m', '--model-path', type=click.Path(), default='', help='(optional): Path to write generated other models (soft delete snapshots, formula views, etc.).')
-def generate_snapshots(system_name, snapshot_path, model_path):
-    query_results = extract_snapshot_info(system_name) # retrieve the snapshot info for the system we are interested in.
-    results_dict = ast.literal_eval(query_results) # Need to convert this back to a dict due to how we are retrieving it.
-    snapshot_list = pd.DataFrame.from_dict(results_dict) # Create snapshot info dataframe
-    
-    # iterate over dataframe and generate the actual sql files in the output folder
-    for index, row in snapshot_list.iterrows():
-        dbt_source = row['DBT_SOURCE'].lower()
-        table_name = row['TABLE_NAME'].lower()
-        unique_key = row['UNIQUE_KEY'].lower()
-        snapshot_strategy = row['SNAPSHOT_STRATEGY'].lower()
-        updated_at = row['UPDATED_AT']
-        check_cols = row['CHECK_COLS']
-        invalidate_hard_deletes = row['INVALIDATE_HARD_DELETES']
-        invalidate_fivetran_soft_deletes = row['INVALIDATE_FIVETRAN_SOFT_DELETES']
-        composite_key = row['COMPOSITE_KEY']
-        invalidate_soft_deletes = row['INVALIDATE_SOFT_DELETES']
-        soft_delete_indicator_col = row['SOFT_DELETE_INDICATOR_COL']
-        soft_delete_date_col = row['SOFT_DELETE_DATE_COL']
-        source_table_name = dbt_source + "_" + table_name
-
-        # if formula views AND soft deletes needed
-        if (row['SALESFORCE_FORMULA_TRANSFORMATION'] == 1) and ((row['INVALIDATE_FIVETRAN_SOFT_DELETES'] == 1) or (row['INVALIDATE_SOFT_DELETES'] == 1)):
-            # Build formula view
-            file_prefix = 'frm_'
-            file_suffix = '_vw'
-            file_name = file_prefix + source_table_name + file_suffix + ".sql"
-            output_path = model_path
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            build_formula_view(dbt_source, table_name, file_name, output_path)
-            # Build formula snapshot (pass formula ref in dbt_source_)
-            use_formula_flag = 1
-            file_prefix = 'snap_frm_'
-            file_name = file_prefix + source_table_name + ".sql"
-            output_path = snapshot_path
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            dbt_source_ = 'frm_' + source_table_name + file_suffix
-            snapshot_name = file_prefix + source_table_name
-            build_snapshot(output_path, file_name, snapshot_name, dbt_source_, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag)
-            # Build raw snapshot
-            use_formula_flag = 0
-            file_prefix = 'snap_raw_'
-            file_name = file_prefix + source_table_name + ".sql"
-            output_path = snapshot_path
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            snapshot_name = file_prefix + source_table_name
-            build_snapshot(output_path, file_name, snapshot_name, dbt_source, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag)
-            # Build soft delete view (with final name)
-            file_prefix = 'snap_'
-            file_suffix = '_vw'
-            file_name = file_prefix + source_table_name + file_suffix + ".sql"
-            output_path = model_path
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            snapshot_name = 'snap_frm_' + source_table_name
-            build_soft_delete_view(output_path, file_name, snapshot_name, invalidate_fivetran_soft_deletes, invalidate_soft_deletes, soft_delete_indicator_col, soft_delete_date_col)
-        # if formula views needed
-        elif row['SALESFORCE_FORMULA_TRANSFORMATION'] == 1:
-            # Build formula view
-            file_prefix = 'frm_'
-            file_suffix = '_vw'
-            file_name = file_prefix + source_table_name + file_suffix + ".sql"
-            output_path = model_path
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            build_formula_view(dbt_source, table_name, file_name, output_path)
-            # Build formula snapshot (with final name)
-            use_formula_flag = 1
-            file_prefix = 'snap_'
-            file_name = file_prefix + source_table_name + ".sql"
-            output_path = snapshot_path
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            dbt_source_ = file_prefix + source_table_name + file_suffix
-            snapshot_name = file_prefix + source_table_name
-            build_snapshot(output_path, file_name, snapshot_name, dbt_source_, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag)
-        # if soft delete views needed
-        elif (row['INVALIDATE_FIVETRAN_SOFT_DELETES'] == 1) or (row['INVALIDATE_SOFT_DELETES'] == 1):
-            # Build raw snapshot
-            use_formula_flag = 0
-            file_prefix = 'snap_raw_'
-            file_name = file_prefix + source_table_name + ".sql"
-            output_path = snapshot_path
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            snapshot_name = file_prefix + source_table_name
-            build_snapshot(output_path, file_name, snapshot_name, dbt_source, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag)
-            # Build soft delete view (with final name)
-            file_prefix = 'snap_'
-            file_suffix = '_vw'
-            file_name = file_prefix + source_table_name + file_suffix + ".sql"
-            output_path = model_path
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            snapshot_name = 'snap_frm_' + source_table_name
-            build_soft_delete_view(output_path, file_name, snapshot_name, invalidate_fivetran_soft_deletes, invalidate_soft_deletes, soft_delete_indicator_col, soft_delete_date_col)
-        else:
-            # regular snapshot (with final name)
-            use_formula_flag = 0
-            file_prefix = 'snap_'
-            file_name = file_prefix + source_table_name + ".sql"
-            output_path = snapshot_path
-            if not os.path.exists(output_path):
-                os.makedirs(output_path)
-            snapshot_name = file_prefix + source_table_name
-            build_snapshot(output_path, file_name, snapshot_name, dbt_source, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag)
+@click.option('-j', '--jobs', type=int, default=1, help='(default=1) Number of snapshots to generate concurrently')
+@click.option('--retries', type=int, default=0, help='(default=0) Number of times to retry a snapshot after a dbt or warehouse error, with exponential backoff')
+@click.option('--native', type=bool, default=False, help='(default=False) Render the snapshot macros in-process with Jinja instead of starting dbt for every snapshot')
+@click.option('--macros-path', type=click.Path(), default=None, help='(optional) Directory containing the dbt_generator macros for --native. Defaults to dbt_packages/dbt_generator/macros or ./macros')
+@click.option('--seed-path', type=click.Path(), default='', help='(optional) Read the rows from this dbt_snapshot_seed.csv instead of querying the seed through dbt')
+@click.option('--all-systems', type=bool, default=False, help='(default=False) Generate snapshots for every system_name in the seed')
+@click.option('--shard', type=str, default=None, callback=parse_shard_option, help='(optional) INDEX/COUNT: only do the seed rows assigned to shard INDEX (from 1) of COUNT by a stable hash, and write a shard manifest')
+@click.option('--shard-manifest', type=click.Path(dir_okay=False), default=None, help='(optional, default=dbt_generator_shard_INDEX_of_COUNT.json) Path to write the manifest of the --shard to')
+def generate_snapshots(system_name, snapshot_path, model_path, jobs, retries, native, macros_path, seed_path, all_systems, shard, shard_manifest):
+    from .generate_base_models import extract_snapshot_info, set_native_macros
+    from .native_macros import NativeMacros
+    from .snapshot_seed import read_snapshot_seed, rows_from_query_results
+    from .job_pool import run_jobs
+    if native:
+        set_native_macros(NativeMacros([macros_path] if macros_path else None))
+        click.get_current_context().call_on_close(partial(set_native_macros, None))
+    if not system_name and not all_systems:
+        raise click.UsageError('Pass --system_name or --all-systems True')
+    system_names = None if all_systems else [system_name]
+
+    if seed_path:
+        rows = read_snapshot_seed(seed_path, system_names)
+    else:
+        query_results = extract_snapshot_info('' if all_systems else system_name) # retrieve the snapshot info for the system we are interested in.
+        rows = rows_from_query_results(query_results)
+
+    # generate the actual sql files in the output folder
+    tasks = []
+    for row in rows:
+        name = row.dbt_source.lower() + '.' + row.table_name.lower()
+        tasks.append((name, partial(build_snapshot_files, row, snapshot_path, model_path)))
+    if shard is not None:
+        selected = set(shard.select(name for name, _ in tasks))
+        tasks = [(name, task) for name, task in tasks if name in selected]
+    report_results(run_jobs(tasks, jobs, retries), shard, shard_manifest)
+
+@dbt_generator.command(help='Check that the manifests of every --shard of a command cover all of its work, and combine them')
+@click.argument('manifests', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('-o', '--output-path', type=click.Path(dir_okay=False), default=None, help='(optional) Path to write the combined manifest to')
+def merge_manifests(manifests, output_path):
+    import json
+    from .shards import merge_manifests as merge
+    loaded = []
+    for path in manifests:
+        with open(path) as file:
+            loaded.append(json.load(file))
+    merged, problems = merge(loaded)
+    if output_path:
+        with open(output_path, 'w') as file:
+            json.dump(merged, file, indent=1, sort_keys=True)
+    print(f'{merged["command"]}: {len(merged["items"])} of {merged["total"]} items and {len(merged["outputs"])} files '
+          f'from {len(loaded)} shards, slowest shard {merged["seconds"]:g}s')
+    if problems:
+        raise click.ClickException('\n'.join([f'{len(problems)} problems in the shard manifests:'] + ['  ' + problem for problem in problems]))
+
+def build_snapshot_files(row, snapshot_path, model_path):
+    from .generate_base_models import build_formula_view, build_snapshot, build_soft_delete_view
+    dbt_source = row.dbt_source.lower()
+    table_name = row.table_name.lower()
+    unique_key = row.unique_key.lower()
+    snapshot_strategy = row.snapshot_strategy.lower()
+    updated_at = row.updated_at
+    check_cols = row.check_cols
+    invalidate_hard_deletes = row.invalidate_hard_deletes
+    invalidate_fivetran_soft_deletes = row.invalidate_fivetran_soft_deletes
+    composite_key = row.composite_key
+    invalidate_soft_deletes = row.invalidate_soft_deletes
+    soft_delete_indicator_col = row.soft_delete_indicator_col
+    soft_delete_date_col = row.soft_delete_date_col
+    source_table_name = dbt_source + "_" + table_name
+
+    # if formula views AND soft deletes needed
+    if (row.salesforce_formula_transformation == 1) and ((row.invalidate_fivetran_soft_deletes == 1) or (row.invalidate_soft_deletes == 1)):
+        # Build formula view
+        file_prefix = 'frm_'
+        file_suffix = '_vw'
+        file_name = file_prefix + source_table_name + file_suffix + ".sql"
+        output_path = model_path
+        os.makedirs(output_path, exist_ok=True)
+        build_formula_view(dbt_source, table_name, file_name, output_path)
+        # Build formula snapshot (pass formula ref in dbt_source_)
+        use_formula_flag = 1
+        file_prefix = 'snap_frm_'
+        file_name = file_prefix + source_table_name + ".sql"
+        output_path = snapshot_path
+        os.makedirs(output_path, exist_ok=True)
+        dbt_source_ = 'frm_' + source_table_name + file_suffix
+        snapshot_name = file_prefix + source_table_name
+        build_snapshot(output_path, file_name, snapshot_name, dbt_source_, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag)
+        # Build raw snapshot
+        use_formula_flag = 0
+        file_prefix = 'snap_raw_'
+        file_name = file_prefix + source_table_name + ".sql"
+        output_path = snapshot_path
+        os.makedirs(output_path, exist_ok=True)
+        snapshot_name = file_prefix + source_table_name
+        build_snapshot(output_path, file_name, snapshot_name, dbt_source, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag)
+        # Build soft delete view (with final name)
+        file_prefix = 'snap_'
+        file_suffix = '_vw'
+        file_name = file_prefix + source_table_name + file_suffix + ".sql"
+        output_path = model_path
+        os.makedirs(output_path, exist_ok=True)
+        snapshot_name = 'snap_frm_' + source_table_name
+        build_soft_delete_view(output_path, file_name, snapshot_name, invalidate_fivetran_soft_deletes, invalidate_soft_deletes, soft_delete_indicator_col, soft_delete_date_col)
+    # if formula views needed
+    elif row.salesforce_formula_transformation == 1:
+        # Build formula view
+        file_prefix = 'frm_'
+        file_suffix = '_vw'
+        file_name = file_prefix + source_table_name + file_suffix + ".sql"
+        output_path = model_path
+        os.makedirs(output_path, exist_ok=True)
+        build_formula_view(dbt_source, table_name, file_name, output_path)
+        # Build formula snapshot (with final name)
+        use_formula_flag = 1
+        file_prefix = 'snap_'
+        file_name = file_prefix + source_table_name + ".sql"
+        output_path = snapshot_path
+        os.makedirs(output_path, exist_ok=True)
+        dbt_source_ = file_prefix + source_table_name + file_suffix
+        snapshot_name = file_prefix + source_table_name
+        build_snapshot(output_path, file_name, snapshot_name, dbt_source_, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag)
+    # if soft delete views needed
+    elif (row.invalidate_fivetran_soft_deletes == 1) or (row.invalidate_soft_deletes == 1):
+        # Build raw snapshot
+        use_formula_flag = 0
+        file_prefix = 'snap_raw_'
+        file_name = file_prefix + source_table_name + ".sql"
+        output_path = snapshot_path
+        os.makedirs(output_path, exist_ok=True)
+        snapshot_name = file_prefix + source_table_name
+        build_snapshot(output_path, file_name, snapshot_name, dbt_source, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag)
+        # Build soft delete view (with final name)
+        file_prefix = 'snap_'
+        file_suffix = '_vw'
+        file_name = file_prefix + source_table_name + file_suffix + ".sql"
+        output_path = model_path
+        os.makedirs(output_path, exist_ok=True)
+        snapshot_name = 'snap_frm_' + source_table_name
+        build_soft_delete_view(output_path, file_name, snapshot_name, invalidate_fivetran_soft_deletes, invalidate_soft_deletes, soft_delete_indicator_col, soft_delete_date_col)
+    else:
+        # regular snapshot (with final name)
+        use_formula_flag = 0
+        file_prefix = 'snap_'
+        file_name = file_prefix + source_table_name + ".sql"
+        output_path = snapshot_path
+        os.makedirs(output_path, exist_ok=True)
+        snapshot_name = file_prefix + source_table_name
+        build_snapshot(output_path, file_name, snapshot_name, dbt_source, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag)
 
 if __name__ == '__main__':
     dbt_generator()
@@ -0,0 +1,220 @@
+import io
+import os
+import sys
+import json
+import queue
+import threading
+import subprocess
+import contextlib
+
+
+WORKER_COMMAND = [sys.executable, '-m', 'dbt_generator.dbt_worker']
+
+
+class DbtWorkerError(RuntimeError):
+    '''
+    The dbt worker could not start or crashed; the run-operation can be retried on a new worker
+    '''
+
+
+class DbtWorker:
+    '''
+    Long-lived dbt process that parses the project once and serves run-operation calls over stdin/stdout
+    '''
+
+    def __init__(self, command=None, timeout=None, max_restarts=2):
+        self.command = command or WORKER_COMMAND
+        self.timeout = timeout
+        self.max_restarts = max_restarts
+        self.process = None
+        self.responses = None
+        self.request_id = 0
+        self.lock = threading.Lock()
+
+    def start(self, timeout=None):
+        '''
+        Start the worker process and wait until it has loaded the project, killing it if that takes
+        longer than the timeout
+        '''
+        timeout = timeout or self.timeout
+        self.process = subprocess.Popen(
+            self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1)
+        self.responses = queue.Queue()
+        reader = threading.Thread(target=read_responses, args=(self.process.stdout, self.responses), daemon=True)
+        reader.start()
+        try:
+            response = self.responses.get(timeout=timeout)
+        except queue.Empty:
+            self.stop()
+            raise subprocess.TimeoutExpired(self.command, timeout) from None
+        if response is None or not response.get('ready'):
+            self.stop()
+            error = response.get('error') if response else 'worker exited during startup'
+            raise DbtWorkerError(f'Could not start dbt worker: {error}')
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        self.process = None
+
+    def close(self):
+        '''
+        Ask the worker to exit, killing it if it does not
+        '''
+        with self.lock:
+            if self.process is not None and self.process.poll() is None:
+                try:
+                    self.process.stdin.close()
+                    self.process.wait(timeout=10)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+            self.stop()
+
+    def run_operation(self, macro_name, args, timeout=None):
+        '''
+        Run a macro in the worker and return its output. The worker is restarted if it has crashed,
+        and killed if the call takes longer than the timeout.
+        '''
+        timeout = timeout or self.timeout
+        command = f'dbt run-operation {macro_name} --args \'{args}\''
+        with self.lock:
+            restarts = 0
+            while True:
+                if self.process is None or self.process.poll() is not None:
+                    self.stop()
+                    self.start(timeout)
+                self.request_id += 1
+                request = {'id': self.request_id, 'macro': macro_name, 'args': args}
+                try:
+                    self.process.stdin.write(json.dumps(request) + '\n')
+                    self.process.stdin.flush()
+                    response = self.responses.get(timeout=timeout)
+                except queue.Empty:
+                    self.stop()
+                    raise subprocess.TimeoutExpired(command, timeout)
+                except OSError:
+                    response = None
+                if response is not None:
+                    break
+                # the worker died mid-call, start a fresh one and retry
+                self.stop()
+                if restarts >= self.max_restarts:
+                    raise DbtWorkerError(f'dbt worker crashed while running {macro_name}')
+                restarts += 1
+                print(f'dbt worker crashed, restarting ({restarts}/{self.max_restarts})')
+
+        if response.get('error'):
+            raise subprocess.CalledProcessError(1, command, output=response.get('output', ''),
+                                                stderr=response['error'])
+        return response['output']
+
+
+class DbtWorkerPool:
+    '''
+    Hands each run-operation to an idle DbtWorker, starting a new one when all of them are busy.
+    The pool grows to the number of concurrent callers, e.g. the --jobs of a command.
+    '''
+
+    def __init__(self, command=None, timeout=None, max_restarts=2):
+        self.command = command
+        self.timeout = timeout
+        self.max_restarts = max_restarts
+        self.workers = []
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+
+    def run_operation(self, macro_name, args, timeout=None):
+        try:
+            worker = self.idle.get_nowait()
+        except queue.Empty:
+            worker = DbtWorker(self.command, self.timeout, self.max_restarts)
+            with self.lock:
+                self.workers.append(worker)
+        try:
+            return worker.run_operation(macro_name, args, timeout)
+        finally:
+            self.idle.put(worker)
+
+    def close(self):
+        with self.lock:
+            for worker in self.workers:
+                worker.close()
+            self.workers = []
+
+
+def read_responses(stream, responses):
+    for line in stream:
+        if line.strip():
+            responses.put(json.loads(line))
+    responses.put(None)
+
+
+def serve(handler, requests, protocol):
+    '''
+    Answer one JSON request per line until stdin is closed
+    :param handler: callable taking (macro_name, args) and returning (output, error)
+    '''
+    protocol.write(json.dumps({'ready': True}) + '\n')
+    protocol.flush()
+    for line in requests:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        try:
+            output, error = handler(request['macro'], request['args'])
+        except Exception as e:
+            output, error = '', repr(e)
+        protocol.write(json.dumps({'id': request['id'], 'output': output, 'error': error}) + '\n')
+        protocol.flush()
+
+
+def dbt_handler():
+    '''
+    Parse the project once and return a handler that runs macros against the parsed manifest
+    '''
+    from dbt.cli.main import dbtRunner
+
+    parsed = dbtRunner().invoke(['parse'])
+    if not parsed.success:
+        raise RuntimeError(f'dbt parse failed: {parsed.exception}')
+
+    messages = []
+
+    def collect(event):
+        if event.info.name == 'JinjaLogInfo':
+            messages.append(event.data.msg)
+
+    runner = dbtRunner(manifest=parsed.result, callbacks=[collect])
+
+    def handler(macro_name, args):
+        del messages[:]
+        printed = io.StringIO()
+        with contextlib.redirect_stdout(printed):
+            result = runner.invoke(['run-operation', macro_name, '--args', args])
+        output = '\n'.join(messages + [printed.getvalue()])
+        if result.success:
+            return output, None
+        return output, str(result.exception or f'{macro_name} failed')
+
+    return handler
+
+
+def main():
+    # keep the real stdout for the protocol and send anything dbt writes there to stderr
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    try:
+        handler = dbt_handler()
+    except Exception as e:
+        protocol.write(json.dumps({'ready': False, 'error': repr(e)}) + '\n')
+        protocol.flush()
+        return 1
+    serve(handler, sys.stdin, protocol)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
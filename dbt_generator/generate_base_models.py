@@ -1,110 +1,302 @@
 import os
-import yaml
+import json
 import subprocess
 from platform import system
+from .output import write_output
+from .timings import timings
+from .reserved_words import is_reserved, get_reserved_words, get_dialect
+from .operation_output import BATCH_BEGIN, BATCH_END, iter_messages, extract_batch_payload, read_output
 
+dbt_worker = None
+native_macros = None
+
+def set_dbt_worker(worker):
+    '''
+    Serve every run-operation from a long-lived DbtWorker instead of starting dbt per call
+    '''
+    global dbt_worker
+    dbt_worker = worker
+
+def set_native_macros(macros):
+    '''
+    Render the snapshot macros in-process with a NativeMacros instead of through dbt
+    '''
+    global native_macros
+    native_macros = macros
+
+def format_args(args):
+    items = []
+    for key, value in args.items():
+        value = json.dumps(value) if isinstance(value, (str, list, dict)) else value
+        items.append(f'"{key}": {value}')
+    return '{' + ', '.join(items) + '}'
+
+def counted(lines, span):
+    '''
+    Yield lines, adding their size to the bytes of a timings span
+    '''
+    span['bytes'] = 0
+    for line in lines:
+        span['bytes'] += len(line)
+        yield line
+
+def stream_operation(bash_command, name='run-operation'):
+    '''
+    Run a dbt command and yield the macro output lines as dbt writes them, without buffering the whole log.
+    Raises CalledProcessError once the output is exhausted if dbt failed.
+    '''
+    with timings.span(name, 'dbt', command=bash_command) as span:
+        if system() == 'Windows':
+            process = subprocess.Popen(["powershell.exe", bash_command], stdout=subprocess.PIPE, text=True, encoding='utf-8')
+        else:
+            process = subprocess.Popen(bash_command, shell=True, stdout=subprocess.PIPE, text=True, encoding='utf-8')
+        try:
+            yield from iter_messages(counted(process.stdout, span))
+        finally:
+            for _ in process.stdout:  # let dbt finish if the reader stopped early
+                pass
+            process.stdout.close()
+            returncode = process.wait()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, bash_command)
+
+def run_operation(macro_name, args, stream=False):
+    '''
+    Run a dbt macro and return what it printed or logged, without dbt's own log lines.
+    With stream, return an iterator over the lines instead, read from dbt as it runs.
+    '''
+    args = format_args(args)
+    if dbt_worker is not None:
+        with timings.span(macro_name, 'dbt', worker=True) as span:
+            output = dbt_worker.run_operation(macro_name, args)
+            span['bytes'] = len(output)
+        return iter_messages(output.splitlines()) if stream else output
+
+    bash_command = f'''dbt --log-format json run-operation {macro_name} --args \'{args}\''''
+    lines = stream_operation(bash_command, macro_name)
+    if stream:
+        return lines
+    return ''.join(line + '\n' for line in lines)
+
+def load_yaml(file_path):
+    '''
+    Parse a yml file with the C accelerated loader when PyYAML was built with libyaml
+    '''
+    import yaml
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with timings.span('load yaml', 'parse', file=file_path, bytes=os.path.getsize(file_path)), open(file_path) as file:
+        return yaml.load(file, Loader=loader)
+
+def get_source_config(file_path, source_index):
+    return load_yaml(file_path)['sources'][source_index]
+
+def find_source_files(path):
+    '''
+    Return the yml files of a file, a directory (searched recursively) or a glob pattern
+    '''
+    if os.path.isfile(path):
+        return [path]
+    if os.path.isdir(path):
+        return sorted(os.path.join(directory, file) for directory, _, files in os.walk(path)
+                      for file in files if file.endswith(('.yml', '.yaml')))
+    import glob
+    return sorted(glob.glob(path, recursive=True))
+
+def matches(name, patterns):
+    import fnmatch
+    return not patterns or any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+def select_sources(path, source_names=(), table_names=()):
+    '''
+    Return [(source config, [table names])] for the sources of every yml under path, keeping the sources and
+    tables that match the source_names and table_names globs. Each yml is parsed once and every
+    (source, table) pair is returned once, even if a source is defined in several files.
+    '''
+    sources = {}
+    for file_path in find_source_files(path):
+        config = load_yaml(file_path) or {}
+        for source in config.get('sources') or []:
+            if not matches(source['name'], source_names):
+                continue
+            _, tables = sources.setdefault(source['name'], (source, []))
+            for table in source.get('tables') or []:
+                if matches(table['name'], table_names) and table['name'] not in tables:
+                    tables.append(table['name'])
+    return [(source, tables) for source, tables in sources.values() if tables]
 
 def get_base_tables_and_source(file_path, source_index):
-    file = open(file_path)
-    sources = yaml.load(file, Loader=yaml.FullLoader)
-    tables_configs = sources['sources'][source_index]['tables']
-    table_names = [item['name'] for item in tables_configs]
-    source_name = sources['sources'][source_index]['name']
+    source = get_source_config(file_path, source_index)
+    table_names = [item['name'] for item in source['tables']]
+    source_name = source['name']
     return table_names, source_name
 
 def extract_snapshot_info(source_system):
     print(f'Retrieving query results from dbt_snapshot_seed where source_system = "{source_system}"')
-    bash_command = f'''dbt run-operation macro_snapshot_list --args "source_system: {source_system}"'''
-    
-    if system() == 'Windows':
-        output = subprocess.check_output(["powershell.exe",bash_command]).decode("utf-8")
-    else:
-        output = subprocess.check_output(bash_command, shell=True).decode("utf-8")
-    
-    sql_index = output.upper().find("{'SYSTEM_NAME")
-    query_results = output[sql_index:]
-    return query_results
+    return extract_batch_payload(run_operation('macro_snapshot_list', {'source_system': source_system}, stream=True))
 
 def get_snapshot_sql(snapshot_name, dbt_source, table_name, unique_key, snapshot_strategy="timestamp", updated_at="None", check_cols="None", invalidate_hard_deletes=0, composite_key=0, use_formula_flag=0):
     print(f'Getting snapshot code for {dbt_source}.{table_name} using snapshot strategy {snapshot_strategy}.')
-    bash_command = f'''
-        dbt run-operation macro_create_snapshot --args \'{{"snapshot_name": "{snapshot_name}", "dbt_source": "{dbt_source}", "table_name": "{table_name}", "unique_key": "{unique_key}", "snapshot_strategy": "{snapshot_strategy}", "updated_at": "{updated_at}", "check_cols": "{check_cols}", "invalidate_hard_deletes": {invalidate_hard_deletes}, "composite_key": {composite_key}, "use_formula_flag": {use_formula_flag} }}\'
-    '''
-    
-    if system() == 'Windows':
-        output = subprocess.check_output(["powershell.exe",bash_command]).decode("utf-8")
-    else:
-        output = subprocess.check_output(bash_command, shell=True).decode("utf-8")
-    
-    sql_index = output.lower().find("{% snapshot")
-    query_results = output[sql_index:]
-    return query_results
+    args = {'snapshot_name': snapshot_name, 'dbt_source': dbt_source, 'table_name': table_name,
+            'unique_key': unique_key, 'snapshot_strategy': snapshot_strategy, 'updated_at': updated_at,
+            'check_cols': check_cols, 'invalidate_hard_deletes': invalidate_hard_deletes,
+            'composite_key': composite_key, 'use_formula_flag': use_formula_flag,
+            # checked here so the macro does not query the sql_reserved_words seed for every snapshot
+            'unique_key_reserved': str(composite_key) != '1' and is_reserved(unique_key)}
+    if native_macros is not None:
+        return native_macros.call('macro_create_snapshot', **args).lstrip()
+    return extract_batch_payload(run_operation('macro_create_snapshot', args, stream=True)).lstrip()
 
 def get_soft_delete_snapshot_sql(snapshot_name, invalidate_fivetran_soft_deletes, invalidate_soft_deletes, soft_delete_indicator_col, soft_delete_date_col):
     print(f'Getting soft-delete snapshot code for snapshot {snapshot_name}.')
-    bash_command = f'''
-        dbt run-operation macro_create_soft_delete_snapshot --args \'{{"snapshot_name": "{snapshot_name}", "invalidate_fivetran_soft_deletes": {invalidate_fivetran_soft_deletes}, "invalidate_soft_deletes": {invalidate_soft_deletes}, "soft_delete_indicator_col": "{soft_delete_indicator_col}", "soft_delete_date_col": "{soft_delete_date_col}" }}\'
-    '''
-
-    if system() == 'Windows':
-        output = subprocess.check_output(["powershell.exe",bash_command]).decode("utf-8")
-    else:
-        output = subprocess.check_output(bash_command, shell=True).decode("utf-8")
-
-    sql_index = output.lower().find("select")
-    query_results = output[sql_index:]
-    return query_results
+    args = {'snapshot_name': snapshot_name, 'invalidate_fivetran_soft_deletes': invalidate_fivetran_soft_deletes,
+            'invalidate_soft_deletes': invalidate_soft_deletes, 'soft_delete_indicator_col': soft_delete_indicator_col,
+            'soft_delete_date_col': soft_delete_date_col}
+    if native_macros is not None:
+        return native_macros.call('macro_create_soft_delete_snapshot', **args).lstrip()
+    return extract_batch_payload(run_operation('macro_create_soft_delete_snapshot', args, stream=True)).lstrip()
 
 def generate_base_model(table_name, source_name, case_sensitive, leading_commas, materialized, use_snapshot):
     print(f'Generating base model for table {table_name}')
-    bash_command = f'''
-        dbt run-operation macro_create_base_model --args \'{{"source_name": "{source_name}", "table_name": "{table_name}", "case_sensitive_cols": {case_sensitive}, "leading_commas": {leading_commas}, "materialized": "{materialized}", "use_snapshot": {use_snapshot} }}\'
+    lines = run_operation('macro_create_base_model', {
+        'source_name': source_name, 'table_name': table_name, 'case_sensitive_cols': case_sensitive,
+        'leading_commas': leading_commas, 'materialized': materialized, 'use_snapshot': use_snapshot}, stream=True)
+    return read_output(lines, '{{ config(materialized=' if materialized else 'with source as')
+
+def quote_column(column, target_type):
+    return '`' + column + '`' if target_type == 'bigquery' else '"' + column + '"'
+
+def render_base_model(table_name, source_name, column_names, case_sensitive, leading_commas, materialized, use_snapshot, target_type='', quote_reserved=False):
+    '''
+    Render a base model in Python with the same layout as macro_render_base_model.
+    With quote_reserved, columns named after a reserved word of the target's SQL dialect are quoted as they are stored.
     '''
-    if system() == 'Windows':
-        output = subprocess.check_output(["powershell.exe",bash_command]).decode("utf-8")
+    reserved_words = get_reserved_words(get_dialect(target_type)) if quote_reserved else frozenset()
+    if not case_sensitive:
+        columns = [quote_column(column, target_type) if column.upper() in reserved_words else column.lower()
+                   for column in column_names]
+    elif target_type == 'bigquery':
+        columns = [quote_column(column, target_type) if column.upper() in reserved_words else column
+                   for column in column_names]
     else:
-        output = subprocess.check_output(bash_command, shell=True).decode("utf-8")
+        columns = [quote_column(column, target_type) for column in column_names]
 
-    if materialized == '':
-        sql_index = output.lower().find('with source as')
+    if leading_commas:
+        columns_text = '\n'.join('        ' + ('' if index == 0 else ', ') + column for index, column in enumerate(columns))
     else:
-        sql_index = output.lower().find('{{ config(materialized=')
-    sql_query = output[sql_index:]
-    return sql_query
+        columns_text = ',\n'.join('        ' + column for column in columns)
+
+    if use_snapshot:
+        source_sql = "{{ ref('snp_" + source_name.lower() + '_' + table_name.lower() + "') }}"
+    else:
+        source_sql = "{{ source('" + source_name + "', '" + table_name + "') }}"
+
+    config = "{{ config(materialized='" + materialized + "') }}\n\n" if materialized else ''
+    return (config + 'with source as (\n\n    select * from ' + source_sql + '\n\n),\n\n'
+            'renamed as (\n\n    select\n' + columns_text + '\n\n    from source\n\n)\n\nselect * from renamed\n')
+
+def generate_base_models_batch(table_names, source_name, case_sensitive, leading_commas, materialized, use_snapshot):
+    print(f'Generating base models for {len(table_names)} tables of source {source_name}')
+    output = run_operation('macro_create_base_models_batch', {
+        'source_name': source_name, 'table_names': table_names, 'case_sensitive_cols': case_sensitive,
+        'leading_commas': leading_commas, 'materialized': materialized, 'use_snapshot': use_snapshot}, stream=True)
+    return extract_batch_payload(output)
+
+def get_base_model_columns(table_names, source_name):
+    '''
+    Return {table_name: [(column_name, data_type)]} for many tables of a source from one metadata query
+    '''
+    print(f'Retrieving columns for {len(table_names)} tables of source {source_name}')
+    output = run_operation('macro_get_base_model_columns', {'source_name': source_name, 'table_names': table_names}, stream=True)
+    columns = extract_batch_payload(output)
+    return {table: [tuple(column) for column in table_columns] for table, table_columns in columns.items()}
 
 def generate_source_yaml(database_name, schema_name, table_names, generate_columns, include_descriptions, include_data_types, table_pattern, exclude, name, include_database, include_schema):
     fq_path = database_name + '.' + schema_name
     print(f'Generating source yaml for schema {fq_path}')
-    # start the bash command
-    bash_command = f'''
-        dbt run-operation generate_source  --args \'{{"database_name": "{database_name}", "schema_name": "{schema_name}", "generate_columns": {generate_columns}, "include_descriptions": {include_descriptions}, "name": "{name}", "include_database": {include_database}, "include_schema": {include_schema}'''
-
+    args = {'database_name': database_name, 'schema_name': schema_name, 'generate_columns': generate_columns,
+            'include_descriptions': include_descriptions, 'name': name, 'include_database': include_database,
+            'include_schema': include_schema}
     if table_names: # add the table names arg
-        bash_command = f'''{bash_command}, "table_names": "{table_names}" '''
+        args['table_names'] = table_names
     if exclude: # add the exclusions
-        bash_command = f'''{bash_command}, "exclude": "{exclude}" '''
+        args['exclude'] = exclude
     if table_pattern: # add the table_pattern
-        bash_command = f'''{bash_command}, "table_pattern": "{table_pattern}" '''
+        args['table_pattern'] = table_pattern
 
-    # close the bash command
-    bash_command = bash_command + " }\'"
+    return read_output(run_operation('generate_source', args, stream=True), 'version: ')  # "version: 2" is the first line
 
-    if system() == 'Windows':
-        output = subprocess.check_output(["powershell.exe",bash_command]).decode("utf-8")
-    else:
-        output = subprocess.check_output(bash_command, shell=True).decode("utf-8")
-    
-    sql_index = output.lower().find('version') # Trim any excess output from the beginning "version: 2" should be the first line
-    sql_query = output[sql_index:]
-    return sql_query
+def get_schema_catalog(database_name, schema_name, changed_since=None):
+    '''
+    Return {table_name: {'last_altered': ..., 'columns': [[column_name, data_type]] or None}} for one schema from
+    one information_schema query. Tables not altered since changed_since come back without columns.
+    '''
+    print(f'Retrieving catalog of schema {database_name}.{schema_name}')
+    output = run_operation('macro_get_schema_catalog', {'database_name': database_name, 'schema_name': schema_name,
+                                                        'changed_since': changed_since or ''}, stream=True)
+    return extract_batch_payload(output)
+
+def like_to_glob(pattern):
+    return pattern.replace('%', '*').replace('_', '?')
+
+def filter_source_tables(tables, table_names=(), table_pattern='', exclude=''):
+    '''
+    Keep the tables of {table_name: columns} that generate_source would select: those in table_names (if any)
+    matching the table_pattern and not the exclude like patterns, compared case-insensitively
+    '''
+    import fnmatch
+    selected = {table.upper() for table in table_names}
+    pattern = like_to_glob(table_pattern.lower()) if table_pattern else None
+    excluded = like_to_glob(exclude.lower()) if exclude else None
+    return {table_name: columns for table_name, columns in tables.items()
+            if (not selected or table_name.upper() in selected)
+            and (pattern is None or fnmatch.fnmatchcase(table_name.lower(), pattern))
+            and (excluded is None or not fnmatch.fnmatchcase(table_name.lower(), excluded))}
+
+def get_schemas_columns(database_name, schema_names=(), schema_pattern=''):
+    '''
+    Return {schema_name: {table_name: [(column_name, data_type)]}} for many schemas of a database from one
+    information_schema query: the schema_names, or those matching the schema_pattern like pattern, or all of them
+    '''
+    print(f'Retrieving columns of {len(schema_names) or schema_pattern or "all"} schemas of database {database_name}')
+    output = run_operation('macro_get_schemas_columns', {'database_name': database_name, 'schema_names': list(schema_names),
+                                                         'schema_pattern': schema_pattern}, stream=True)
+    schemas = extract_batch_payload(output)
+    return {schema: {table: [tuple(column) for column in columns] for table, columns in tables.items()}
+            for schema, tables in schemas.items()}
+
+def render_source_yaml(database_name, schema_name, tables, generate_columns, include_descriptions, include_data_types, table_pattern, exclude, name, include_database, include_schema):
+    '''
+    Python twin of codegen's generate_source for tables and columns read from the schema store.
+    tables is {table_name: [(column_name, data_type)]}.
+    '''
+    lines = ['version: 2', '', 'sources:', '  - name: ' + (name or schema_name).lower()]
+    if include_descriptions:
+        lines.append('    description: ""')
+    if include_database:
+        lines.append('    database: ' + database_name.lower())
+    if include_schema:
+        lines.append('    schema: ' + schema_name.lower())
+    lines.append('    tables:')
+    for table_name, columns in filter_source_tables(tables, (), table_pattern, exclude).items():
+        lines.append('      - name: ' + table_name.lower())
+        if include_descriptions:
+            lines.append('        description: ""')
+        if generate_columns:
+            lines.append('        columns:')
+            for column_name, data_type in columns:
+                lines.append('          - name: ' + column_name.lower())
+                if include_data_types:
+                    lines.append('            data_type: ' + data_type.lower())
+                if include_descriptions:
+                    lines.append('            description: ""')
+            lines.append('')
+    return '\n'.join(lines) + '\n'
 
 def build_formula_view(source_name, table_name, file_name, output_path):
     contents = "{{ salesforce_formula_utils.sfdc_formula_view( \
         source_name='" + source_name + "', source_table='" + table_name + "', \
         full_statement_version=true) }}"
-    file = open(os.path.join(output_path, file_name), 'w', newline='')
-    file.write(contents)
-    file.close()
+    write_output(os.path.join(output_path, file_name), contents)
 
 def build_snapshot(output_path, file_name, snapshot_name, dbt_source, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, use_formula_flag):
     contents = get_snapshot_sql(snapshot_name=snapshot_name, dbt_source=dbt_source, table_name=table_name, \
@@ -112,15 +304,11 @@ def build_snapshot(output_path, file_name, snapshot_name, dbt_source, table_name
                                     updated_at=updated_at, check_cols=check_cols, invalidate_hard_deletes=invalidate_hard_deletes, \
                                     composite_key=composite_key, use_formula_flag=use_formula_flag)
 
-    file = open(os.path.join(output_path, file_name), 'w', newline='')
-    file.write(contents)
-    file.close()
+    write_output(os.path.join(output_path, file_name), contents)
 
 def build_soft_delete_view(output_path, file_name, snapshot_name, invalidate_fivetran_soft_deletes, invalidate_soft_deletes, soft_delete_indicator_col, soft_delete_date_col):
     soft_delete_contents = get_soft_delete_snapshot_sql(snapshot_name=snapshot_name, invalidate_fivetran_soft_deletes=invalidate_fivetran_soft_deletes, \
                                     invalidate_soft_deletes=invalidate_soft_deletes, soft_delete_indicator_col=soft_delete_indicator_col, \
                                     soft_delete_date_col=soft_delete_date_col)
 
-    file = open(os.path.join(output_path, file_name), 'w', newline='')
-    file.write(soft_delete_contents)
-    file.close()
\ No newline at end of file
+    write_output(os.path.join(output_path, file_name), soft_delete_contents)
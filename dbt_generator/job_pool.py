@@ -0,0 +1,89 @@
+import sys
+import time
+import threading
+import subprocess
+from collections import namedtuple
+from .timings import timings
+from .dbt_worker import DbtWorkerError
+
+
+# errors a run-operation can raise when the warehouse or dbt hiccups; anything else fails the job straight away
+TRANSIENT_ERRORS = (subprocess.CalledProcessError, subprocess.TimeoutExpired, DbtWorkerError)
+
+JobResult = namedtuple('JobResult', ['name', 'result', 'error'])
+
+
+class ThreadOutput:
+    '''
+    Stand-in for sys.stdout that buffers what each job prints, so output can be replayed in job order
+    '''
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        if buffer is None:
+            return self.stream.write(text)
+        buffer.append(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def run_job(output, name, task, retries, backoff):
+    output.local.buffer = []
+    try:
+        with timings.span('job', 'job', task=name):
+            for attempt in range(retries + 1):
+                try:
+                    return task(), None, ''.join(output.local.buffer)
+                except TRANSIENT_ERRORS as e:
+                    if attempt == retries:
+                        return None, e, ''.join(output.local.buffer)
+                    delay = backoff * 2 ** attempt
+                    print(f'{e} Retrying in {delay:g}s ({attempt + 1}/{retries})')
+                    time.sleep(delay)
+                except Exception as e:
+                    return None, e, ''.join(output.local.buffer)
+    finally:
+        output.local.buffer = None
+
+
+def run_jobs(tasks, jobs=1, retries=0, backoff=1.0):
+    '''
+    Run (name, callable) tasks on a bounded thread pool and return a JobResult per task, in task order.
+    Failed tasks are retried with exponential backoff and reported in the results instead of raising.
+    '''
+    from concurrent.futures import ThreadPoolExecutor
+
+    output = ThreadOutput(sys.stdout)
+    sys.stdout = output
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+            futures = [executor.submit(run_job, output, name, task, retries, backoff) for name, task in tasks]
+            for (name, _), future in zip(tasks, futures):
+                result, error, printed = future.result()
+                output.stream.write(printed)
+                results.append(JobResult(name, result, error))
+    finally:
+        sys.stdout = output.stream
+    return results
+
+
+def summarize_failures(results):
+    '''
+    Return a summary of the failed jobs, or an empty string when all of them succeeded
+    '''
+    failures = [result for result in results if result.error is not None]
+    if not failures:
+        return ''
+    lines = [f'{len(failures)} of {len(results)} jobs failed:']
+    lines += [f'  {failure.name}: {failure.error}' for failure in failures]
+    return '\n'.join(lines)
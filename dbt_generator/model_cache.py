@@ -0,0 +1,95 @@
+import os
+import json
+import time
+import hashlib
+from .timings import timings
+
+
+# bump when the layout of generated base models changes, so older cache entries stop matching;
+# tests/test_model_cache.py fails when the renderers change without a bump
+BASE_MODEL_VERSION = 1
+
+
+class ModelCache:
+    '''
+    Content-addressed store of generated models, keyed by a fingerprint of the table schema and generator options
+    '''
+
+    def __init__(self, path='.dbt_generator_cache', max_age_days=None, max_size_mb=None):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_size_mb = max_size_mb
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, source_name, table_name, columns, options):
+        key = json.dumps({
+            'source_name': source_name,
+            'table_name': table_name,
+            'columns': [list(column) for column in columns],
+            'options': options,
+            'version': BASE_MODEL_VERSION,
+        }, sort_keys=True)
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.path, key[:2], key + '.sql')
+
+    def get(self, key):
+        '''
+        Return the cached model for a key, or None on a miss
+        '''
+        path = self.entry_path(key)
+        try:
+            with open(path, newline='') as file:
+                contents = file.read()
+        except FileNotFoundError:
+            self.misses += 1
+            timings.count('model cache misses')
+            return None
+        os.utime(path)  # keep recently used entries from being evicted
+        self.hits += 1
+        timings.count('model cache hits')
+        return contents
+
+    def put(self, key, contents):
+        path = self.entry_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w', newline='') as file:
+            file.write(contents)
+        os.replace(temp_path, path)
+
+    def entries(self):
+        if not os.path.isdir(self.path):
+            return []
+        entries = []
+        for directory, _, files in os.walk(self.path):
+            for file in files:
+                if file.endswith('.sql'):
+                    stat = os.stat(os.path.join(directory, file))
+                    entries.append((stat.st_mtime, stat.st_size, os.path.join(directory, file)))
+        return sorted(entries)
+
+    def evict(self):
+        '''
+        Remove entries older than max_age_days, then the least recently used ones until the cache fits in max_size_mb
+        '''
+        entries = self.entries()
+        removed = 0
+        if self.max_age_days is not None:
+            oldest = time.time() - self.max_age_days * 86400
+            for mtime, _, path in entries:
+                if mtime < oldest:
+                    os.remove(path)
+                    removed += 1
+            entries = [entry for entry in entries if entry[0] >= oldest]
+        if self.max_size_mb is not None:
+            size = sum(entry[1] for entry in entries)
+            for _, entry_size, path in entries:
+                if size <= self.max_size_mb * 1024 * 1024:
+                    break
+                os.remove(path)
+                size -= entry_size
+                removed += 1
+        return removed
@@ -0,0 +1,80 @@
+import os
+import json
+from pathlib import Path
+
+
+# where the dbt_generator macros live when the package is installed as a dbt package, copied into the project,
+# or run from a checkout of this repo
+MACRO_PATHS = [
+    os.path.join('dbt_packages', 'dbt_generator', 'macros'),
+    'macros',
+    str(Path(__file__).resolve().parent.parent / 'macros'),
+]
+
+
+class MacroReturn(Exception):
+    def __init__(self, value):
+        self.value = value
+
+
+def macro_return(value):
+    raise MacroReturn(value)
+
+
+def find_file(file_name, paths):
+    for path in paths:
+        file_path = os.path.join(path, file_name)
+        if os.path.exists(file_path):
+            return file_path
+    raise FileNotFoundError(f'Could not find {file_name} in {", ".join(paths)}')
+
+
+class NativeMacros:
+    '''
+    Render the dbt_generator macros with Jinja in-process instead of through dbt run-operation.
+    Only works for macros that do string templating and do not query the warehouse.
+    '''
+
+    def __init__(self, macro_paths=None):
+        import jinja2
+
+        self.macro_paths = macro_paths or MACRO_PATHS
+        self.env = jinja2.Environment(extensions=['jinja2.ext.do'])
+        self.modules = {}
+
+    def get_column_values(self, table, column):
+        if table != 'sql_reserved_words':
+            raise ValueError(f'Cannot look up {table} without a warehouse')
+        from .reserved_words import get_reserved_words
+        return get_reserved_words('ansi')
+
+    def get_macro(self, macro_name):
+        '''
+        Compile the macro file once and return the macro
+        '''
+        if macro_name not in self.modules:
+            file_path = find_file(macro_name + '.sql', self.macro_paths)
+            with open(file_path) as file:
+                template = self.env.from_string(file.read())
+            context = {
+                'execute': True,
+                'return': macro_return,
+                'log': lambda msg, info=False: '',
+                'print': lambda msg: '',
+                'tojson': json.dumps,
+                'ref': lambda name: name,
+                'dbt_utils': {'get_column_values': self.get_column_values},
+            }
+            self.modules[macro_name] = template.make_module(context)
+        return getattr(self.modules[macro_name], macro_name)
+
+    def call(self, macro_name, **kwargs):
+        '''
+        Call a macro and return the value it returns, or its rendered output if it does not return
+        '''
+        macro = self.get_macro(macro_name)
+        kwargs = {key: value for key, value in kwargs.items() if key in macro.arguments}
+        try:
+            return str(macro(**kwargs))
+        except MacroReturn as macro_result:
+            return macro_result.value
@@ -0,0 +1,75 @@
+import json
+
+
+# lines around a JSON payload printed by the dbt_generator macros
+BATCH_BEGIN = '-- dbt-generator batch begin --'
+BATCH_END = '-- dbt-generator batch end --'
+
+
+def iter_messages(lines):
+    '''
+    Yield the lines a macro printed or logged from the output of `dbt --log-format json run-operation`,
+    skipping dbt's own log events. Lines that are not JSON events (print output, or the logs of a dbt run
+    without --log-format json) are passed through, as is everything between the payload sentinels.
+    '''
+    in_payload = False
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if in_payload or not line.startswith('{'):
+            if line == BATCH_BEGIN:
+                in_payload = True
+            elif line == BATCH_END:
+                in_payload = False
+            yield line
+            continue
+        try:
+            event = json.loads(line)
+        except ValueError:
+            yield line
+            continue
+        info = event.get('info') if isinstance(event, dict) else None
+        if not isinstance(info, dict) or 'name' not in info:
+            yield line
+        elif info['name'] == 'JinjaLogInfo':
+            yield from event.get('data', {}).get('msg', '').split('\n')
+
+
+def extract_batch_payload(output):
+    '''
+    Return the JSON value printed between the batch sentinel lines of dbt output, given as text or lines.
+    Only the payload is kept; the other lines are read and dropped.
+    '''
+    lines = output.splitlines() if isinstance(output, str) else output
+    payload = None
+    collecting = None
+    for line in lines:
+        if collecting is not None:
+            if line == BATCH_END:
+                payload = collecting
+                collecting = None
+            else:
+                collecting.append(line)
+        elif payload is None and line == BATCH_BEGIN:
+            collecting = []
+    if payload is None:
+        raise Exception('dbt output does not contain a dbt-generator batch payload')
+    return json.loads('\n'.join(payload))
+
+
+def read_output(lines, marker):
+    '''
+    Return the output from the first occurrence of marker (case-insensitive) to the end.
+    Raises when the marker is missing instead of returning the whole log.
+    '''
+    marker = marker.lower()
+    output = None
+    for line in lines:
+        if output is not None:
+            output.append(line)
+            continue
+        index = line.lower().find(marker)
+        if index != -1:
+            output = [line[index:]]
+    if output is None:
+        raise Exception(f'dbt output does not contain "{marker}"')
+    return '\n'.join(output) + '\n'
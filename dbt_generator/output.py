@@ -0,0 +1,90 @@
+import os
+import tempfile
+import threading
+from .timings import timings
+
+
+CREATED = 'created'
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+
+
+class OutputStats:
+    '''
+    Counts of the files written by a command, by status, and the status of each file for shard manifests
+    '''
+
+    def __init__(self):
+        self.counts = {CREATED: 0, UPDATED: 0, UNCHANGED: 0}
+        self.files = {}
+        self.lock = threading.Lock()
+
+    def record(self, status, path=None):
+        with self.lock:
+            self.counts[status] += 1
+            if path is not None:
+                self.files[os.path.normpath(path)] = status
+
+    def total(self):
+        return sum(self.counts.values())
+
+    def summary(self):
+        return (f'Wrote {self.total()} files: {self.counts[CREATED]} created, '
+                f'{self.counts[UPDATED]} updated, {self.counts[UNCHANGED]} unchanged')
+
+
+output_stats = OutputStats()
+
+
+def get_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# read once, os.umask() briefly changes the process umask and is not safe to call from worker threads
+UMASK = get_umask()
+
+
+def write_output(path, contents, newline=''):
+    '''
+    Write a file only if its contents changed, atomically through a temp file and rename, so unchanged
+    models keep their mtime and dbt's partial parsing does not re-parse them.
+    newline works like open(): '' writes the contents as-is, None translates \\n to os.linesep.
+    Returns and records CREATED, UPDATED or UNCHANGED.
+    '''
+    if newline is None:
+        newline = os.linesep
+    if newline:
+        contents = contents.replace('\n', newline)
+    data = contents.encode('utf-8')
+    with timings.span('write', 'io', bytes=len(data)) as span:
+        status = write_file(path, data)
+        span['status'] = status
+    output_stats.record(status, path)
+    return status
+
+
+def write_file(path, data):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        stat = None
+    if stat is not None and stat.st_size == len(data):
+        with open(path, 'rb') as file:
+            if file.read() == data:
+                return UNCHANGED
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.chmod(temp_path, stat.st_mode if stat is not None else 0o666 & ~UMASK)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return UPDATED if stat is not None else CREATED
@@ -1,8 +1,9 @@
 import os
 import re
-import yaml
-import wordninja
-from abc import ABC, abstractmethod
+from .output import write_output
+from .transform_rules import TransformRules
+from .column_splitter import get_splitter
+from .transform_stages import Column, TransformsStage, ConventionsStage, BIGQUERY, SNOWFLAKE
 
 
 def get_sql_files(path):
@@ -18,60 +19,134 @@ def get_sql_files(path):
     return files
 
 
-class ProcessBaseQuery(ABC):
-    SQL_COLUMN_REGEX = "^[a-zA-Z_][a-zA-Z0-9_]*$"
+class ProcessBaseQuery:
+    SELECT_LINE = re.compile(r'^[ \t]*select[ \t]*\r?$', re.IGNORECASE | re.MULTILINE)
+    FROM_SOURCE_LINE = re.compile(r'^[ \t]*from source[ \t]*\r?$', re.IGNORECASE | re.MULTILINE)
+    TOKEN_REGEX = re.compile(r'''
+          (?P<comment>--[^\n]*|/\*.*?\*/)
+        | (?P<quoted>"(?:[^"]|"")*"|`[^`]*`)
+        | (?P<string>'(?:[^']|'')*')
+        | (?P<name>[a-zA-Z_][a-zA-Z0-9_$]*)
+        | (?P<comma>,)
+        | (?P<open>\()
+        | (?P<close>\))
+        | (?P<space>\s+)
+        | (?P<other>.)
+    ''', re.VERBOSE | re.DOTALL)
+    IDENTIFIERS = ('name', 'quoted')
+    SOURCE_CALL = re.compile(r"""source\(\s*['"]([^'"]+)['"]\s*,\s*['"]([^'"]+)['"]\s*\)""")
 
-    def __init__(self, sql_file, drop_metadata=False, case_sensitive=False):
+    def __init__(self, sql_file, drop_metadata=False, case_sensitive=False, text=None):
         self.sql_file = sql_file
         self.drop_metadata = drop_metadata
         self.case_sensitive = case_sensitive
-        self.open_query()
+        if text is None:
+            self.open_query()
+        else:
+            self.text = text
         self.get_columns()
 
     def open_query(self):
         '''
-        Open the sql file and store the lines in a list
+        Read the sql file. Models generated in memory are passed as text instead, and sql_file only names them.
         '''
-        file = open(self.sql_file).read()
-        self.lines = file.split('\n')
-        return file.split('\n')
+        with open(self.sql_file) as file:
+            self.text = file.read()
+        return self.text
+
+    @property
+    def lines(self):
+        return self.text.split('\n')
+
+    @lines.setter
+    def lines(self, lines):
+        self.text = '\n'.join(lines)
 
     def get_columns(self):
         '''
-        Get the columns from the sql file
+        Get the columns from the sql file in one pass over the column list.
+        The query is split at offsets into a header (up to the select line), the columns and a footer (from the
+        from source line), so the columns can be rewritten without touching the rest of the model.
         '''
-        lines = self.lines
-        # Get lines between select and from source statements
-        try:
-            self.start_index = [line.lower().strip()
-                                for line in lines].index('select') + 1
-            self.end_index = [line.lower().strip()
-                              for line in lines].index('from source')
-        except ValueError:
+        text = self.text
+        select_line = self.SELECT_LINE.search(text)
+        from_source_line = select_line and self.FROM_SOURCE_LINE.search(text, select_line.end())
+        if not from_source_line:
             raise Exception(
                 f'{self.sql_file} does not contain a "select" and/or "from source" statement')
-        columns = lines[self.start_index:self.end_index]
-
-        # Strip columns and remove commas
-        cleansed_cols = list(
-            filter(lambda x: x != '', [col.replace(',', '').strip() for col in columns]))
-        # Match only valid column names
-        cleansed_cols = [col for col in cleansed_cols if re.match(
-            self.SQL_COLUMN_REGEX, col)]
-        self.columns = cleansed_cols
+        self.header_end = select_line.end()
+        self.footer_start = from_source_line.start()
+
+        self.columns = []
+        self.expressions = {}
+        tokens = []
+        depth = 0
+        for token in self.TOKEN_REGEX.finditer(text, self.header_end, self.footer_start):
+            kind = token.lastgroup
+            if kind == 'space' or kind == 'comment':
+                continue
+            if kind == 'comma' and depth == 0:
+                self.add_column(tokens)
+                tokens = []
+                continue
+            if kind == 'open':
+                depth += 1
+            elif kind == 'close':
+                depth -= 1
+            tokens.append(token)
+        self.add_column(tokens)
+
         # Remove metadata columns
         if self.drop_metadata:
             self.remove_metadata()
         # Raise exception if no columns found
-        if cleansed_cols == []:
+        if self.columns == []:
             raise Exception(f'{self.sql_file} does not contain any columns')
 
+    def add_column(self, tokens):
+        '''
+        Add a column from its tokens: a bare or quoted identifier, or an expression with an alias.
+        Anything else, such as *, is not a column and is skipped.
+        '''
+        if not tokens or tokens[-1].lastgroup not in self.IDENTIFIERS:
+            return
+        name = tokens[-1].group()
+        if len(tokens) == 1:
+            self.columns.append(name)
+            return
+        if tokens[-2].group().lower() == 'as':
+            expression = tokens[:-2]
+        elif len(tokens) == 2 and tokens[0].lastgroup in self.IDENTIFIERS:
+            expression = tokens[:1]
+        else:
+            return
+        if not expression:
+            return
+        self.columns.append(name)
+        self.expressions[name] = self.text[expression[0].start():expression[-1].end()]
+
     def remove_metadata(self):
-        self.columns = [col for col in self.columns if col[0] != '_']
+        self.columns = [col for col in self.columns if col.strip('"`')[0] != '_']
+
+    def get_stages(self):
+        '''
+        Return the transform stages to run over the columns, in order. Each stage is called with the list of Columns.
+        '''
+        return []
 
-    @abstractmethod
-    def process_transforms():
-        pass
+    def get_data_types(self):
+        return {}
+
+    def process_transforms(self):
+        '''
+        Run the columns through every stage in one pass, then render each column as a select item
+        '''
+        data_types = self.get_data_types()
+        columns = [Column(name, self.expressions.get(name), data_types.get(name.strip('"`').lower(), ''))
+                   for name in self.columns]
+        for stage in self.get_stages():
+            stage(columns)
+        self.columns = [column.sql() for column in columns]
 
     def process_sql(self):
         columns = ['        ' + col for col in self.columns]
@@ -81,45 +156,47 @@ class ProcessBaseQuery(ABC):
     def process_base_models(self, path):
         self.process_transforms()
         columns_text = self.process_sql()
-        query_header = '\n'.join(self.lines[:self.start_index])
-        query_footer = '\n'.join(self.lines[self.end_index:])
-        query = query_header + '\n' + columns_text + '\n' + query_footer
+        query = self.text[:self.header_end] + '\n' + columns_text + '\n' + self.text[self.footer_start:]
+
+        status = write_output(path, query, newline=None)
+        print(f'Processed model {path} ({status})')
+        return status
 
-        file = open(path, 'w')
-        file.write(query)
-        print(f'Processed model {path}')
+
+def load_transforms_file(transforms_file, case_sensitive=False):
+    '''
+    Load a transforms .yml file and compile its rules, matching column names case-insensitively unless case_sensitive
+    '''
+    import yaml
+    with open(transforms_file) as file:
+        transforms = yaml.load(file, Loader=yaml.FullLoader)
+    return TransformRules(transforms, case_sensitive)
 
 
 class ProcessBaseModelsWithTransforms(ProcessBaseQuery):
-    def __init__(self, transforms_file, sql_file, drop_metadata=False, case_sensitive=False):
-        super().__init__(sql_file, drop_metadata, case_sensitive)
+    def __init__(self, transforms_file, sql_file, drop_metadata=False, case_sensitive=False, transforms=None, text=None):
+        super().__init__(sql_file, drop_metadata, case_sensitive, text)
         self.transforms_file = transforms_file
-        self.load_transforms()
+        if transforms is None:
+            self.load_transforms()
+        elif isinstance(transforms, TransformRules):
+            self.transforms = transforms
+        else:
+            self.transforms = TransformRules(transforms, case_sensitive)
 
     def load_transforms(self):
-        transforms_file = open(self.transforms_file)
-        transforms = yaml.load(transforms_file, Loader=yaml.FullLoader)
-        if not self.case_sensitive:
-            transforms = dict((k.lower(), v) for k, v in transforms.items())
-        self.transforms = transforms
-
-    def process_transform(self, base_column, transform):
-        transformed_name = transform['name']
-        if 'sql' in transform.keys():
-            sql = transform['sql']
-        else:
-            sql = base_column
-        return f'{sql} as {transformed_name}'
+        self.transforms = load_transforms_file(self.transforms_file, self.case_sensitive)
 
-    def process_transforms(self):
-        for column in self.transforms:
-            if column in self.columns:
-                index = self.columns.index(column)
-                transform = self.transforms[column]
-                self.columns[index] = self.process_transform(column, transform)
+    def get_stages(self):
+        return [TransformsStage(self.transforms)]
 
 
 class ProcessBaseModels(ProcessBaseQuery):
+    '''
+    Apply the conventions of a warehouse to base models, after the rules of a transforms .yml when one is given
+    '''
+    conventions = None
+
     def __init__(
         self,
         sql_file,
@@ -128,43 +205,57 @@ class ProcessBaseModels(ProcessBaseQuery):
         split_columns=False,
         id_as_int=False,
         convert_timestamp=False,
+        words_file=None,
+        split_cache=None,
+        schema_store=None,
+        schema_name=None,
+        alias_reserved=False,
+        database_name=None,
+        text=None,
+        transforms_file=None,
+        transforms=None,
     ):
-        super().__init__(sql_file, drop_metadata, case_sensitive)
+        super().__init__(sql_file, drop_metadata, case_sensitive, text)
         self.split_columns = split_columns
         self.id_as_int = id_as_int
         self.convert_timestamp = convert_timestamp
+        self.words_file = words_file
+        self.split_cache = split_cache
+        self.schema_store = schema_store
+        self.schema_name = schema_name
+        self.database_name = database_name
+        self.alias_reserved = alias_reserved
+        self.transforms_file = transforms_file
+        if transforms is None and transforms_file:
+            transforms = load_transforms_file(transforms_file, case_sensitive)
+        elif transforms is not None and not isinstance(transforms, TransformRules):
+            transforms = TransformRules(transforms, case_sensitive)
+        self.transforms = transforms
 
-    def split_column_name(self, column_name):
-        column_name = wordninja.split(column_name)
-        column_name = '_'.join(column_name)
-        return column_name
+    def get_data_types(self):
+        '''
+        Return {lowercase column name: data type} from the schema store for the source table of the model,
+        or an empty dict without a store. The schema defaults to the source name, and the database to the only one
+        the store holds the schema for.
+        '''
+        source = self.SOURCE_CALL.search(self.text, 0, self.header_end)
+        if not self.schema_store or source is None:
+            return {}
+        from .schema_store import get_store
+        columns = get_store(self.schema_store).get_columns(self.database_name, self.schema_name or source.group(1), source.group(2))
+        return {name.lower(): data_type.upper() for name, data_type in columns}
 
-    def process_transforms(self):
-        processed_columns = []
-        for column in self.columns:
-            column_alias = column
-            if not self.case_sensitive:
-                column = column.lower()
-            if self.split_columns and column[0] != '_':
-                column_alias = self.split_column_name(column)
-            if self.id_as_int and '_id' in column_alias:
-                column = self.integer_convert.format(column)
-            if self.convert_timestamp and (
-                '_timestamp' in column_alias or
-                '_date' in column_alias or
-                '_at' in column_alias
-            ):
-                column = self.timestamp_convert.format(column)
-
-            processed_columns.append(f'{column} as {column_alias}')
-        self.columns = processed_columns
+    def get_stages(self):
+        stages = [TransformsStage(self.transforms)] if self.transforms is not None else []
+        splitter = get_splitter(self.words_file, self.split_cache) if self.split_columns else None
+        stages.append(ConventionsStage(self.conventions, self.case_sensitive, self.split_columns, self.id_as_int,
+                                       self.convert_timestamp, self.alias_reserved, splitter))
+        return stages
 
 
 class ProcessBaseModelsBQ(ProcessBaseModels):
-    timestamp_convert = 'timestamp({})'
-    integer_convert = 'cast({} as int64)'
+    conventions = BIGQUERY
 
 
 class ProcessBaseModelsSF(ProcessBaseModels):
-    timestamp_convert = '{}::timestamp'
-    integer_convert = '{}::integer'
+    conventions = SNOWFLAKE
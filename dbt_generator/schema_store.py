@@ -0,0 +1,154 @@
+import json
+import time
+import sqlite3
+import hashlib
+from collections import namedtuple
+
+
+SchemaDrift = namedtuple('SchemaDrift', ['added', 'changed', 'removed'])
+
+# stores opened in this process, keyed by path, so worker processes open the database once
+stores = {}
+
+
+def hash_columns(columns):
+    return hashlib.sha256(json.dumps([list(column) for column in columns]).encode('utf-8')).hexdigest()
+
+
+class SchemaStore:
+    '''
+    Local SQLite copy of the tables and columns of source schemas, refreshed from one information_schema
+    query per schema. Names are matched case-insensitively; a database of None stands for the only database
+    the schema is stored for.
+    '''
+
+    def __init__(self, path='.dbt_generator_schema.db'):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=30)
+        with self.connection:
+            self.connection.execute('create table if not exists tables (database text, schema text, table_name text, '
+                                    'last_altered text, columns_hash text, refreshed_at real, '
+                                    'primary key (database, schema, table_name))')
+            self.connection.execute('create table if not exists columns (database text, schema text, table_name text, '
+                                    'column_name text, ordinal_position integer, data_type text)')
+            self.connection.execute('create index if not exists columns_table on columns (schema, table_name)')
+        # schema => its database, for lookups without a database
+        self.databases = {}
+
+    def close(self):
+        self.connection.close()
+
+    def get_hashes(self, database, schema):
+        rows = self.connection.execute('select table_name, columns_hash from tables where database = ? and schema = ?',
+                                       (database.upper(), schema.upper()))
+        return dict(rows)
+
+    def get_last_altered(self, database, schema):
+        '''
+        Return the latest last_altered time stored for a schema, to only pull the tables altered since
+        '''
+        row = self.connection.execute('select max(last_altered) from tables where database = ? and schema = ?',
+                                      (database.upper(), schema.upper())).fetchone()
+        return row[0]
+
+    def compare(self, database, schema, catalog):
+        '''
+        Compare a catalog pulled with macro_get_schema_catalog against the store.
+        Tables returned without columns were not altered and count as unchanged.
+        '''
+        hashes = self.get_hashes(database, schema)
+        added, changed = [], []
+        for table_name, table in catalog.items():
+            key = table_name.upper()
+            if key not in hashes:
+                added.append(table_name)
+            elif table['columns'] is not None and hash_columns(table['columns']) != hashes[key]:
+                changed.append(table_name)
+        names = {table_name.upper() for table_name in catalog}
+        removed = [table_name for table_name in hashes if table_name not in names]
+        return SchemaDrift(sorted(added), sorted(changed), sorted(removed))
+
+    def get_unseen(self, database, schema, catalog):
+        '''
+        Return the tables of a catalog that came back without columns (not altered since the last refresh)
+        but are not in the store, so their columns have to be pulled
+        '''
+        hashes = self.get_hashes(database, schema)
+        return sorted(table_name for table_name, table in catalog.items()
+                      if table['columns'] is None and table_name.upper() not in hashes)
+
+    def update(self, database, schema, catalog):
+        '''
+        Save a pulled catalog: replace the columns of altered tables and remove tables that no longer exist
+        '''
+        database, schema = database.upper(), schema.upper()
+        self.databases.pop(schema, None)
+        drift = self.compare(database, schema, catalog)
+        refreshed_at = time.time()
+        with self.connection:
+            for table_name in drift.removed:
+                self.delete_table(database, schema, table_name)
+            for table_name, table in catalog.items():
+                key = table_name.upper()
+                if table['columns'] is None:
+                    self.connection.execute('update tables set last_altered = ?, refreshed_at = ? '
+                                            'where database = ? and schema = ? and table_name = ?',
+                                            (table['last_altered'], refreshed_at, database, schema, key))
+                    continue
+                self.delete_table(database, schema, key)
+                self.connection.execute('insert into tables values (?, ?, ?, ?, ?, ?)',
+                                        (database, schema, key, table['last_altered'],
+                                         hash_columns(table['columns']), refreshed_at))
+                self.connection.executemany('insert into columns values (?, ?, ?, ?, ?, ?)',
+                                            [(database, schema, key, name, index, data_type)
+                                             for index, (name, data_type) in enumerate(table['columns'], 1)])
+        return drift
+
+    def delete_table(self, database, schema, table_name):
+        for table in ('tables', 'columns'):
+            self.connection.execute(f'delete from {table} where database = ? and schema = ? and table_name = ?',
+                                    (database, schema, table_name))
+
+    def get_schemas(self, database):
+        rows = self.connection.execute('select distinct schema from tables where database = ? order by schema',
+                                       (database.upper(),))
+        return [row[0] for row in rows]
+
+    def resolve_database(self, database, schema):
+        '''
+        Return the database to look a schema up in: the one given, or else the only database the schema is
+        stored for. Raises ValueError when the schema is stored for several databases.
+        '''
+        if database is not None:
+            return database.upper()
+        schema = schema.upper()
+        if schema not in self.databases:
+            rows = self.connection.execute('select distinct database from tables where schema = ? order by database',
+                                           (schema,))
+            databases = [row[0] for row in rows]
+            if len(databases) > 1:
+                raise ValueError(f'Schema {schema} is stored for databases {", ".join(databases)}, '
+                                 'name the database to look it up in')
+            self.databases[schema] = databases[0] if databases else None
+        return self.databases[schema]
+
+    def get_tables(self, database, schema):
+        database = self.resolve_database(database, schema)
+        rows = self.connection.execute('select table_name from tables where database = ? and schema = ? '
+                                       'order by table_name', (database, schema.upper()))
+        return [row[0] for row in rows]
+
+    def get_columns(self, database, schema, table_name):
+        '''
+        Return [(column_name, data_type)] for a table in ordinal order, or an empty list if it is not stored
+        '''
+        database = self.resolve_database(database, schema)
+        rows = self.connection.execute('select column_name, data_type from columns where database = ? '
+                                       'and schema = ? and table_name = ? order by ordinal_position',
+                                       (database, schema.upper(), table_name.upper()))
+        return rows.fetchall()
+
+def get_store(path):
+    if path not in stores:
+        stores[path] = SchemaStore(path)
+    return stores[path]
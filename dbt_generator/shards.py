@@ -0,0 +1,146 @@
+import os
+import json
+import time
+import hashlib
+from .output import output_stats
+
+
+def parse_shard(value):
+    '''
+    Parse INDEX/COUNT, with INDEX counted from 1 as CI systems number their nodes
+    '''
+    index, _, count = value.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f'{value} is not INDEX/COUNT, e.g. 1/4') from None
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f'{value}: INDEX must be between 1 and COUNT')
+    return index, count
+
+
+def shard_of(key, count):
+    '''
+    Return the shard (from 1) a table, seed row or file is assigned to. Unlike hash(), sha256 gives the same
+    answer on every machine and Python version, so runners agree without talking to each other.
+    '''
+    digest = hashlib.sha256(key.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % count + 1
+
+
+def hash_keys(keys):
+    return hashlib.sha256('\n'.join(sorted(keys)).encode('utf-8')).hexdigest()
+
+
+def hash_file(file_path):
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+class Shard:
+    '''
+    The share of a command's work done by one runner of --shard INDEX/COUNT, and the manifest it reports
+    '''
+
+    def __init__(self, command, index, count):
+        self.command = command
+        self.index = index
+        self.count = count
+        self.start = time.time()
+        self.total = 0
+        self.universe = None
+        self.keys = []
+
+    def select(self, keys):
+        '''
+        Return the keys of this shard, in their order, out of every key of the command
+        '''
+        keys = list(dict.fromkeys(keys))
+        self.total = len(keys)
+        self.universe = hash_keys(keys)
+        self.keys = [key for key in keys if shard_of(key, self.count) == self.index]
+        # the manifest lists the files written from here on
+        output_stats.files.clear()
+        print(f'Shard {self.index}/{self.count}: {len(self.keys)} of {self.total} items')
+        return self.keys
+
+    def manifest(self, results=()):
+        '''
+        Return the manifest of the shard: its items, the files written with their hash and status,
+        the failed jobs and how long it took
+        '''
+        outputs = {path: {'sha256': hash_file(path), 'status': status}
+                   for path, status in sorted(output_stats.files.items()) if os.path.exists(path)}
+        return {
+            'command': self.command,
+            'shard': {'index': self.index, 'count': self.count},
+            'total': self.total,
+            'universe': self.universe,
+            'items': sorted(self.keys),
+            'outputs': outputs,
+            'failed': {result.name: str(result.error) for result in results if result.error is not None},
+            'started_at': self.start,
+            'seconds': round(time.time() - self.start, 3),
+        }
+
+    def write_manifest(self, path, results=()):
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(self.manifest(results), file, indent=1, sort_keys=True)
+        os.replace(temp_path, path)
+        print(f'Wrote shard manifest {path}')
+
+
+def merge_manifests(manifests):
+    '''
+    Combine the manifests of every shard of a command. Returns (merged manifest, problems), where problems
+    lists missing or duplicate shards, shards that disagree on the work, items covered twice or not at all,
+    conflicting outputs and failed jobs.
+    '''
+    problems = []
+    first = manifests[0]
+    count = first['shard']['count']
+    for manifest in manifests[1:]:
+        for field in ('command', 'total', 'universe'):
+            if manifest[field] != first[field]:
+                problems.append(f'shard {manifest["shard"]["index"]} has {field} {manifest[field]}, '
+                                f'shard {first["shard"]["index"]} has {first[field]}')
+        if manifest['shard']['count'] != count:
+            problems.append(f'shard {manifest["shard"]["index"]} is one of {manifest["shard"]["count"]} shards, not {count}')
+
+    indexes = [manifest['shard']['index'] for manifest in manifests]
+    missing = sorted(set(range(1, count + 1)) - set(indexes))
+    if missing:
+        problems.append(f'missing shards: {", ".join(map(str, missing))} of {count}')
+    duplicates = sorted({index for index in indexes if indexes.count(index) > 1})
+    if duplicates:
+        problems.append(f'duplicate shards: {", ".join(map(str, duplicates))}')
+
+    items, outputs, failed = {}, {}, {}
+    for manifest in manifests:
+        index = manifest['shard']['index']
+        for item in manifest['items']:
+            if item in items and items[item] != index:
+                problems.append(f'{item} was done by shards {items[item]} and {index}')
+            items[item] = index
+        for path, output in manifest['outputs'].items():
+            if path in outputs and outputs[path]['sha256'] != output['sha256']:
+                problems.append(f'{path} differs between shards {outputs[path]["shard"]} and {index}')
+            outputs[path] = dict(output, shard=index)
+        failed.update(manifest['failed'])
+    if not missing and len(items) != first['total']:
+        problems.append(f'{len(items)} of {first["total"]} items were done')
+    problems += [f'{name} failed: {error}' for name, error in sorted(failed.items())]
+
+    merged = {
+        'command': first['command'],
+        'shards': {manifest['shard']['index']: manifest['seconds'] for manifest in manifests},
+        'total': first['total'],
+        'universe': first['universe'],
+        'items': sorted(items),
+        'outputs': dict(sorted(outputs.items())),
+        'failed': failed,
+        # the shards run side by side, so the slowest one is how long the work took
+        'seconds': max(manifest['seconds'] for manifest in manifests),
+    }
+    return merged, problems
@@ -0,0 +1,67 @@
+import csv
+from collections import namedtuple
+
+
+SEED_COLUMNS = [
+    'system_name', 'dbt_source', 'table_name', 'unique_key', 'snapshot_strategy', 'updated_at', 'check_cols',
+    'invalidate_hard_deletes', 'composite_key', 'invalidate_fivetran_soft_deletes', 'invalidate_soft_deletes',
+    'soft_delete_indicator_col', 'soft_delete_date_col', 'salesforce_formula_transformation',
+]
+FLAG_COLUMNS = {
+    'invalidate_hard_deletes', 'composite_key', 'invalidate_fivetran_soft_deletes', 'invalidate_soft_deletes',
+    'salesforce_formula_transformation',
+}
+
+
+def is_set(value):
+    '''
+    Read a flag printed as 1, 1.0, 1.000 (decimals), true or True
+    '''
+    text = str(value).strip().lower()
+    if text == 'true':
+        return True
+    try:
+        return float(text) == 1
+    except ValueError:
+        return False
+
+
+class SnapshotSeedRow(namedtuple('SnapshotSeedRow', SEED_COLUMNS)):
+    __slots__ = ()
+
+    @classmethod
+    def from_values(cls, values):
+        '''
+        Build a row from a {column: value} mapping with any column name case. Flags become 0/1 ints and
+        empty values become "None", which is what the snapshot macros expect.
+        '''
+        values = {str(key).lower(): value for key, value in values.items()}
+        row = {}
+        for column in SEED_COLUMNS:
+            value = values.get(column)
+            if column in FLAG_COLUMNS:
+                row[column] = 1 if is_set(value) else 0
+            elif value is None or str(value).strip() == '':
+                row[column] = 'None'
+            else:
+                row[column] = str(value)
+        return cls(**row)
+
+
+def read_snapshot_seed(file_path, system_names=None):
+    '''
+    Stream the rows of a dbt_snapshot_seed.csv, keeping only the given system names (all rows if None)
+    '''
+    with open(file_path, newline='', encoding='utf-8-sig') as file:
+        for values in csv.DictReader(file):
+            if system_names and values.get('system_name') not in system_names:
+                continue
+            yield SnapshotSeedRow.from_values(values)
+
+
+def rows_from_query_results(query_results):
+    '''
+    Convert the [{column: value}] rows printed by macro_snapshot_list into rows
+    '''
+    for values in query_results:
+        yield SnapshotSeedRow.from_values(values)
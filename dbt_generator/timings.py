@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import threading
+import contextlib
+from collections import namedtuple
+
+
+Span = namedtuple('Span', ['name', 'category', 'pid', 'tid', 'start', 'duration', 'args'])
+
+
+class Timings:
+    '''
+    Spans (subprocess calls, parsing, writes, jobs) and counters recorded by a command when it runs
+    with --profile or --timings-json. Recording is off by default and span() then costs one check.
+    '''
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self.counters = {}
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+        self.origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        '''
+        Time the body of a with block. The yielded dict can be updated with details such as bytes read.
+        '''
+        if not self.enabled:
+            yield args
+            return
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add(Span(name, category, os.getpid(), threading.get_ident(), start, time.perf_counter() - start, args))
+
+    def add(self, span):
+        with self.lock:
+            self.spans.append(span)
+
+    def extend(self, spans):
+        '''
+        Add spans recorded in a worker process
+        '''
+        with self.lock:
+            self.spans.extend(spans)
+
+    def take(self, mark):
+        '''
+        Remove and return the spans recorded since len(spans) was mark, to send them back from a worker process
+        '''
+        with self.lock:
+            spans = self.spans[mark:]
+            del self.spans[mark:]
+        return spans
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self):
+        '''
+        Return a table of the spans by category and name, with their count, total, mean and max time and bytes
+        '''
+        groups = {}
+        for span in self.spans:
+            group = groups.setdefault((span.category, span.name), [0, 0.0, 0.0, 0])
+            group[0] += 1
+            group[1] += span.duration
+            group[2] = max(group[2], span.duration)
+            group[3] += span.args.get('bytes', 0)
+        lines = [f'{"category":<10}{"span":<32}{"count":>7}{"total s":>10}{"mean ms":>10}{"max ms":>10}{"bytes":>12}']
+        for (category, name), (count, total, longest, size) in sorted(groups.items(), key=lambda item: -item[1][1]):
+            lines.append(f'{category:<10}{name[:31]:<32}{count:>7}{total:>10.3f}{total / count * 1000:>10.1f}'
+                         f'{longest * 1000:>10.1f}{size or "":>12}')
+        lines += [f'{name}: {value}' for name, value in sorted(self.counters.items())]
+        return '\n'.join(lines)
+
+    def trace_events(self):
+        '''
+        Return the spans in the Trace Event Format read by chrome://tracing, Perfetto and speedscope
+        '''
+        events = [{'name': span.name, 'cat': span.category, 'ph': 'X', 'pid': span.pid, 'tid': span.tid,
+                   'ts': round((span.start - self.origin) * 1e6), 'dur': round(span.duration * 1e6), 'args': span.args}
+                  for span in self.spans]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms', 'otherData': {'counters': self.counters}}
+
+    def write_trace(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.trace_events(), file, default=str)
+
+
+timings = Timings()
@@ -0,0 +1,171 @@
+import io
+import os
+import json
+import hashlib
+import contextlib
+from .job_pool import JobResult
+from .output import output_stats
+from .timings import timings
+
+
+MANIFEST_FILE = '.dbt_generator_manifest.json'
+
+# processor options naming files whose contents, not paths, decide the output
+INPUT_FILES = ('transforms_file', 'words_file', 'schema_store')
+
+
+# processor settings shared by every file a worker process handles, set once per process by init_worker
+worker_processor = None
+
+
+def init_worker(processor_class, processor_kwargs, record_timings=False):
+    global worker_processor
+    worker_processor = (processor_class, processor_kwargs)
+    if record_timings:
+        timings.enable()
+
+
+def transform_file(sql_file, output_file):
+    '''
+    Process one model and return (printed output, error message or None, output status, timing spans)
+    '''
+    processor_class, processor_kwargs = worker_processor
+    printed = io.StringIO()
+    mark = len(timings.spans)
+    status, error = None, None
+    try:
+        with timings.span('transform', 'job', file=sql_file), contextlib.redirect_stdout(printed):
+            processor = processor_class(sql_file=sql_file, **processor_kwargs)
+            status = processor.process_base_models(output_file)
+    except Exception as e:
+        error = str(e) or repr(e)
+    # spans recorded in a worker process only reach the report if they are sent back with the result
+    return printed.getvalue(), error, status, timings.take(mark)
+
+
+def transform_query(processor_class, processor_kwargs, query, output_file):
+    '''
+    Transform a model generated in memory and write only the transformed model, without reading it back from disk
+    '''
+    processor = processor_class(sql_file=os.path.basename(output_file), text=query, **processor_kwargs)
+    return processor.process_base_models(output_file)
+
+
+def get_tool_version():
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        # Python 3.7 has no importlib.metadata
+        import pkg_resources
+        try:
+            return pkg_resources.get_distribution('dbt_generator').version
+        except pkg_resources.DistributionNotFound:
+            return 'unknown'
+    try:
+        return version('dbt_generator')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def hash_file(file_path):
+    with open(file_path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+class TransformManifest:
+    '''
+    Hashes of the inputs and configuration each model in an output directory was last transformed with
+    '''
+
+    def __init__(self, output_path, processor_class, processor_kwargs):
+        self.path = os.path.join(output_path, MANIFEST_FILE)
+        options = {key: value for key, value in processor_kwargs.items()
+                   if key not in INPUT_FILES + ('transforms', 'split_cache')}
+        config = {
+            'processor': processor_class.__name__,
+            'options': options,
+            'inputs': {key: hash_file(processor_kwargs[key]) for key in INPUT_FILES if processor_kwargs.get(key)},
+            'version': get_tool_version(),
+        }
+        self.config = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        self.files = {}
+        if os.path.exists(self.path):
+            with open(self.path) as file:
+                self.files = json.load(file).get('files', {})
+
+    def is_current(self, input_file, output_file, sql_file):
+        entry = self.files.get(sql_file)
+        if entry is None or entry['config'] != self.config or not os.path.exists(output_file):
+            return False
+        stat = os.stat(input_file)
+        if stat.st_mtime_ns == entry['mtime_ns'] and stat.st_size == entry['size']:
+            return True
+        return hash_file(input_file) == entry['sha256']
+
+    def update(self, input_file, sql_file):
+        stat = os.stat(input_file)
+        self.files[sql_file] = {'config': self.config, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                                'sha256': hash_file(input_file)}
+
+    def save(self):
+        # the output directory does not exist yet if every pending model failed
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump({'files': self.files}, file, indent=1, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+
+def run_transforms(model_path, sql_files, output_path, processor_class, processor_kwargs, jobs=1, incremental=False):
+    '''
+    Transform every sql file in model_path with one processor configuration, on up to `jobs` processes.
+    Results are printed as files finish; errors are returned as JobResults instead of stopping the batch.
+    With incremental, files whose input and configuration are unchanged since the last run are skipped.
+    '''
+    paths = [(os.path.join(model_path, sql_file), os.path.join(output_path, sql_file)) for sql_file in sql_files]
+    results = []
+    manifest = None
+    if incremental:
+        manifest = TransformManifest(output_path, processor_class, processor_kwargs)
+        pending = [(sql_file, path) for sql_file, path in zip(sql_files, paths) if not manifest.is_current(*path, sql_file)]
+        print(f'{len(sql_files) - len(pending)} models unchanged, transforming {len(pending)}')
+        sql_files = [sql_file for sql_file, _ in pending]
+        paths = [path for _, path in pending]
+    try:
+        run_pending(sql_files, paths, processor_class, processor_kwargs, jobs, results, manifest)
+    finally:
+        if manifest is not None:
+            manifest.save()
+    return results
+
+
+def run_pending(sql_files, paths, processor_class, processor_kwargs, jobs, results, manifest):
+    inputs = dict(zip(sql_files, (input_file for input_file, _ in paths)))
+
+    def report(sql_file, printed, error, status, spans):
+        timings.extend(spans)
+        print(printed, end='')
+        if error is not None:
+            print(f'Failed to process {sql_file}: {error}')
+        elif manifest is not None:
+            manifest.update(inputs[sql_file], sql_file)
+        results.append(JobResult(sql_file, None, error))
+
+    if jobs <= 1 or len(paths) <= 1:
+        init_worker(processor_class, processor_kwargs, timings.enabled)
+        for sql_file, (input_file, output_file) in zip(sql_files, paths):
+            report(sql_file, *transform_file(input_file, output_file))
+        return
+
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker,
+                             initargs=(processor_class, processor_kwargs, timings.enabled)) as executor:
+        futures = {executor.submit(transform_file, input_file, output_file): (sql_file, output_file)
+                   for sql_file, (input_file, output_file) in zip(sql_files, paths)}
+        for future in as_completed(futures):
+            sql_file, output_file = futures[future]
+            printed, error, status, spans = future.result()
+            if status is not None:
+                output_stats.record(status, output_file)  # written in a worker process, count it here
+            report(sql_file, printed, error, status, spans)
@@ -0,0 +1,155 @@
+import re
+
+
+GLOB_CHARACTERS = set('*?[')
+
+# the parts of a regex key that refer to its groups by number or name, and character classes, which do not
+REGEX_REFERENCE = re.compile(r'''
+      (?P<klass>\[\^?\]?(?:\\.|[^\]\\])*\])
+    | \\(?P<number>[1-9][0-9]?)(?![0-9])
+    | (?P<escape>\\.)
+    | \(\?P<(?P<group>\w+)>
+    | \(\?P=(?P<backref>\w+)\)
+    | \(\?\((?P<condition>\w+)\)
+''', re.VERBOSE | re.DOTALL)
+
+
+def is_regex(key):
+    return key.startswith('^') or key.endswith('$')
+
+
+def is_glob(key):
+    return not GLOB_CHARACTERS.isdisjoint(key)
+
+
+def glob_to_regex(glob):
+    '''
+    Translate a glob like fnmatch does, but without groups of its own, so globs can share one regex
+    '''
+    parts = []
+    index = 0
+    while index < len(glob):
+        character = glob[index]
+        index += 1
+        if character == '*':
+            parts.append('.*')
+        elif character == '?':
+            parts.append('.')
+        elif character == '[':
+            end = index + 1 if glob[index:index + 1] == '!' else index
+            end = glob.find(']', end + 1 if glob[end:end + 1] == ']' else end)
+            if end == -1:
+                parts.append('\\[')
+                continue
+            members = glob[index:end].replace('\\', '\\\\')
+            if members.startswith('!'):
+                members = '^' + members[1:]
+            elif members.startswith('^'):
+                members = '\\' + members
+            parts.append(f'[{members}]')
+            index = end + 1
+        else:
+            parts.append(re.escape(character))
+    return ''.join(parts)
+
+
+def renumber_groups(regex, offset, prefix):
+    '''
+    Rewrite the group references of a regex for its place in a combined regex: numbered backreferences
+    move by offset and group names get a prefix, so keys with groups of the same number or name do not clash
+    '''
+    def rewrite(match):
+        if match.group('number'):
+            return f'\\{int(match.group("number")) + offset}'
+        if match.group('group'):
+            return f'(?P<{prefix}{match.group("group")}>'
+        if match.group('backref'):
+            return f'(?P={prefix}{match.group("backref")})'
+        if match.group('condition'):
+            condition = match.group('condition')
+            return f'(?({int(condition) + offset if condition.isdigit() else prefix + condition})'
+        return match.group()
+    return REGEX_REFERENCE.sub(rewrite, regex)
+
+
+class TransformRules:
+    '''
+    Transforms from a transforms .yml compiled for fast lookup by column name.
+    Keys are exact column names, globs (`*_at`, `is_*`) that match the whole name, or regexes (`^_fivetran_`, `_id$`)
+    that are searched for in the name. An exact name always wins; otherwise the first matching pattern in file order
+    applies. All patterns are combined into one regex, so a column is matched in one pass however many rules there
+    are, and results are memoized per column.
+    In a pattern rule, `{column}` in `name` or `sql` is replaced with the matched column name.
+    '''
+
+    def __init__(self, transforms, case_sensitive=False):
+        self.case_sensitive = case_sensitive
+        self.exact = {}
+        self.patterns = []
+        flags = (0 if case_sensitive else re.IGNORECASE) | re.DOTALL
+        alternatives = []
+        # keys that cannot share the combined regex, such as regexes with global inline flags on Python 3.11+,
+        # as (index, search), checked only when they come before the rule the combined regex found
+        self.separate = []
+        groups = 0
+        for key, transform in (transforms or {}).items():
+            key = str(key)
+            if not is_regex(key) and not is_glob(key):
+                self.exact.setdefault(key if case_sensitive else key.lower(), transform)
+                continue
+            index = len(self.patterns)
+            self.patterns.append((key, transform))
+            if not is_regex(key):
+                alternatives.append(f'(?P<rule{index}>(?:{glob_to_regex(key)})\\Z)')
+                groups += 1
+                continue
+            compiled = re.compile(key, flags)
+            try:
+                # on its own, the wrapper group is group 1
+                re.compile(f'(?P<rule>.*?(?:{renumber_groups(key, 1, "rule_")}))', flags)
+            except re.error:
+                self.separate.append((index, compiled.search))
+                continue
+            # every alternative is tried from the start of the name, so they are tried in file order, and the
+            # leading .*? lets a regex match anywhere in the name like search()
+            alternatives.append(f'(?P<rule{index}>.*?(?:{renumber_groups(key, groups + 1, f"rule{index}_")}))')
+            groups += 1 + compiled.groups
+        self.matcher = re.compile('|'.join(alternatives), flags) if alternatives else None
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.exact) + len(self.patterns)
+
+    def __getstate__(self):
+        return {'transforms': {**self.exact, **dict(self.patterns)}, 'case_sensitive': self.case_sensitive}
+
+    def __setstate__(self, state):
+        self.__init__(state['transforms'], state['case_sensitive'])
+
+    def match(self, column):
+        '''
+        Return the transform for a column, or None when no rule applies
+        '''
+        if column not in self.cache:
+            self.cache[column] = self.find(column)
+        return self.cache[column]
+
+    def find(self, column):
+        transform = self.exact.get(column if self.case_sensitive else column.lower())
+        if transform is not None:
+            return transform
+        index = len(self.patterns)
+        match = self.matcher.match(column) if self.matcher is not None else None
+        if match is not None:
+            index = int(match.lastgroup[len('rule'):])
+        for separate_index, search in self.separate:
+            if separate_index >= index:
+                break
+            if search(column):
+                index = separate_index
+                break
+        if index == len(self.patterns):
+            return None
+        transform = self.patterns[index][1]
+        return {key: value.replace('{column}', column) if isinstance(value, str) else value
+                for key, value in transform.items()}
@@ -0,0 +1,107 @@
+from .reserved_words import get_reserved_words
+
+
+class Column:
+    '''
+    One column of a base model as it moves through the transform stages: the name it is selected by in the
+    base model, the alias it gets, the SQL selecting it (None to select the name as-is) and its data type when known
+    '''
+    __slots__ = ('name', 'alias', 'expression', 'data_type')
+
+    def __init__(self, name, expression=None, data_type=''):
+        self.name = name
+        self.alias = name
+        self.expression = expression
+        self.data_type = data_type
+
+    def sql(self):
+        if self.expression is None:
+            return self.name if self.alias == self.name else f'{self.name} as {self.alias}'
+        return f'{self.expression} as {self.alias}'
+
+
+class Conventions:
+    '''
+    How the bq-transform and sf-transform conventions are written for a warehouse
+    '''
+
+    def __init__(self, dialect, timestamp_convert, integer_convert, quote, upper=False):
+        self.dialect = dialect
+        self.timestamp_convert = timestamp_convert
+        self.integer_convert = integer_convert
+        self.quote = quote
+        self.upper = upper
+
+    def quote_identifier(self, column):
+        return self.quote.format(column.upper() if self.upper else column)
+
+
+BIGQUERY = Conventions('bigquery', 'timestamp({})', 'cast({} as int64)', '`{}`')
+# unquoted names resolve to upper case in Snowflake, so quoted reserved names are upper cased to match
+SNOWFLAKE = Conventions('snowflake', '{}::timestamp', '{}::integer', '"{}"', upper=True)
+
+
+class TransformsStage:
+    '''
+    Rename and rewrite the columns matching the rules of a transforms .yml
+    '''
+
+    def __init__(self, rules):
+        self.rules = rules
+
+    def __call__(self, columns):
+        for column in columns:
+            transform = self.rules.match(column.alias)
+            if transform is None:
+                continue
+            column.expression = transform.get('sql', column.expression or column.name)
+            column.alias = transform['name']
+
+
+class ConventionsStage:
+    '''
+    Apply the warehouse conventions: lower case names, split column names into words, cast ids to integers and
+    dates to timestamps, and quote and alias reserved words. Every column gets an explicit alias.
+    '''
+
+    def __init__(self, conventions, case_sensitive=False, split_columns=False, id_as_int=False, convert_timestamp=False,
+                 alias_reserved=False, splitter=None):
+        self.conventions = conventions
+        self.case_sensitive = case_sensitive
+        self.split_columns = split_columns
+        self.id_as_int = id_as_int
+        self.convert_timestamp = convert_timestamp
+        self.reserved_words = get_reserved_words(conventions.dialect) if alias_reserved else frozenset()
+        self.splitter = splitter
+
+    def __call__(self, columns):
+        conventions = self.conventions
+        for column in columns:
+            alias = column.alias
+            aliased = column.expression is not None or alias != column.name
+            if column.expression is not None:
+                sql = column.expression
+            elif not self.case_sensitive and column.name[0] not in '"`':
+                sql = column.name.lower()
+            else:
+                sql = column.name
+            if self.split_columns and alias.strip('"`')[0] != '_':
+                alias = self.splitter.split(alias if aliased else sql)
+            # reserved words have to be quoted to be selected and cannot be bare aliases: order => `order` as order_
+            if sql.upper() in self.reserved_words:
+                sql = conventions.quote_identifier(sql)
+            if alias.upper() in self.reserved_words:
+                alias += '_'
+            # with a schema store, skip casts to the type a column already has
+            if self.id_as_int and '_id' in alias and 'INT' not in column.data_type:
+                sql = conventions.integer_convert.format(sql)
+            if self.convert_timestamp and not column.data_type.startswith('TIMESTAMP') and (
+                '_timestamp' in alias or
+                '_date' in alias or
+                '_at' in alias
+            ):
+                sql = conventions.timestamp_convert.format(sql)
+            column.expression = sql
+            column.alias = alias
+        if self.split_columns:
+            self.splitter.flush()
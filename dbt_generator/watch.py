@@ -0,0 +1,213 @@
+import os
+import sys
+import time
+import struct
+import select
+from .process_base_models import get_sql_files, load_transforms_file, ProcessBaseModelsWithTransforms
+
+
+# inotify events for a file written, renamed into place or removed; editors often save by renaming a temp file
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_DELETE = 0x200
+INOTIFY_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    '''
+    Report the files changed in some directories with Linux inotify, through ctypes
+    '''
+
+    def __init__(self, directories):
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.directories = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), INOTIFY_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f'Could not watch {directory}')
+            self.directories[wd] = directory
+
+    def read(self, timeout=None):
+        '''
+        Wait up to timeout seconds (forever for None) and return the paths changed since the last read
+        '''
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return set()
+        paths = set()
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if wd in self.directories and name:
+                paths.add(os.path.join(self.directories[wd], os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    '''
+    Report the files changed in some directories by comparing their mtime and size every interval seconds
+    '''
+
+    def __init__(self, directories, interval=0.5):
+        self.directories = directories
+        self.interval = interval
+        self.files = self.scan()
+
+    def scan(self):
+        files = {}
+        for directory in self.directories:
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return files
+
+    def read(self, timeout=None):
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+        files = self.scan()
+        paths = {path for path in files.keys() | self.files.keys() if files.get(path) != self.files.get(path)}
+        self.files = files
+        return paths
+
+    def close(self):
+        pass
+
+
+def get_watcher(directories, poll_interval=None):
+    '''
+    Return an inotify watcher on Linux, or a polling watcher elsewhere, when inotify is unavailable
+    or when a poll_interval is given
+    '''
+    directories = list(dict.fromkeys(directories))
+    if poll_interval is None and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError) as e:
+            print(f'inotify is not available ({e}), polling for changes instead')
+    return PollingWatcher(directories, poll_interval or 0.5)
+
+
+def wait_for_changes(watcher, debounce):
+    '''
+    Block until files change, then keep collecting changes until none arrive for debounce seconds,
+    so a burst of saves is handled once
+    '''
+    paths = set()
+    while not paths:
+        paths = watcher.read()
+    while True:
+        more = watcher.read(debounce)
+        if not more:
+            return paths
+        paths |= more
+
+
+class TransformWatch:
+    '''
+    State kept between changes by transform --watch: the compiled transforms and the parsed columns of every
+    model. A changed model is re-transformed on its own; a changed transforms file re-transforms only the
+    models with a column whose rule changed. bq-transform and sf-transform pass their processor class and
+    options, which apply the transforms before the warehouse conventions.
+    '''
+
+    def __init__(self, model_path, transforms_path, output_path, drop_metadata=True, case_sensitive=False,
+                 processor_class=ProcessBaseModelsWithTransforms, processor_kwargs=None):
+        self.model_path = os.path.abspath(model_path)
+        self.transforms_path = os.path.abspath(transforms_path)
+        self.output_path = output_path
+        self.drop_metadata = drop_metadata
+        self.case_sensitive = case_sensitive
+        self.processor_class = processor_class
+        self.processor_kwargs = dict(processor_kwargs or {}, drop_metadata=drop_metadata, case_sensitive=case_sensitive)
+        self.rules = load_transforms_file(transforms_path, case_sensitive)
+        # sql file => (processor holding the parsed model, its columns before transforms)
+        self.models = {}
+
+    def transform_model(self, sql_file):
+        processor, columns = self.models[sql_file]
+        processor.columns = list(columns)
+        processor.transforms = self.rules
+        processor.process_base_models(os.path.join(self.output_path, sql_file))
+
+    def update_model(self, sql_file):
+        '''
+        Parse and transform a model, returning whether it succeeded
+        '''
+        try:
+            kwargs = dict(self.processor_kwargs, transforms_file=self.transforms_path, transforms=self.rules)
+            processor = self.processor_class(sql_file=os.path.join(self.model_path, sql_file), **kwargs)
+            self.models[sql_file] = (processor, list(processor.columns))
+            self.transform_model(sql_file)
+        except Exception as e:
+            self.models.pop(sql_file, None)
+            print(f'Failed to process {sql_file}: {e}')
+            return False
+        return True
+
+    def update_rules(self, skip=()):
+        '''
+        Reload the transforms and re-transform the models whose columns now match a different rule
+        '''
+        try:
+            rules = load_transforms_file(self.transforms_path, self.case_sensitive)
+        except Exception as e:
+            print(f'Failed to load {self.transforms_path}, keeping the previous transforms: {e}')
+            return []
+        affected = [sql_file for sql_file, (_, columns) in self.models.items() if sql_file not in skip and
+                    any(self.rules.match(column) != rules.match(column) for column in columns)]
+        self.rules = rules
+        for sql_file in affected:
+            self.transform_model(sql_file)
+        return affected
+
+    def run_all(self):
+        return [sql_file for sql_file in sorted(get_sql_files(self.model_path)) if self.update_model(sql_file)]
+
+    def handle(self, paths):
+        '''
+        Re-transform what changed paths affect and return the names of the models written
+        '''
+        models = sorted({os.path.basename(path) for path in paths
+                         if os.path.dirname(os.path.abspath(path)) == self.model_path and path.endswith('.sql')})
+        done = []
+        if self.transforms_path in {os.path.abspath(path) for path in paths}:
+            done += self.update_rules(skip=models)
+        for sql_file in models:
+            if os.path.exists(os.path.join(self.model_path, sql_file)):
+                if self.update_model(sql_file):
+                    done.append(sql_file)
+            elif self.models.pop(sql_file, None) is not None:
+                print(f'{sql_file} was removed')
+        return done
+
+    def watch(self, watcher, debounce=0.1):
+        print(f'Watching {self.model_path} and {self.transforms_path} for changes, press Ctrl+C to stop')
+        try:
+            while True:
+                paths = wait_for_changes(watcher, debounce)
+                start = time.perf_counter()
+                done = self.handle(paths)
+                if done:
+                    print(f'Transformed {len(done)} models in {(time.perf_counter() - start) * 1000:.0f} ms')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            watcher.close()
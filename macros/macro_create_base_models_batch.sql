@@ -0,0 +1,130 @@
+{# Renders the base models for many tables of one source from a single information_schema query. The models are printed as one JSON object (table name => sql) between sentinel lines so dbt-generator can split them into files. #}
+
+{% macro macro_create_base_models_batch(source_name, table_names, case_sensitive_cols=False, leading_commas=False, materialized='', use_snapshot=False) %}
+    {%- set columns_by_table = get_base_model_columns(source_name, table_names) -%}
+    {%- set models = {} -%}
+    {%- for table_name, columns in columns_by_table.items() -%}
+        {%- set column_names = columns | map(attribute=0) | list -%}
+        {%- do models.update({table_name: macro_render_base_model(source_name, table_name, column_names, case_sensitive_cols, leading_commas, materialized, use_snapshot)}) -%}
+    {%- endfor -%}
+
+    {%- if execute -%}
+        {{ print('-- dbt-generator batch begin --') }}
+        {{ print(tojson(models)) }}
+        {{ print('-- dbt-generator batch end --') }}
+    {%- endif -%}
+{% endmacro %}
+
+{# Prints the columns and data types of many tables of one source as JSON (table name => [[column, data_type]]), used to fingerprint tables for the model cache. #}
+
+{% macro macro_get_base_model_columns(source_name, table_names) %}
+    {%- set columns_by_table = get_base_model_columns(source_name, table_names) -%}
+    {%- if execute -%}
+        {{ print('-- dbt-generator batch begin --') }}
+        {{ print(tojson(columns_by_table)) }}
+        {{ print('-- dbt-generator batch end --') }}
+    {%- endif -%}
+{% endmacro %}
+
+{% macro get_base_model_columns(source_name, table_names) %}
+    {%- set relations = {} -%}
+    {%- for table_name in table_names -%}
+        {%- do relations.update({table_name: source(source_name, table_name)}) -%}
+    {%- endfor -%}
+
+    {%- set columns_by_key = {} -%}
+    {%- if execute and relations -%}
+        {%- set results = run_query(adapter.dispatch('base_model_columns_query', 'dbt_generator')(relations.values() | list)) -%}
+        {%- for row in results.rows -%}
+            {%- set key = (row[0] ~ '.' ~ row[1]) | upper -%}
+            {%- do columns_by_key.setdefault(key, []).append([row[2], row[4]]) -%}
+        {%- endfor -%}
+    {%- endif -%}
+
+    {%- set columns_by_table = {} -%}
+    {%- for table_name, relation in relations.items() -%}
+        {%- set key = (relation.schema ~ '.' ~ relation.identifier) | upper -%}
+        {%- if key in columns_by_key -%}
+            {%- do columns_by_table.update({table_name: columns_by_key[key]}) -%}
+        {%- endif -%}
+    {%- endfor -%}
+    {{ return(columns_by_table) }}
+{% endmacro %}
+
+{% macro default__base_model_columns_query(relations) %}
+    {%- for database, database_relations in relations | groupby('database') %}
+    {% if not loop.first %}union all{% endif %}
+    select table_schema, table_name, column_name, ordinal_position, data_type
+    from {{ database }}.information_schema.columns
+    where (
+        {%- for relation in database_relations %}
+        {% if not loop.first %}or {% endif %}(upper(table_schema) = upper('{{ relation.schema }}') and upper(table_name) = upper('{{ relation.identifier }}'))
+        {%- endfor %}
+    )
+    {%- endfor %}
+    order by 1, 2, 4
+{% endmacro %}
+
+{% macro bigquery__base_model_columns_query(relations) %}
+    {%- for dataset, dataset_relations in relations | groupby(attribute='schema') %}
+    {% if not loop.first %}union all{% endif %}
+    select table_schema, table_name, column_name, ordinal_position, data_type
+    from `{{ dataset_relations[0].database }}`.`{{ dataset }}`.INFORMATION_SCHEMA.COLUMNS
+    where table_name in (
+        {%- for relation in dataset_relations %}'{{ relation.identifier }}'{% if not loop.last %}, {% endif %}{% endfor -%}
+    )
+    {%- endfor %}
+    order by 1, 2, 4
+{% endmacro %}
+
+{% macro macro_render_base_model(source_name, table_name, column_names, case_sensitive_cols=False, leading_commas=False, materialized='', use_snapshot=False) %}
+    {%- set rendered_columns = [] -%}
+    {%- for column in column_names -%}
+        {%- if not case_sensitive_cols -%}
+            {%- do rendered_columns.append(column | lower) -%}
+        {%- elif target.type == 'bigquery' -%}
+            {%- do rendered_columns.append(column) -%}
+        {%- else -%}
+            {%- do rendered_columns.append('"' ~ column ~ '"') -%}
+        {%- endif -%}
+    {%- endfor -%}
+
+    {%- if use_snapshot -%}
+        {%- set source_sql = "{{ ref('snp_" ~ (source_name | lower) ~ "_" ~ (table_name | lower) ~ "') }}" -%}
+    {%- else -%}
+        {%- set source_sql = "{{ source('" ~ source_name ~ "', '" ~ table_name ~ "') }}" -%}
+    {%- endif -%}
+
+    {%- set base_model_sql -%}
+{%- if materialized -%}
+{{ "{{ config(materialized='" ~ materialized ~ "') }}" }}
+
+{% endif -%}
+with source as (
+
+    select * from {{ source_sql }}
+
+),
+
+renamed as (
+
+    select
+{%- if leading_commas %}
+{%- for column in rendered_columns %}
+        {{ ', ' if not loop.first }}{{ column }}
+{%- endfor %}
+{%- else %}
+{%- for column in rendered_columns %}
+        {{ column }}{{ ',' if not loop.last }}
+{%- endfor %}
+{%- endif %}
+
+    from source
+
+)
+
+select * from renamed
+{% endset -%}
+
+    {{ return(base_model_sql) }}
+{% endmacro %}
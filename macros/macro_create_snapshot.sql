@@ -1,13 +1,18 @@
-{% macro macro_create_snapshot(snapshot_name, dbt_source, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key) %}
+{# unique_key_reserved: whether the unique key is a reserved word, checked by dbt-generator in Python. When it is not passed, the sql_reserved_words seed is queried. #}
+
+{% macro macro_create_snapshot(snapshot_name, dbt_source, table_name, unique_key, snapshot_strategy, updated_at, check_cols, invalidate_hard_deletes, composite_key, unique_key_reserved=none) %}
 
     {%- if composite_key == 1 %}
         {% set comp_key = unique_key|replace(";"," ||'-'|| ") %}
         {% set unique_key = 'dbt_composite_key' %}
     {% endif -%}
 
-    {%- set reserved_words = dbt_utils.get_column_values(table=ref('sql_reserved_words'), column='reserved_word') -%}
     {%- set unique_key_upper = unique_key|upper %}
-    {%- if unique_key_upper in reserved_words -%}
+    {%- if unique_key_reserved is none -%}
+        {%- set reserved_words = dbt_utils.get_column_values(table=ref('sql_reserved_words'), column='reserved_word') -%}
+        {%- set unique_key_reserved = unique_key_upper in reserved_words -%}
+    {%- endif -%}
+    {%- if unique_key_reserved -%}
         {% set reserved_word_flag = 1 %} {% set new_unique_key = unique_key ~ "_" %}
     {%- endif -%}
 
@@ -44,5 +49,11 @@
 {% raw %}{% endsnapshot %}{% endraw %}
     {% endset %}
 
-    {% if execute %} {{ log(snp_sql, info=True) }} {% do return(snp_sql) %} {% endif %}
+    {% if execute %}
+        {{ log(snp_sql, info=True) }}
+        {{ print('-- dbt-generator batch begin --') }}
+        {{ print(tojson(snp_sql)) }}
+        {{ print('-- dbt-generator batch end --') }}
+        {% do return(snp_sql) %}
+    {% endif %}
 {% endmacro %}
@@ -43,6 +43,10 @@
     {%- endset -%}
 
     {%- if execute %}
-        {{ log(snp_sql, info=True) }} {% do return(snp_sql) %}
+        {{ log(snp_sql, info=True) }}
+        {{ print('-- dbt-generator batch begin --') }}
+        {{ print(tojson(snp_sql)) }}
+        {{ print('-- dbt-generator batch end --') }}
+        {% do return(snp_sql) %}
     {% endif -%}
 {% endmacro %}
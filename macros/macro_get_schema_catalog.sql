@@ -0,0 +1,86 @@
+{# Prints the tables of one schema with their last_altered time and columns as JSON (table name => {"last_altered": ..., "columns": [[column, data_type]]}), read by dbt-generator into its local schema store. With changed_since, the columns of tables not altered since then are left out ("columns": null) where the warehouse records last_altered. #}
+
+{% macro macro_get_schema_catalog(database_name, schema_name, changed_since='') %}
+    {%- set catalog = {} -%}
+    {%- if execute -%}
+        {%- set results = run_query(adapter.dispatch('schema_catalog_query', 'dbt_generator')(database_name, schema_name, changed_since)) -%}
+        {%- for row in results.rows -%}
+            {%- set table = catalog.setdefault(row[0], {'last_altered': none if row[4] is none else row[4] | string, 'columns': none}) -%}
+            {%- if row[1] is not none -%}
+                {%- if table['columns'] is none -%}
+                    {%- do table.update({'columns': []}) -%}
+                {%- endif -%}
+                {%- do table['columns'].append([row[1], row[3]]) -%}
+            {%- endif -%}
+        {%- endfor -%}
+        {{ print('-- dbt-generator batch begin --') }}
+        {{ print(tojson(catalog)) }}
+        {{ print('-- dbt-generator batch end --') }}
+    {%- endif -%}
+{% endmacro %}
+
+{% macro default__schema_catalog_query(database_name, schema_name, changed_since) %}
+    select c.table_name, c.column_name, c.ordinal_position, c.data_type, null as last_altered
+    from {{ database_name }}.information_schema.columns c
+    where upper(c.table_schema) = upper('{{ schema_name }}')
+    order by 1, 3
+{% endmacro %}
+
+{% macro snowflake__schema_catalog_query(database_name, schema_name, changed_since) %}
+    select t.table_name, c.column_name, c.ordinal_position, c.data_type, t.last_altered
+    from {{ database_name }}.information_schema.tables t
+    left join {{ database_name }}.information_schema.columns c
+        on c.table_schema = t.table_schema
+        and c.table_name = t.table_name
+        {%- if changed_since %}
+        and t.last_altered > '{{ changed_since }}'::timestamp_ltz
+        {%- endif %}
+    where upper(t.table_schema) = upper('{{ schema_name }}')
+    order by 1, 3
+{% endmacro %}
+
+{% macro bigquery__schema_catalog_query(database_name, schema_name, changed_since) %}
+    select table_name, column_name, ordinal_position, data_type, cast(null as timestamp) as last_altered
+    from `{{ database_name }}`.`{{ schema_name }}`.INFORMATION_SCHEMA.COLUMNS
+    order by 1, 3
+{% endmacro %}
+
+{# Prints the columns of many schemas of a database as JSON (schema => table => [[column, data_type]]) from one information_schema query, used by source-yaml to write a source .yml per schema. #}
+
+{% macro macro_get_schemas_columns(database_name, schema_names=[], schema_pattern='') %}
+    {%- set schemas = {} -%}
+    {%- if execute -%}
+        {%- set results = run_query(adapter.dispatch('schemas_columns_query', 'dbt_generator')(database_name, schema_names, schema_pattern)) -%}
+        {%- for row in results.rows -%}
+            {%- do schemas.setdefault(row[0], {}).setdefault(row[1], []).append([row[2], row[4]]) -%}
+        {%- endfor -%}
+        {{ print('-- dbt-generator batch begin --') }}
+        {{ print(tojson(schemas)) }}
+        {{ print('-- dbt-generator batch end --') }}
+    {%- endif -%}
+{% endmacro %}
+
+{% macro default__schemas_columns_query(database_name, schema_names, schema_pattern) %}
+    select table_schema, table_name, column_name, ordinal_position, data_type
+    from {{ database_name }}.information_schema.columns
+    {%- if schema_names %}
+    where upper(table_schema) in ({% for schema_name in schema_names %}upper('{{ schema_name }}'){% if not loop.last %}, {% endif %}{% endfor %})
+    {%- elif schema_pattern %}
+    where upper(table_schema) like upper('{{ schema_pattern }}')
+    {%- else %}
+    where upper(table_schema) != 'INFORMATION_SCHEMA'
+    {%- endif %}
+    order by 1, 2, 4
+{% endmacro %}
+
+{% macro bigquery__schemas_columns_query(database_name, schema_names, schema_pattern) %}
+    {%- if not schema_names -%}
+        {{ exceptions.raise_compiler_error('List the datasets to read on BigQuery, schema patterns are not supported') }}
+    {%- endif -%}
+    {%- for schema_name in schema_names %}
+    {% if not loop.first %}union all{% endif %}
+    select table_schema, table_name, column_name, ordinal_position, data_type
+    from `{{ database_name }}`.`{{ schema_name }}`.INFORMATION_SCHEMA.COLUMNS
+    {%- endfor %}
+    order by 1, 2, 4
+{% endmacro %}
@@ -1,20 +1,27 @@
-{# This macro collects data from a query and inserts it into a list. See https://stackoverflow.com/questions/74898764/iterate-over-all-rows-and-columns-in-dbt-jinja #}
+{# Prints the rows of the dbt_snapshot_seed seed, for one system_name or all of them, as a JSON list of {column: value} between the dbt-generator batch sentinels. Values are printed as strings (or null), so numbers, decimals and dates from any warehouse serialize the same way. #}
 
 {% macro macro_snapshot_list(source_system) %}
     {% set query_to_process %}
         select *
         from {{ ref( 'dbt_snapshot_seed' ) }}
+        {% if source_system %}
         where system_name = '{{source_system}}'
+        {% endif %}
     {% endset %}
 
-    {% set results = dbt_utils.get_query_results_as_dict(query_to_process) %}
-
-    {% if execute %}
-    {% set results_list = results.rows %}
-    {% else %}
-    {% set results_list = [] %}
-    {% endif %}
-
-    {{ print(results) }}
-
-{% endmacro %}
\ No newline at end of file
+    {%- if execute -%}
+        {%- set results = run_query(query_to_process) -%}
+        {%- set rows = [] -%}
+        {%- for row in results.rows -%}
+            {%- set values = {} -%}
+            {%- for column in results.column_names -%}
+                {%- set value = row[loop.index0] -%}
+                {%- do values.update({column: none if value is none else value | string}) -%}
+            {%- endfor -%}
+            {%- do rows.append(values) -%}
+        {%- endfor -%}
+        {{ print('-- dbt-generator batch begin --') }}
+        {{ print(tojson(rows)) }}
+        {{ print('-- dbt-generator batch end --') }}
+    {%- endif -%}
+{% endmacro %}
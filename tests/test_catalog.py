@@ -0,0 +1,61 @@
+import os
+import filecmp
+from pathlib import Path
+from click.testing import CliRunner
+from dbt_generator.catalog import Catalog
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator.generate_base_models import render_base_model
+
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'test_data'
+CATALOG_FILE = os.path.join(TEST_DATA_DIR, 'test_catalog.json')
+
+
+def test_catalog_index():
+    catalog = Catalog(CATALOG_FILE)
+    assert set(catalog.tables) == {('GOOGLE_ADS', 'ACCOUNTS'), ('GOOGLE_ADS', 'AD_GROUPS'), ('GOOGLE_ADS_2', 'ACCOUNTS')}
+    assert catalog.get_columns('GOOGLE_ADS', 'AD_GROUPS') == [('ID', 'NUMBER'), ('campaignId', 'NUMBER'), ('Name', 'TEXT')]
+    assert catalog.get_columns('GOOGLE_ADS', 'MISSING') is None
+
+
+def test_catalog_source_filter():
+    catalog = Catalog(CATALOG_FILE, ['GOOGLE_ADS_2'])
+    assert list(catalog.tables) == [('GOOGLE_ADS_2', 'ACCOUNTS')]
+
+
+def test_render_base_model():
+    columns = [name for name, _ in Catalog(CATALOG_FILE).get_columns('GOOGLE_ADS', 'ACCOUNTS')]
+    query = render_base_model('ACCOUNTS', 'GOOGLE_ADS', columns, False, False, '', False)
+    assert query == open(os.path.join(TEST_DATA_DIR, 'test_sql_file.sql')).read()
+
+
+def test_render_base_model_options():
+    query = render_base_model('AD_GROUPS', 'GOOGLE_ADS', ['ID', 'campaignId'], True, True, 'table', True)
+    assert query.startswith("{{ config(materialized='table') }}\n\nwith source as (\n\n"
+                            "    select * from {{ ref('snp_google_ads_ad_groups') }}")
+    assert '    select\n        "ID"\n        , "campaignId"\n\n    from source' in query
+    query = render_base_model('AD_GROUPS', 'GOOGLE_ADS', ['ID', 'campaignId'], True, False, '', False, 'bigquery')
+    assert '    select\n        ID,\n        campaignId\n\n    from source' in query
+
+
+def test_generate_from_catalog(tmp_path):
+    result = CliRunner().invoke(dbt_generator, [
+        'generate', '-s', os.path.join(TEST_DATA_DIR, 'test_sources.yml'), '-o', str(tmp_path),
+        '--from-catalog', CATALOG_FILE])
+    assert result.exit_code == 0, result.output
+    assert sorted(os.listdir(tmp_path)) == ['ACCOUNTS.sql', 'AD_GROUPS.sql']
+    assert (tmp_path / 'AD_GROUPS.sql').read_text().count('campaignid') == 1
+
+
+def test_generate_and_transform_in_memory(tmp_path):
+    args = ['generate', '-s', os.path.join(TEST_DATA_DIR, 'test_sources.yml'), '--from-catalog', CATALOG_FILE, '-m', 'ACCOUNTS']
+    result = CliRunner().invoke(dbt_generator, args + [
+        '-o', str(tmp_path / 'bq'), '--dialect', 'bq', '--drop-metadata', 'False',
+        '--split-columns', 'True', '--convert-timestamp', 'True', '--id-as-int', 'True'])
+    assert result.exit_code == 0, result.output
+    assert filecmp.cmp(TEST_DATA_DIR / 'expected' / 'ProcessBaseModelsBQ.sql', tmp_path / 'bq' / 'ACCOUNTS.sql', shallow=False)
+
+    result = CliRunner().invoke(dbt_generator, args + [
+        '-o', str(tmp_path / 'transformed'), '--transforms', os.path.join(TEST_DATA_DIR, 'test_transform.yml')])
+    assert result.exit_code == 0, result.output
+    assert filecmp.cmp(TEST_DATA_DIR / 'expected' / 'transformed__drop_metadata.sql', tmp_path / 'transformed' / 'ACCOUNTS.sql',
+                       shallow=False)
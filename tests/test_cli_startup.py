@@ -0,0 +1,33 @@
+import sys
+import time
+import subprocess
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+# generous enough for a slow CI box; a regression that imports wordninja, pandas or dbt blows well past it
+STARTUP_BUDGET_SECONDS = 1.0
+HEAVY_MODULES = ['yaml', 'wordninja', 'pandas', 'jinja2', 'ijson', 'dbt']
+
+
+def run_python(code):
+    return subprocess.run([sys.executable, '-c', code], cwd=PACKAGE_DIR, capture_output=True, text=True, check=True)
+
+
+def test_cli_import_skips_heavy_modules():
+    result = run_python(
+        'import sys\n'
+        'from click.testing import CliRunner\n'
+        'from dbt_generator.dbt_generator import dbt_generator\n'
+        'CliRunner().invoke(dbt_generator, ["transform", "--help"])\n'
+        f'print([module for module in {HEAVY_MODULES!r} if module in sys.modules])\n')
+    assert result.stdout.strip() == '[]'
+
+
+def test_cli_help_startup_budget():
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'dbt_generator.dbt_generator', '--help'], cwd=PACKAGE_DIR,
+                       capture_output=True, check=True)
+        timings.append(time.perf_counter() - start)
+    assert min(timings) < STARTUP_BUDGET_SECONDS, f'dbt-generator --help took {min(timings):.2f}s'
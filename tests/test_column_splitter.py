@@ -0,0 +1,28 @@
+from unittest.mock import patch
+from dbt_generator.column_splitter import ColumnSplitter
+
+
+def test_split():
+    splitter = ColumnSplitter()
+    assert splitter.split('currencycode') == 'currency_code'
+    assert splitter.split('currencycode') == 'currency_code'
+    assert splitter.split.cache_info().hits == 1
+
+
+def test_domain_words(tmp_path):
+    words_file = tmp_path / 'words.txt'
+    words_file.write_text('netsuite\ntranid\nsbqq\n')
+    splitter = ColumnSplitter(str(words_file))
+    assert splitter.split('netsuitetranid') == 'netsuite_tranid'
+    assert splitter.split('sbqqquotelineid') == 'sbqq_quote_line_id'
+
+
+def test_split_cache(tmp_path):
+    cache_path = str(tmp_path / 'splits.db')
+    splitter = ColumnSplitter(cache_path=cache_path)
+    assert splitter.split('customerid') == 'customer_id'
+    splitter.flush()
+
+    splitter = ColumnSplitter(cache_path=cache_path)
+    with patch.object(splitter.model, 'split', side_effect=AssertionError('not cached')):
+        assert splitter.split('customerid') == 'customer_id'
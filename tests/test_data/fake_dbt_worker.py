@@ -0,0 +1,23 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from dbt_generator.dbt_worker import serve  # noqa: E402
+
+CRASH_MARKER = sys.argv[1]
+
+
+def handler(macro_name, args):
+    if macro_name == 'sleep':
+        time.sleep(float(args))
+    if macro_name == 'crash' and not os.path.exists(CRASH_MARKER):
+        open(CRASH_MARKER, 'w').close()
+        os._exit(1)
+    if macro_name == 'fail':
+        return 'compilation error', 'macro failed'
+    return f'{macro_name} {args}', None
+
+
+serve(handler, sys.stdin, sys.stdout)
@@ -0,0 +1,88 @@
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from click.testing import CliRunner
+from concurrent.futures import ThreadPoolExecutor
+from dbt_generator import generate_base_models
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator.dbt_worker import DbtWorker, DbtWorkerPool
+from dbt_generator.generate_base_models import format_args, run_operation, set_dbt_worker
+
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'test_data'
+
+
+@pytest.fixture
+def worker(tmp_path):
+    command = [sys.executable, str(TEST_DATA_DIR / 'fake_dbt_worker.py'), str(tmp_path / 'crashed')]
+    worker = DbtWorker(command=command, timeout=5)
+    yield worker
+    worker.close()
+
+
+def test_format_args():
+    args = format_args({'source_name': 'GOOGLE_ADS', 'case_sensitive_cols': False, 'composite_key': 1})
+    assert args == '{"source_name": "GOOGLE_ADS", "case_sensitive_cols": False, "composite_key": 1}'
+
+
+def test_worker_reuses_process(worker):
+    assert worker.run_operation('echo', 'a') == 'echo a'
+    pid = worker.process.pid
+    assert worker.run_operation('echo', 'b') == 'echo b'
+    assert worker.process.pid == pid
+
+
+def test_worker_restarts_after_crash(worker):
+    worker.run_operation('echo', 'a')
+    pid = worker.process.pid
+    assert worker.run_operation('crash', 'a') == 'crash a'
+    assert worker.process.pid != pid
+
+
+def test_worker_timeout(worker):
+    with pytest.raises(subprocess.TimeoutExpired):
+        worker.run_operation('sleep', '10', timeout=0.5)
+    assert worker.run_operation('echo', 'a') == 'echo a'
+
+
+
+def test_worker_startup_timeout():
+    worker = DbtWorker(command=[sys.executable, '-c', 'import time; time.sleep(10)'], timeout=0.5)
+    with pytest.raises(subprocess.TimeoutExpired):
+        worker.run_operation('echo', 'a')
+    assert worker.process is None
+
+def test_worker_error(worker):
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        worker.run_operation('fail', 'a')
+    assert error.value.output == 'compilation error'
+
+
+def test_run_operation_uses_worker(worker):
+    set_dbt_worker(worker)
+    try:
+        assert run_operation('echo', {'table_name': 'ACCOUNTS'}) == 'echo {"table_name": "ACCOUNTS"}'
+    finally:
+        set_dbt_worker(None)
+
+
+
+def test_warm_worker_reset_after_command(tmp_path):
+    catalog = {'ACCOUNTS': {'last_altered': '2024-01-01 00:00:00', 'columns': [['ID', 'NUMBER']]}}
+    with patch('dbt_generator.generate_base_models.get_schema_catalog', return_value=catalog):
+        result = CliRunner().invoke(dbt_generator, ['--warm-worker', 'True', 'drift', '-d', 'RAW', '-s', 'GOOGLE_ADS',
+                                                    '--store', str(tmp_path / 'schema.db')])
+    assert result.exit_code == 0, result.output
+    assert generate_base_models.dbt_worker is None
+
+def test_worker_pool_grows_with_concurrency(tmp_path):
+    command = [sys.executable, str(TEST_DATA_DIR / 'fake_dbt_worker.py'), str(tmp_path / 'crashed')]
+    pool = DbtWorkerPool(command=command, timeout=5)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            outputs = list(executor.map(lambda args: pool.run_operation('sleep', args), ['0.5', '0.5']))
+        assert outputs == ['sleep 0.5', 'sleep 0.5']
+        assert len(pool.workers) == 2
+    finally:
+        pool.close()
@@ -1,6 +1,12 @@
 import os
+import json
+import pytest
 from pathlib import Path
-from dbt_generator.generate_base_models import generate_base_model, get_base_tables_and_source
+from unittest.mock import patch
+from click.testing import CliRunner
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator.generate_base_models import generate_base_model, get_base_tables_and_source, \
+    generate_base_models_batch, extract_batch_payload, select_sources, BATCH_BEGIN, BATCH_END
 
 TEST_DATA_DIR = Path(__file__).resolve().parent / 'test_data'
 TABLE_NAMES = ['ACCOUNTS', 'AD_GROUPS']
@@ -16,8 +22,95 @@ def test_get_base_tables_and_source():
     assert source_name == SOURCE_NAMES[1]
 
 
-def test_generate_base_model():
-    pass
+@pytest.mark.skipif(os.name == 'nt', reason='the fake dbt is a shell script')
+def test_generate_base_model(tmp_path, monkeypatch):
+    package_dir = Path(__file__).resolve().parent.parent
+    monkeypatch.syspath_prepend(str(package_dir / 'benchmarks'))
+    import fake_dbt
+    from synthetic import synthetic_columns
+    monkeypatch.setenv('PATH', fake_dbt.install(str(tmp_path / 'bin')) + os.pathsep + os.environ['PATH'])
+    monkeypatch.setenv('PYTHONPATH', str(package_dir))
+    monkeypatch.setenv('FAKE_DBT_COLUMNS', '5')
+    monkeypatch.chdir(tmp_path)
+
+    model = generate_base_model('ACCOUNTS', 'GOOGLE_ADS', False, False, '', False)
+    assert model.startswith('with source as')
+    assert "{{ source('GOOGLE_ADS', 'ACCOUNTS') }}" in model
+    for column, _ in synthetic_columns('ACCOUNTS', 5):
+        assert column.lower() in model
+    assert 'Running with dbt' not in model
+
+
+def write_sources(path):
+    (path / 'models' / 'ads').mkdir(parents=True)
+    (path / 'models' / 'sources.yml').write_text(open(os.path.join(TEST_DATA_DIR, 'test_sources.yml')).read())
+    (path / 'models' / 'ads' / 'more_sources.yml').write_text(
+        'version: 2\n\nsources:\n  - name: GOOGLE_ADS\n    tables:\n    - name: ACCOUNTS\n    - name: CAMPAIGNS\n')
+    (path / 'models' / 'ads' / 'schema.yml').write_text('version: 2\n\nmodels:\n  - name: accounts\n')
+
+
+def test_select_sources(tmp_path):
+    write_sources(tmp_path)
+    sources = select_sources(str(tmp_path / 'models'))
+    assert [(source['name'], tables) for source, tables in sources] == [
+        ('GOOGLE_ADS', ['ACCOUNTS', 'CAMPAIGNS', 'AD_GROUPS']), ('GOOGLE_ADS_2', TABLE_NAMES)]
+    sources = select_sources(str(tmp_path / 'models' / '**' / '*.yml'), ['GOOGLE_ADS'], ['A*'])
+    assert [(source['name'], tables) for source, tables in sources] == [('GOOGLE_ADS', ['ACCOUNTS', 'AD_GROUPS'])]
+
+
+def test_generate_all_sources(tmp_path):
+    write_sources(tmp_path)
+    with patch('dbt_generator.generate_base_models.generate_base_model', return_value='select 1') as generate:
+        result = CliRunner().invoke(dbt_generator, ['generate', '-s', str(tmp_path / 'models'), '-o', str(tmp_path / 'staging'),
+                                                    '--table', 'ACCOUNTS', '-j', '2'])
+    assert result.exit_code == 0, result.output
+    assert generate.call_count == 2
+    assert sorted(os.listdir(tmp_path / 'staging')) == ['google_ads', 'google_ads_2']
+    assert os.listdir(tmp_path / 'staging' / 'google_ads_2') == ['ACCOUNTS.sql']
+
+
+def test_extract_batch_payload():
+    sql = open(os.path.join(TEST_DATA_DIR, 'test_sql_file.sql')).read()
+    output = '\n'.join(['Running with dbt', BATCH_BEGIN, json.dumps({'ACCOUNTS': sql}), BATCH_END, 'Done'])
+    assert extract_batch_payload(output) == {'ACCOUNTS': sql}
+    with pytest.raises(Exception):
+        extract_batch_payload('Running with dbt\nselect * from renamed')
+
+
+def test_generate_base_models_batch():
+    output = '\n'.join([BATCH_BEGIN, json.dumps({'ACCOUNTS': 'select 1'}), BATCH_END])
+    with patch('dbt_generator.generate_base_models.run_operation', return_value=output) as run_operation:
+        models = generate_base_models_batch(TABLE_NAMES, SOURCE_NAMES[0], False, False, '', False)
+    assert models == {'ACCOUNTS': 'select 1'}
+    macro_name, args = run_operation.call_args[0]
+    assert macro_name == 'macro_create_base_models_batch'
+    assert args['table_names'] == TABLE_NAMES
+
+
+def test_generate_batch_fails_for_missing_tables(tmp_path):
+    output = '\n'.join([BATCH_BEGIN, json.dumps({'ACCOUNTS': 'select 1'}), BATCH_END])
+    with patch('dbt_generator.generate_base_models.run_operation', return_value=output):
+        result = CliRunner().invoke(dbt_generator, [
+            'generate', '-s', os.path.join(TEST_DATA_DIR, 'test_sources.yml'), '-o', str(tmp_path), '--batch', 'True'])
+    assert result.exit_code == 1
+    assert 'No columns found in source GOOGLE_ADS for tables: AD_GROUPS' in result.output
+    assert os.listdir(tmp_path) == ['ACCOUNTS.sql']
+
+
+def test_source_yaml_for_many_schemas(tmp_path):
+    schemas = {
+        'GOOGLE_ADS': {'ACCOUNTS': [('ID', 'NUMBER')], 'ACCOUNTS_HISTORY': [('ID', 'NUMBER')], 'AD_GROUPS': [('ID', 'NUMBER')]},
+        'BING_ADS': {'CAMPAIGNS': [('ID', 'NUMBER')]},
+    }
+    with patch('dbt_generator.generate_base_models.get_schemas_columns', return_value=schemas) as get_schemas_columns:
+        result = CliRunner().invoke(dbt_generator, [
+            'source-yaml', '-o', str(tmp_path), '--database_name', 'RAW', '--schemas', 'GOOGLE_ADS, BING_ADS',
+            '--table_names', 'ACCOUNTS,ACCOUNTS_HISTORY,AD_GROUPS', '--exclude', '%_HISTORY'])
+    assert result.exit_code == 0, result.output
+    get_schemas_columns.assert_called_once_with('RAW', ['GOOGLE_ADS', 'BING_ADS'], '')
+    assert os.listdir(tmp_path) == ['GOOGLE_ADS.yml']
+    assert (tmp_path / 'GOOGLE_ADS.yml').read_text() == (
+        'version: 2\n\nsources:\n  - name: google_ads\n    tables:\n      - name: accounts\n      - name: ad_groups\n')
 
 ls = ['a','b']
 list(map(str.upper, ls))
\ No newline at end of file
@@ -0,0 +1,61 @@
+import time
+import subprocess
+from dbt_generator.job_pool import run_jobs, summarize_failures
+from dbt_generator.dbt_worker import DbtWorkerError
+
+
+def make_task(name, delay):
+    def task():
+        time.sleep(delay)
+        print(f'generated {name}')
+        return name
+    return task
+
+
+def test_run_jobs_keeps_task_order(capsys):
+    tasks = [(name, make_task(name, delay)) for name, delay in [('a', 0.3), ('b', 0.1), ('c', 0.2), ('d', 0)]]
+    results = run_jobs(tasks, jobs=4)
+    assert [result.result for result in results] == ['a', 'b', 'c', 'd']
+    assert capsys.readouterr().out == 'generated a\ngenerated b\ngenerated c\ngenerated d\n'
+
+
+def test_run_jobs_retries_transient_errors():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise subprocess.CalledProcessError(1, 'dbt run-operation')
+        return 'ok'
+
+    results = run_jobs([('flaky', flaky)], retries=2, backoff=0)
+    assert results[0].result == 'ok'
+    assert len(attempts) == 3
+
+
+def test_run_jobs_only_retries_dbt_errors():
+    attempts = {'worker': 0, 'bug': 0}
+
+    def crashed_worker():
+        attempts['worker'] += 1
+        raise DbtWorkerError('dbt worker crashed while running macro')
+
+    def bug():
+        attempts['bug'] += 1
+        raise RuntimeError('programming error')
+
+    run_jobs([('worker', crashed_worker), ('bug', bug)], retries=2, backoff=0)
+    assert attempts == {'worker': 3, 'bug': 1}
+
+
+def test_run_jobs_reports_failures():
+    def broken():
+        raise subprocess.CalledProcessError(1, 'dbt run-operation')
+
+    results = run_jobs([('a', make_task('a', 0)), ('b', broken)], jobs=2, retries=1, backoff=0)
+    assert results[0].error is None
+    assert isinstance(results[1].error, subprocess.CalledProcessError)
+    summary = summarize_failures(results)
+    assert summary.startswith('1 of 2 jobs failed:')
+    assert 'b:' in summary
+    assert summarize_failures(results[:1]) == ''
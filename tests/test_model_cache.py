@@ -0,0 +1,69 @@
+import os
+import time
+import hashlib
+import inspect
+from pathlib import Path
+from unittest.mock import patch
+from click.testing import CliRunner
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator import generate_base_models
+from dbt_generator.model_cache import ModelCache, BASE_MODEL_VERSION
+
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'test_data'
+SOURCES_FILE = os.path.join(TEST_DATA_DIR, 'test_sources.yml')
+COLUMNS = [('ID', 'NUMBER'), ('NAME', 'TEXT')]
+MACROS_DIR = Path(__file__).resolve().parents[1] / 'macros'
+# the hash of the base model renderers at each BASE_MODEL_VERSION
+RENDERER_HASHES = {1: '8b48cee999bb3e4157ccc5d50ecf13da8ae17b9c11f3fe6e2b6a7aea7f831dc9'}
+
+
+def test_fingerprint():
+    cache = ModelCache()
+    key = cache.fingerprint('GOOGLE_ADS', 'ACCOUNTS', COLUMNS, {'leading_commas': False})
+    assert key == cache.fingerprint('GOOGLE_ADS', 'ACCOUNTS', list(COLUMNS), {'leading_commas': False})
+    assert key != cache.fingerprint('GOOGLE_ADS', 'ACCOUNTS', COLUMNS + [('EMAIL', 'TEXT')], {'leading_commas': False})
+    assert key != cache.fingerprint('GOOGLE_ADS', 'ACCOUNTS', COLUMNS, {'leading_commas': True})
+
+
+def test_base_model_version_bumped_with_renderers():
+    parts = [inspect.getsource(generate_base_models.quote_column), inspect.getsource(generate_base_models.render_base_model)]
+    parts += [path.read_text() for path in sorted(MACROS_DIR.glob('*base_model*.sql'))]
+    renderers_hash = hashlib.sha256('\n'.join(parts).replace('\r\n', '\n').encode('utf-8')).hexdigest()
+    assert RENDERER_HASHES.get(BASE_MODEL_VERSION) == renderers_hash, \
+        f'The base model renderers changed: bump BASE_MODEL_VERSION and record {renderers_hash} for it in RENDERER_HASHES'
+
+
+def test_get_put(tmp_path):
+    cache = ModelCache(str(tmp_path))
+    assert cache.get('ab12') is None
+    cache.put('ab12', 'select 1\r\n')
+    assert cache.get('ab12') == 'select 1\r\n'
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_evict(tmp_path):
+    cache = ModelCache(str(tmp_path), max_age_days=1, max_size_mb=1)
+    for key in ['aa', 'bb', 'cc']:
+        cache.put(key, 'x' * 600 * 1024)
+    two_days_ago = time.time() - 2 * 86400
+    os.utime(cache.entry_path('aa'), (two_days_ago, two_days_ago))
+    os.utime(cache.entry_path('bb'), (time.time() - 60, time.time() - 60))
+    assert cache.evict() == 2
+    assert [os.path.basename(path) for _, _, path in cache.entries()] == ['cc.sql']
+
+
+def test_generate_only_changed_tables(tmp_path):
+    args = ['generate', '-s', SOURCES_FILE, '-o', str(tmp_path), '--cache', 'True', '--cache-dir', str(tmp_path / 'cache')]
+    columns = {'ACCOUNTS': COLUMNS, 'AD_GROUPS': COLUMNS}
+    with patch('dbt_generator.generate_base_models.get_base_model_columns', return_value=columns), \
+            patch('dbt_generator.generate_base_models.generate_base_model', return_value='select 1') as generate:
+        assert CliRunner().invoke(dbt_generator, args).exit_code == 0
+        assert generate.call_count == 2
+        columns['AD_GROUPS'] = COLUMNS + [('EMAIL', 'TEXT')]
+        result = CliRunner().invoke(dbt_generator, args)
+        assert generate.call_count == 3
+        assert generate.call_args[0][0] == 'AD_GROUPS'
+        assert '1 models unchanged in cache, generating 1' in result.output
+        CliRunner().invoke(dbt_generator, args + ['--force', 'True'])
+        assert generate.call_count == 5
+    assert (tmp_path / 'ACCOUNTS.sql').read_text() == 'select 1'
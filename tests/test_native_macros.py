@@ -0,0 +1,74 @@
+import os
+from unittest.mock import patch
+from click.testing import CliRunner
+from dbt_generator import generate_base_models
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator.native_macros import NativeMacros
+from dbt_generator.generate_base_models import get_snapshot_sql, set_native_macros
+
+SNAPSHOT_ARGS = dict(snapshot_name='snap_salesforce_account', dbt_source='salesforce', table_name='account',
+                     unique_key='id', snapshot_strategy='timestamp', updated_at='systemmodstamp', check_cols='None',
+                     invalidate_hard_deletes=1, composite_key=0, use_formula_flag=0)
+SNAPSHOT_COLUMNS = {
+    'SYSTEM_NAME': ['SALESFORCE', 'SALESFORCE'], 'DBT_SOURCE': ['SALESFORCE', 'SALESFORCE'],
+    'TABLE_NAME': ['ACCOUNT', 'CONTACT'], 'UNIQUE_KEY': ['ID', 'ID'], 'SNAPSHOT_STRATEGY': ['timestamp', 'timestamp'],
+    'UPDATED_AT': ['systemmodstamp', 'systemmodstamp'], 'CHECK_COLS': ['None', 'None'],
+    'INVALIDATE_HARD_DELETES': [1, 0], 'COMPOSITE_KEY': [0, 0], 'INVALIDATE_FIVETRAN_SOFT_DELETES': [0, 1],
+    'INVALIDATE_SOFT_DELETES': [0, 0], 'SOFT_DELETE_INDICATOR_COL': ['None', 'None'],
+    'SOFT_DELETE_DATE_COL': ['None', 'None'], 'SALESFORCE_FORMULA_TRANSFORMATION': [0, 0],
+}
+SNAPSHOT_INFO = [dict(zip(SNAPSHOT_COLUMNS, values)) for values in zip(*SNAPSHOT_COLUMNS.values())]
+
+
+def test_snapshot():
+    sql = NativeMacros().call('macro_create_snapshot', **SNAPSHOT_ARGS)
+    assert sql.lstrip().startswith('{% snapshot snap_salesforce_account %}')
+    assert 'unique_key = "id",' in sql
+    assert 'updated_at = "systemmodstamp",' in sql
+    assert 'invalidate_hard_deletes = True' in sql
+    assert "select * from {{ source('salesforce', 'account') }}" in sql
+
+
+def test_snapshot_reserved_unique_key():
+    sql = NativeMacros().call('macro_create_snapshot', **dict(SNAPSHOT_ARGS, unique_key='order'))
+    assert 'unique_key = "order_",' in sql
+    assert 'select "ORDER" as order_, * exclude ("ORDER") from' in sql
+
+
+def test_snapshot_composite_key():
+    sql = NativeMacros().call('macro_create_snapshot', **dict(SNAPSHOT_ARGS, unique_key='id;name', composite_key=1))
+    assert 'unique_key = "dbt_composite_key",' in sql
+    assert "select id ||'-'|| name as dbt_composite_key, * from" in sql
+
+
+def test_soft_delete_snapshot():
+    sql = NativeMacros().call('macro_create_soft_delete_snapshot', snapshot_name='snap_raw_salesforce_account',
+                              invalidate_fivetran_soft_deletes=1, invalidate_soft_deletes=0,
+                              soft_delete_indicator_col='None', soft_delete_date_col='None')
+    assert sql.startswith('select\n        source.* exclude (dbt_valid_to),')
+    assert 'when source._fivetran_deleted = true' in sql
+    assert sql.endswith("from {{ ref('snap_raw_salesforce_account') }} source")
+
+
+def test_get_snapshot_sql_native():
+    set_native_macros(NativeMacros())
+    try:
+        with patch('dbt_generator.generate_base_models.run_operation') as run_operation:
+            sql = get_snapshot_sql(**SNAPSHOT_ARGS)
+        run_operation.assert_not_called()
+    finally:
+        set_native_macros(None)
+    assert sql.startswith('{% snapshot snap_salesforce_account %}')
+
+
+def test_generate_snapshots_native(tmp_path):
+    with patch('dbt_generator.generate_base_models.extract_snapshot_info', return_value=SNAPSHOT_INFO), \
+            patch('dbt_generator.generate_base_models.run_operation') as run_operation:
+        result = CliRunner().invoke(dbt_generator, [
+            'generate-snapshots', '--system_name', 'SALESFORCE', '-s', str(tmp_path / 'snapshots'),
+            '-m', str(tmp_path / 'models'), '--native', 'True'])
+    assert result.exit_code == 0, result.output
+    assert generate_base_models.native_macros is None
+    run_operation.assert_not_called()
+    assert sorted(os.listdir(tmp_path / 'snapshots')) == ['snap_raw_salesforce_contact.sql', 'snap_salesforce_account.sql']
+    assert os.listdir(tmp_path / 'models') == ['snap_salesforce_contact_vw.sql']
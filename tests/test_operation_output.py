@@ -0,0 +1,46 @@
+import sys
+import json
+import shlex
+import subprocess
+import pytest
+from dbt_generator.operation_output import BATCH_BEGIN, BATCH_END, iter_messages, extract_batch_payload, read_output
+from dbt_generator.generate_base_models import stream_operation
+
+
+def event(name, msg):
+    return json.dumps({'info': {'name': name, 'level': 'info', 'msg': msg}, 'data': {'msg': msg}})
+
+
+LOG = [
+    event('MainReportVersion', 'Running with dbt=1.7.0'),
+    event('JinjaLogInfo', 'with source as (\n    select 1\n)'),
+    BATCH_BEGIN,
+    json.dumps({'info': 'a table named info'}),
+    BATCH_END,
+    event('Note', 'with source as in a dbt log line'),
+]
+
+
+def test_iter_messages():
+    assert list(iter_messages(LOG)) == ['with source as (', '    select 1', ')', BATCH_BEGIN,
+                                        json.dumps({'info': 'a table named info'}), BATCH_END]
+    assert list(iter_messages(['Running with dbt', 'version: 2\n'])) == ['Running with dbt', 'version: 2']
+
+
+def test_extract_batch_payload_from_lines():
+    assert extract_batch_payload(iter_messages(LOG)) == {'info': 'a table named info'}
+
+
+def test_read_output():
+    assert read_output(iter_messages(LOG), 'WITH SOURCE AS') == 'with source as (\n    select 1\n)\n' + '\n'.join(
+        [BATCH_BEGIN, json.dumps({'info': 'a table named info'}), BATCH_END]) + '\n'
+    with pytest.raises(Exception):
+        read_output(['Running with dbt', 'Done'], 'version: ')
+
+
+def test_stream_operation():
+    script = f'import sys; print({event("JinjaLogInfo", "version: 2")!r}); sys.exit(int(sys.argv[1]))'
+    command = f'{shlex.quote(sys.executable)} -c {shlex.quote(script)}'
+    assert list(stream_operation(command + ' 0')) == ['version: 2']
+    with pytest.raises(subprocess.CalledProcessError):
+        list(stream_operation(command + ' 1'))
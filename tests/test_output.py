@@ -0,0 +1,30 @@
+import os
+from dbt_generator.output import OutputStats, write_output, CREATED, UPDATED, UNCHANGED
+
+
+def test_write_output(tmp_path):
+    path = str(tmp_path / 'models' / 'base_model.sql')
+    assert write_output(path, 'select 1\n') == CREATED
+    os.utime(path, ns=(0, 0))
+    assert write_output(path, 'select 1\n') == UNCHANGED
+    assert os.stat(path).st_mtime_ns == 0
+    assert write_output(path, 'select 2\n') == UPDATED
+    with open(path, newline='') as file:
+        assert file.read() == 'select 2\n'
+    assert os.listdir(tmp_path / 'models') == ['base_model.sql']
+
+
+def test_write_output_newline(tmp_path):
+    path = str(tmp_path / 'base_model.sql')
+    write_output(path, 'select\n1\n', newline='\r\n')
+    with open(path, 'rb') as file:
+        assert file.read() == b'select\r\n1\r\n'
+    assert write_output(path, 'select\n1\n', newline='\r\n') == UNCHANGED
+
+
+def test_output_stats():
+    stats = OutputStats()
+    for status in (CREATED, UPDATED, UNCHANGED, UNCHANGED):
+        stats.record(status)
+    assert stats.total() == 4
+    assert stats.summary() == 'Wrote 4 files: 1 created, 1 updated, 2 unchanged'
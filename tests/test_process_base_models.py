@@ -98,3 +98,32 @@ def test_ProcessBaseModelsSF():
     )
     processor.process_base_models(output_file)
     assert filecmp.cmp(expected_file, output_file, shallow=False)
+
+
+def test_get_columns__leading_commas_aliases_and_comments(tmp_path):
+    sql_file = tmp_path / 'base_model.sql'
+    sql_file.write_text(
+        "with source as (\n\n    select * from {{ source('GOOGLE_ADS', 'ACCOUNTS') }}\n\n),\n\n"
+        "renamed as (\n\n    select\n"
+        "        id -- the key\n"
+        '        , "Account Name"\n'
+        "        , cast(amount, 'number') as amount\n"
+        "        /* legacy, unused */\n"
+        "        , CreatedAt created_at\n"
+        "        , _loaded_at\n\n"
+        "    from source\n\n)\n\nselect * from renamed\n")
+    processor = dbt_gen.ProcessBaseModelsWithTransforms(
+        sql_file=str(sql_file), transforms_file=None, drop_metadata=True,
+        transforms={'created_at': {'name': 'created_time'}})
+    assert processor.columns == ['id', '"Account Name"', 'amount', 'created_at']
+    assert processor.expressions == {'amount': "cast(amount, 'number')", 'created_at': 'CreatedAt'}
+    output_file = tmp_path / 'out.sql'
+    processor.process_base_models(str(output_file))
+    assert output_file.read_text() == (
+        "with source as (\n\n    select * from {{ source('GOOGLE_ADS', 'ACCOUNTS') }}\n\n),\n\n"
+        "renamed as (\n\n    select\n"
+        "        id,\n"
+        '        "Account Name",\n'
+        "        cast(amount, 'number') as amount,\n"
+        "        CreatedAt as created_time\n\n"
+        "    from source\n\n)\n\nselect * from renamed\n")
@@ -0,0 +1,80 @@
+import csv
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from dbt_generator.native_macros import NativeMacros
+from dbt_generator.reserved_words import get_reserved_words, get_dialect, is_reserved
+from dbt_generator.generate_base_models import get_snapshot_sql, render_base_model
+from dbt_generator.process_base_models import ProcessBaseModelsBQ, ProcessBaseModelsSF
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent
+SNAPSHOT_ARGS = dict(snapshot_name='snap_salesforce_account', dbt_source='salesforce', table_name='account',
+                     unique_key='order', snapshot_strategy='timestamp', updated_at='systemmodstamp', check_cols='None',
+                     invalidate_hard_deletes=1, composite_key=0, use_formula_flag=0)
+RESERVED_MODEL = '''with source as (
+
+    select * from {{ source('shop', 'orders') }}
+
+),
+
+renamed as (
+
+    select
+        id,
+        order,
+        cast(x as int) as select,
+        status
+
+    from source
+
+)
+
+select * from renamed
+'''
+
+
+def test_ansi_words_match_seed():
+    with open(PACKAGE_DIR / 'seeds' / 'sql_reserved_words.csv', encoding='utf-8-sig') as file:
+        seed_words = {row['reserved_word'] for row in csv.DictReader(file)}
+    assert get_reserved_words('ansi') == seed_words
+
+
+def test_dialects():
+    assert get_reserved_words('snowflake') is get_reserved_words('snowflake')
+    assert is_reserved('qualify', 'snowflake') and is_reserved('`struct`', 'bigquery')
+    assert not is_reserved('struct', 'snowflake') and not is_reserved('account', 'bigquery')
+    assert get_dialect('bigquery') == 'bigquery' and get_dialect('postgres') == 'ansi'
+    with pytest.raises(ValueError):
+        get_reserved_words('oracle')
+
+
+def test_snapshot_checks_unique_key_without_seed_query():
+    with patch('dbt_generator.generate_base_models.run_operation') as run_operation, \
+         patch('dbt_generator.generate_base_models.extract_batch_payload', return_value='sql'):
+        get_snapshot_sql(**SNAPSHOT_ARGS)
+        get_snapshot_sql(**dict(SNAPSHOT_ARGS, unique_key='id'))
+        get_snapshot_sql(**dict(SNAPSHOT_ARGS, unique_key='order;id', composite_key=1))
+    assert [call.args[1]['unique_key_reserved'] for call in run_operation.call_args_list] == [True, False, False]
+
+    macros = NativeMacros()
+    with patch.object(macros, 'get_column_values', side_effect=AssertionError('queried the seed')):
+        sql = macros.call('macro_create_snapshot', **SNAPSHOT_ARGS, unique_key_reserved=True)
+    assert 'select "ORDER" as order_, * exclude ("ORDER") from' in sql
+
+
+def test_render_base_model_quote_reserved():
+    model = render_base_model('ORDERS', 'SHOP', ['ID', 'ORDER', 'QUALIFY'], False, False, '', False, 'snowflake', True)
+    assert '        id,\n        "ORDER",\n        "QUALIFY"\n' in model
+    model = render_base_model('ORDERS', 'SHOP', ['id', 'order', 'qualify'], True, False, '', False, 'bigquery', True)
+    assert '        id,\n        `order`,\n        `qualify`\n' in model
+
+
+def test_alias_reserved(tmp_path):
+    sql_file = tmp_path / 'orders.sql'
+    sql_file.write_text(RESERVED_MODEL)
+    processor = ProcessBaseModelsBQ(str(sql_file), alias_reserved=True)
+    processor.process_transforms()
+    assert processor.columns == ['id as id', '`order` as order_', 'cast(x as int) as select_', 'status as status']
+    processor = ProcessBaseModelsSF(str(sql_file), alias_reserved=True)
+    processor.process_transforms()
+    assert processor.columns[1] == '"ORDER" as order_'
@@ -0,0 +1,129 @@
+import os
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+from click.testing import CliRunner
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator.schema_store import SchemaStore, SchemaDrift
+from dbt_generator.process_base_models import ProcessBaseModelsSF
+
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'test_data'
+CATALOG = {
+    'ACCOUNTS': {'last_altered': '2024-01-01 00:00:00', 'columns': [['ID', 'NUMBER'], ['NAME', 'TEXT']]},
+    'AD_GROUPS': {'last_altered': '2024-01-02 00:00:00', 'columns': [['ID', 'NUMBER']]},
+}
+
+
+def test_update_and_compare(tmp_path):
+    store = SchemaStore(str(tmp_path / 'schema.db'))
+    assert store.update('raw', 'google_ads', CATALOG) == SchemaDrift(['ACCOUNTS', 'AD_GROUPS'], [], [])
+    assert store.get_columns('RAW', 'GOOGLE_ADS', 'accounts') == [('ID', 'NUMBER'), ('NAME', 'TEXT')]
+    assert store.get_columns(None, 'GOOGLE_ADS', 'ACCOUNTS') == [('ID', 'NUMBER'), ('NAME', 'TEXT')]
+    assert store.get_last_altered('RAW', 'GOOGLE_ADS') == '2024-01-02 00:00:00'
+
+    catalog = {
+        'ACCOUNTS': {'last_altered': '2024-01-01 00:00:00', 'columns': None},
+        'CAMPAIGNS': {'last_altered': '2024-01-03 00:00:00', 'columns': [['ID', 'NUMBER']]},
+    }
+    assert store.compare('RAW', 'GOOGLE_ADS', catalog) == SchemaDrift(['CAMPAIGNS'], [], ['AD_GROUPS'])
+    changed = {**CATALOG, 'ACCOUNTS': {'last_altered': '2024-01-04 00:00:00', 'columns': [['ID', 'NUMBER']]}}
+    assert store.update('RAW', 'GOOGLE_ADS', changed) == SchemaDrift([], ['ACCOUNTS'], [])
+    assert store.get_columns('RAW', 'GOOGLE_ADS', 'ACCOUNTS') == [('ID', 'NUMBER')]
+
+
+def test_drift_command(tmp_path):
+    store_path = str(tmp_path / 'schema.db')
+    SchemaStore(store_path).update('RAW', 'GOOGLE_ADS', CATALOG)
+    catalog = {'ACCOUNTS': {'last_altered': '2024-01-05 00:00:00', 'columns': [['ID', 'NUMBER']]},
+               'AD_GROUPS': {'last_altered': '2024-01-02 00:00:00', 'columns': None}}
+    with patch('dbt_generator.generate_base_models.get_schema_catalog', return_value=catalog) as get_schema_catalog:
+        result = CliRunner().invoke(dbt_generator, ['drift', '-d', 'RAW', '-s', 'GOOGLE_ADS', '--store', store_path])
+    assert result.exit_code == 0, result.output
+    get_schema_catalog.assert_called_once_with('RAW', 'GOOGLE_ADS', '2024-01-02 00:00:00')
+    assert 'changed: RAW.GOOGLE_ADS.ACCOUNTS' in result.output
+    assert 'AD_GROUPS' not in result.output
+    assert SchemaStore(store_path).get_columns('RAW', 'GOOGLE_ADS', 'ACCOUNTS') == [('ID', 'NUMBER'), ('NAME', 'TEXT')]
+
+
+
+def test_refresh_pulls_columns_of_tables_not_in_store(tmp_path):
+    store_path = str(tmp_path / 'schema.db')
+    SchemaStore(store_path).update('RAW', 'GOOGLE_ADS', CATALOG)
+    # CAMPAIGNS is older than the last refresh, e.g. restored, so the incremental pull has no columns for it
+    catalog = {**CATALOG, 'CAMPAIGNS': {'last_altered': '2023-12-01 00:00:00', 'columns': None}}
+    catalog['ACCOUNTS'] = dict(catalog['ACCOUNTS'], columns=None)
+    full_catalog = {**CATALOG, 'CAMPAIGNS': {'last_altered': '2023-12-01 00:00:00', 'columns': [['ID', 'NUMBER']]}}
+    with patch('dbt_generator.generate_base_models.get_schema_catalog',
+               side_effect=[catalog, full_catalog]) as get_schema_catalog:
+        result = CliRunner().invoke(dbt_generator, ['refresh-schema', '-d', 'RAW', '-s', 'GOOGLE_ADS', '--store', store_path])
+    assert result.exit_code == 0, result.output
+    assert get_schema_catalog.call_args_list[-1][0] == ('RAW', 'GOOGLE_ADS', None)
+    assert 'added: RAW.GOOGLE_ADS.CAMPAIGNS' in result.output
+    store = SchemaStore(store_path)
+    assert store.get_columns('RAW', 'GOOGLE_ADS', 'CAMPAIGNS') == [('ID', 'NUMBER')]
+    assert store.compare('RAW', 'GOOGLE_ADS', catalog) == SchemaDrift([], [], [])
+
+def test_generate_and_source_yaml_from_store(tmp_path):
+    store_path = str(tmp_path / 'schema.db')
+    SchemaStore(store_path).update('RAW', 'GOOGLE_ADS', CATALOG)
+    result = CliRunner().invoke(dbt_generator, [
+        'generate', '-s', os.path.join(TEST_DATA_DIR, 'test_sources.yml'), '-o', str(tmp_path), '--from-store', store_path])
+    assert result.exit_code == 0, result.output
+    assert '        id,\n        name\n' in (tmp_path / 'ACCOUNTS.sql').read_text()
+
+    result = CliRunner().invoke(dbt_generator, [
+        'source-yaml', '-o', str(tmp_path), '--database_name', 'RAW', '--schema_name', 'GOOGLE_ADS',
+        '--table_names', '["AD_GROUPS"]', '--generate_columns', 'True', '--from-store', store_path])
+    assert result.exit_code == 0, result.output
+    assert (tmp_path / 'GOOGLE_ADS.yml').read_text() == (
+        'version: 2\n\nsources:\n  - name: google_ads\n    tables:\n      - name: ad_groups\n        columns:\n'
+        '          - name: id\n            data_type: number\n\n')
+
+
+def test_transform_skips_casts_to_stored_types(tmp_path):
+    store_path = str(tmp_path / 'schema.db')
+    SchemaStore(store_path).update('RAW', 'GOOGLE_ADS', {'ACCOUNTS': {'last_altered': None, 'columns': [
+        ['CUSTOMERID', 'INTEGER'], ['_SDC_BATCHED_AT', 'TIMESTAMP_NTZ'], ['_SDC_CUSTOMER_ID', 'TEXT']]}})
+    processor = ProcessBaseModelsSF(os.path.join(TEST_DATA_DIR, 'test_sql_file.sql'), id_as_int=True,
+                                    convert_timestamp=True, schema_store=store_path)
+    processor.process_transforms()
+    assert 'customerid as customerid' in processor.columns
+    assert '_sdc_batched_at as _sdc_batched_at' in processor.columns
+    assert '_sdc_customer_id::integer as _sdc_customer_id' in processor.columns
+    assert '_sdc_received_at::timestamp as _sdc_received_at' in processor.columns
+
+
+def test_schema_stored_for_several_databases(tmp_path):
+    store_path = str(tmp_path / 'schema.db')
+    store = SchemaStore(store_path)
+    store.update('RAW', 'GOOGLE_ADS', CATALOG)
+    assert store.get_tables(None, 'GOOGLE_ADS') == ['ACCOUNTS', 'AD_GROUPS']
+    store.update('RAW_DEV', 'GOOGLE_ADS', CATALOG)
+    assert store.get_columns('RAW_DEV', 'GOOGLE_ADS', 'ACCOUNTS') == [('ID', 'NUMBER'), ('NAME', 'TEXT')]
+    with pytest.raises(ValueError, match='stored for databases RAW, RAW_DEV'):
+        store.get_columns(None, 'GOOGLE_ADS', 'ACCOUNTS')
+
+    sources_yml = tmp_path / 'sources.yml'
+    sources_yml.write_text('version: 2\n\nsources:\n  - name: GOOGLE_ADS\n    tables:\n    - name: ACCOUNTS\n')
+    result = CliRunner().invoke(dbt_generator, ['generate', '-s', str(sources_yml), '-o', str(tmp_path), '--from-store', store_path])
+    assert result.exit_code == 1
+    assert 'set database: for source GOOGLE_ADS' in result.output
+    sources_yml.write_text(sources_yml.read_text().replace('GOOGLE_ADS\n', 'GOOGLE_ADS\n    database: RAW_DEV\n'))
+    result = CliRunner().invoke(dbt_generator, ['generate', '-s', str(sources_yml), '-o', str(tmp_path), '--from-store', store_path])
+    assert result.exit_code == 0, result.output
+    assert '        id,\n        name\n' in (tmp_path / 'ACCOUNTS.sql').read_text()
+
+    processor = ProcessBaseModelsSF(os.path.join(TEST_DATA_DIR, 'test_sql_file.sql'), schema_store=store_path,
+                                    schema_name='GOOGLE_ADS', database_name='RAW')
+    assert processor.get_data_types() == {'id': 'NUMBER', 'name': 'TEXT'}
+
+
+def test_generate_from_store_looks_tables_up_once(tmp_path):
+    store_path = str(tmp_path / 'schema.db')
+    SchemaStore(store_path).update('RAW', 'GOOGLE_ADS', CATALOG)
+    with patch.object(SchemaStore, 'get_columns', autospec=True, side_effect=SchemaStore.get_columns) as get_columns:
+        result = CliRunner().invoke(dbt_generator, [
+            'generate', '-s', os.path.join(TEST_DATA_DIR, 'test_sources.yml'), '-o', str(tmp_path / 'models'),
+            '--from-store', store_path, '--cache', 'True', '--cache-dir', str(tmp_path / 'cache')])
+    assert result.exit_code == 0, result.output
+    assert sorted(call.args[3] for call in get_columns.call_args_list) == ['ACCOUNTS', 'AD_GROUPS']
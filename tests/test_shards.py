@@ -0,0 +1,59 @@
+import os
+import json
+import shutil
+from pathlib import Path
+from click.testing import CliRunner
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator.shards import parse_shard, shard_of, Shard, merge_manifests
+
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'test_data'
+
+
+def test_shard_assignment_is_stable_and_complete():
+    assert parse_shard('2/4') == (2, 4)
+    for value in ('0/4', '5/4', '1/0', 'two/4', '2'):
+        try:
+            parse_shard(value)
+        except ValueError:
+            continue
+        raise AssertionError(f'{value} was accepted')
+    keys = [f'shop.table_{index}' for index in range(100)]
+    # fixed values: a different hash would move tables between runners of the same CI job
+    assert [shard_of(key, 4) for key in keys[:8]] == [1, 1, 3, 4, 2, 1, 1, 2]
+    shards = [Shard('generate', index, 4).select(keys) for index in range(1, 5)]
+    assert sorted(key for keys in shards for key in keys) == sorted(keys)
+    assert all(shards)
+
+
+def test_transform_shards_merge(tmp_path):
+    os.makedirs(tmp_path / 'models')
+    for index in range(6):
+        shutil.copy(TEST_DATA_DIR / 'test_sql_file.sql', tmp_path / 'models' / f'model_{index}.sql')
+    manifests = []
+    for index in range(1, 4):
+        manifests.append(str(tmp_path / f'shard_{index}.json'))
+        result = CliRunner().invoke(dbt_generator, [
+            'bq-transform', '-m', str(tmp_path / 'models'), '-o', str(tmp_path / 'out'),
+            '--shard', f'{index}/3', '--shard-manifest', manifests[-1]])
+        assert result.exit_code == 0, result.output
+    assert sorted(os.listdir(tmp_path / 'out')) == [f'model_{index}.sql' for index in range(6)]
+
+    result = CliRunner().invoke(dbt_generator, ['merge-manifests', *manifests, '-o', str(tmp_path / 'merged.json')])
+    assert result.exit_code == 0, result.output
+    merged = json.loads((tmp_path / 'merged.json').read_text())
+    assert merged['items'] == [f'model_{index}.sql' for index in range(6)]
+    assert sorted(os.path.basename(path) for path in merged['outputs']) == merged['items']
+
+    result = CliRunner().invoke(dbt_generator, ['merge-manifests', *manifests[1:]])
+    assert result.exit_code == 1
+    assert 'missing shards: 1 of 3' in result.output
+
+
+def test_merge_reports_overlap_and_failures():
+    def manifest(index, items, failed={}):
+        return {'command': 'generate', 'shard': {'index': index, 'count': 2}, 'total': 3, 'universe': 'u',
+                'items': items, 'outputs': {}, 'failed': failed, 'seconds': index}
+    merged, problems = merge_manifests([manifest(1, ['a', 'b']), manifest(2, ['c'])])
+    assert problems == [] and merged['seconds'] == 2
+    _, problems = merge_manifests([manifest(1, ['a', 'b']), manifest(2, ['b'], {'c': 'timeout'})])
+    assert problems == ['b was done by shards 1 and 2', '2 of 3 items were done', 'c failed: timeout']
@@ -0,0 +1,51 @@
+import os
+import json
+from unittest.mock import patch
+from pathlib import Path
+from click.testing import CliRunner
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator.generate_base_models import set_native_macros, extract_snapshot_info
+from dbt_generator.operation_output import BATCH_BEGIN, BATCH_END
+from dbt_generator.snapshot_seed import read_snapshot_seed, rows_from_query_results, SnapshotSeedRow
+
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'test_data'
+SEED_FILE = os.path.join(TEST_DATA_DIR, 'test_snapshot_seed.csv')
+
+
+def test_read_snapshot_seed():
+    rows = list(read_snapshot_seed(SEED_FILE, ['SALESFORCE']))
+    assert [row.table_name for row in rows] == ['ACCOUNT', 'CONTACT', 'OPPORTUNITY']
+    assert rows[0].invalidate_hard_deletes == 1
+    assert rows[0].check_cols == 'None'
+    assert rows[2].salesforce_formula_transformation == 1
+
+
+def test_read_snapshot_seed_all_systems():
+    rows = list(read_snapshot_seed(SEED_FILE))
+    assert [row.system_name for row in rows] == ['SALESFORCE'] * 3 + ['NETSUITE']
+    assert rows[3] == SnapshotSeedRow('NETSUITE', 'NETSUITE', 'TRANSACTIONS', 'ID;LINE', 'check', 'None', 'all',
+                                      0, 1, 0, 1, 'is_deleted', 'deleted_at', 0)
+
+
+def test_rows_from_query_results():
+    output = '\n'.join(['Running with dbt', BATCH_BEGIN, json.dumps([
+        {'SYSTEM_NAME': 'SALESFORCE', 'DBT_SOURCE': 'SALESFORCE', 'TABLE_NAME': 'ACCOUNT', 'UNIQUE_KEY': 'ID',
+         'UPDATED_AT': None, 'INVALIDATE_HARD_DELETES': '1.000', 'COMPOSITE_KEY': 'False'}]),
+        BATCH_END, "{'SYSTEM_NAME': interleaved log line"])
+    with patch('dbt_generator.generate_base_models.run_operation', return_value=output):
+        query_results = extract_snapshot_info('SALESFORCE')
+    row, = rows_from_query_results(query_results)
+    assert (row.table_name, row.updated_at, row.invalidate_hard_deletes, row.composite_key) == ('ACCOUNT', 'None', 1, 0)
+
+
+def test_generate_snapshots_from_seed(tmp_path):
+    result = CliRunner().invoke(dbt_generator, [
+        'generate-snapshots', '--all-systems', 'True', '--seed-path', SEED_FILE, '--native', 'True',
+        '-s', str(tmp_path / 'snapshots'), '-m', str(tmp_path / 'models')])
+    set_native_macros(None)
+    assert result.exit_code == 0, result.output
+    assert sorted(os.listdir(tmp_path / 'snapshots')) == [
+        'snap_raw_netsuite_transactions.sql',
+        'snap_raw_salesforce_contact.sql', 'snap_salesforce_account.sql', 'snap_salesforce_opportunity.sql']
+    assert sorted(os.listdir(tmp_path / 'models')) == [
+        'frm_salesforce_opportunity_vw.sql', 'snap_netsuite_transactions_vw.sql', 'snap_salesforce_contact_vw.sql']
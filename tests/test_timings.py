@@ -0,0 +1,53 @@
+import os
+import json
+import shutil
+from pathlib import Path
+from click.testing import CliRunner
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator.timings import Timings, timings
+
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'test_data'
+
+
+def test_spans_only_recorded_when_enabled():
+    recorder = Timings()
+    with recorder.span('write', 'io', bytes=10):
+        pass
+    recorder.count('model cache hits')
+    assert recorder.spans == [] and recorder.counters == {}
+
+    recorder.enable()
+    for size in (10, 20):
+        with recorder.span('write', 'io', bytes=size) as span:
+            span['status'] = 'created'
+    recorder.count('model cache hits', 2)
+    assert [span.args for span in recorder.spans] == [{'bytes': 10, 'status': 'created'}, {'bytes': 20, 'status': 'created'}]
+
+    summary = recorder.summary().splitlines()
+    assert summary[1].split()[:3] == ['io', 'write', '2'] and summary[1].split()[-1] == '30'
+    assert summary[-1] == 'model cache hits: 2'
+
+    events = recorder.trace_events()['traceEvents']
+    assert [(event['name'], event['cat'], event['ph']) for event in events] == [('write', 'io', 'X')] * 2
+    assert all(event['ts'] >= 0 and event['dur'] >= 0 for event in events)
+
+
+def test_timings_json_with_worker_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(timings, 'enabled', False)
+    monkeypatch.setattr(timings, 'spans', [])
+    monkeypatch.setattr(timings, 'counters', {})
+    os.makedirs(tmp_path / 'models')
+    for index in range(3):
+        shutil.copy(TEST_DATA_DIR / 'test_sql_file.sql', tmp_path / 'models' / f'model_{index}.sql')
+    trace_path = tmp_path / 'timings.json'
+    result = CliRunner().invoke(dbt_generator, [
+        '--profile', 'True', '--timings-json', str(trace_path), 'bq-transform', '-m', str(tmp_path / 'models'),
+        '-o', str(tmp_path / 'out'), '--split-columns', 'True', '-j', '2'])
+    assert result.exit_code == 0, result.output
+    assert ['job', 'transform', '3'] in [line.split()[:3] for line in result.output.splitlines()]
+
+    events = json.loads(trace_path.read_text())['traceEvents']
+    names = [event['name'] for event in events]
+    assert names.count('bq-transform') == 1
+    assert names.count('transform') == 3
+    assert names.count('write') == 3
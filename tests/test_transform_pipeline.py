@@ -0,0 +1,98 @@
+import os
+import shutil
+import filecmp
+from pathlib import Path
+from unittest.mock import patch
+from click.testing import CliRunner
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator.process_base_models import ProcessBaseModelsBQ
+from dbt_generator.transform_pipeline import run_transforms, get_tool_version
+
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'test_data'
+BQ_OPTIONS = {'split_columns': True, 'convert_timestamp': True, 'id_as_int': True}
+
+
+def make_models(path, count):
+    os.makedirs(path)
+    for index in range(count):
+        shutil.copy(TEST_DATA_DIR / 'test_sql_file.sql', path / f'model_{index}.sql')
+    shutil.copy(TEST_DATA_DIR / 'test_invalid_sql_file.sql', path / 'invalid.sql')
+
+
+def test_run_transforms_parallel(tmp_path):
+    make_models(tmp_path / 'models', 4)
+    os.makedirs(tmp_path / 'out')
+    sql_files = sorted(os.listdir(tmp_path / 'models'))
+    results = run_transforms(str(tmp_path / 'models'), sql_files, str(tmp_path / 'out'), ProcessBaseModelsBQ, BQ_OPTIONS, jobs=2)
+    assert sorted(result.name for result in results) == sql_files
+    assert [result.name for result in results if result.error] == ['invalid.sql']
+    for index in range(4):
+        assert filecmp.cmp(TEST_DATA_DIR / 'expected/ProcessBaseModelsBQ.sql', tmp_path / f'out/model_{index}.sql', shallow=False)
+
+
+def test_transform_loads_transforms_once(tmp_path):
+    make_models(tmp_path / 'models', 3)
+    os.makedirs(tmp_path / 'out')
+    os.remove(tmp_path / 'models/invalid.sql')
+    with patch('yaml.load', wraps=__import__('yaml').load) as load:
+        result = CliRunner().invoke(dbt_generator, [
+            'transform', '-m', str(tmp_path / 'models'), '-t', str(TEST_DATA_DIR / 'test_transform.yml'),
+            '-o', str(tmp_path / 'out'), '--drop-metadata', 'True'])
+    assert result.exit_code == 0, result.output
+    assert load.call_count == 1
+    for index in range(3):
+        assert filecmp.cmp(TEST_DATA_DIR / 'expected/transformed__drop_metadata.sql', tmp_path / f'out/model_{index}.sql',
+                           shallow=False)
+
+
+def test_transform_reports_failures(tmp_path):
+    make_models(tmp_path / 'models', 2)
+    os.makedirs(tmp_path / 'out')
+    result = CliRunner().invoke(dbt_generator, [
+        'bq-transform', '-m', str(tmp_path / 'models'), '-o', str(tmp_path / 'out'), '--jobs', '2'])
+    assert result.exit_code == 1
+    assert '1 of 3 jobs failed' in result.output
+    assert sorted(os.listdir(tmp_path / 'out')) == ['model_0.sql', 'model_1.sql']
+
+
+def test_incremental_transform(tmp_path):
+    make_models(tmp_path / 'models', 2)
+    os.remove(tmp_path / 'models/invalid.sql')
+    os.makedirs(tmp_path / 'out')
+    transforms_file = tmp_path / 'transforms.yml'
+    shutil.copy(TEST_DATA_DIR / 'test_transform.yml', transforms_file)
+    args = ['transform', '-m', str(tmp_path / 'models'), '-t', str(transforms_file), '-o', str(tmp_path / 'out'),
+            '--incremental', 'True']
+
+    assert '0 models unchanged, transforming 2' in CliRunner().invoke(dbt_generator, args).output
+    assert '2 models unchanged, transforming 0' in CliRunner().invoke(dbt_generator, args).output
+
+    with open(tmp_path / 'models/model_1.sql', 'a') as file:
+        file.write('\n')
+    assert '1 models unchanged, transforming 1' in CliRunner().invoke(dbt_generator, args).output
+
+    with open(transforms_file, 'a') as file:
+        file.write('testaccount:\n  name: is_test_account\n')
+    assert '0 models unchanged, transforming 2' in CliRunner().invoke(dbt_generator, args).output
+
+    os.remove(tmp_path / 'out/model_0.sql')
+    assert '1 models unchanged, transforming 1' in CliRunner().invoke(dbt_generator, args).output
+    assert '2 models unchanged, transforming 0' in CliRunner().invoke(dbt_generator, args + ['--drop-metadata', 'True']).output
+    assert '0 models unchanged, transforming 2' in CliRunner().invoke(dbt_generator, args + ['--drop-metadata', 'False']).output
+
+
+def test_incremental_transform_reports_failures_without_output(tmp_path):
+    os.makedirs(tmp_path / 'models')
+    shutil.copy(TEST_DATA_DIR / 'test_invalid_sql_file.sql', tmp_path / 'models' / 'invalid.sql')
+    result = CliRunner().invoke(dbt_generator, [
+        'transform', '-m', str(tmp_path / 'models'), '-t', str(TEST_DATA_DIR / 'test_transform.yml'),
+        '-o', str(tmp_path / 'out'), '--incremental', 'True'])
+    assert result.exit_code == 1
+    assert '1 of 1 jobs failed' in result.output
+    assert os.listdir(tmp_path / 'out') == ['.dbt_generator_manifest.json']
+
+
+def test_tool_version_without_importlib_metadata():
+    # Python 3.7 has no importlib.metadata, the version comes from pkg_resources instead
+    with patch.dict('sys.modules', {'importlib.metadata': None}):
+        assert isinstance(get_tool_version(), str)
@@ -0,0 +1,79 @@
+import pickle
+from dbt_generator.transform_rules import TransformRules
+
+TRANSFORMS = {
+    'created_at': {'name': 'created_time'},
+    '^_fivetran_.*': {'name': '{column}', 'sql': 'cast({column} as timestamp)'},
+    '*_at': {'name': '{column}', 'sql': 'timestamp({column})'},
+    'is_*': {'name': '{column}', 'sql': 'cast({column} as boolean)'},
+    '*': {'name': 'fallback'},
+}
+
+
+def test_exact_name_wins():
+    rules = TransformRules(TRANSFORMS)
+    assert rules.match('created_at') == {'name': 'created_time'}
+    assert rules.match('CREATED_AT') == {'name': 'created_time'}
+
+
+def test_first_pattern_wins():
+    rules = TransformRules(TRANSFORMS)
+    assert rules.match('_fivetran_synced_at') == {'name': '_fivetran_synced_at',
+                                                  'sql': 'cast(_fivetran_synced_at as timestamp)'}
+    assert rules.match('updated_at') == {'name': 'updated_at', 'sql': 'timestamp(updated_at)'}
+    assert rules.match('is_deleted') == {'name': 'is_deleted', 'sql': 'cast(is_deleted as boolean)'}
+    assert rules.match('name') == {'name': 'fallback'}
+
+
+def test_regex_keys_are_searched():
+    rules = TransformRules({'_id$': {'name': '{column}', 'sql': 'cast({column} as int)'},
+                            '^_fivetran_': {'name': '{column}'},
+                            '^(a)_\\1$': {'name': 'repeated'},
+                            '*_id': {'name': 'glob'}})
+    assert rules.match('customer_id') == {'name': 'customer_id', 'sql': 'cast(customer_id as int)'}
+    assert rules.match('_fivetran_synced') == {'name': '_fivetran_synced'}
+    assert rules.match('a_a') == {'name': 'repeated'}
+    assert rules.match('customer_id_old') is None
+
+
+def test_regex_groups_in_combined_matcher():
+    rules = TransformRules({'^(x)_\\1$': {'name': 'first'},
+                            '^(?P<part>[a-z]+)_(?P=part)$': {'name': 'named'},
+                            '^(?P<part>[a-z]+)-(?P=part)$': {'name': 'same name'},
+                            '^(b)_(c)_\\2$': {'name': 'second group'},
+                            '(?-i:ID)$': {'name': 'upper'},
+                            '(?s)_x$': {'name': 'global flag'},
+                            '*[!0-9]': {'name': 'glob'}})
+    assert rules.match('x_x') == {'name': 'first'}
+    assert rules.match('ab_ab') == {'name': 'named'}
+    assert rules.match('ab-ab') == {'name': 'same name'}
+    assert rules.match('b_c_c') == {'name': 'second group'}
+    assert rules.match('customerID') == {'name': 'upper'}
+    assert rules.match('a_x') == {'name': 'global flag'}
+    assert rules.match('customerid') == {'name': 'glob'}
+    assert rules.match('column_1') is None
+
+
+def test_many_rules_share_one_matcher():
+    transforms = {f'^prefix_{index}_': {'name': str(index)} for index in range(500)}
+    transforms.update({f'*_suffix_{index}': {'name': str(index)} for index in range(500)})
+    rules = TransformRules(transforms)
+    assert rules.separate == []
+    assert rules.match('prefix_250_column') == {'name': '250'}
+    assert rules.match('column_suffix_499') == {'name': '499'}
+    assert rules.match('column') is None
+
+
+def test_case_sensitive():
+    rules = TransformRules({'ID': {'name': 'id'}, '*_AT': {'name': '{column}'}}, case_sensitive=True)
+    assert rules.match('ID') == {'name': 'id'}
+    assert rules.match('id') is None
+    assert rules.match('UPDATED_AT') == {'name': 'UPDATED_AT'}
+    assert rules.match('updated_at') is None
+
+
+def test_pickle():
+    rules = pickle.loads(pickle.dumps(TransformRules(TRANSFORMS)))
+    assert len(rules) == len(TRANSFORMS)
+    assert rules.match('created_at') == {'name': 'created_time'}
+    assert rules.match('updated_at') == {'name': 'updated_at', 'sql': 'timestamp(updated_at)'}
@@ -0,0 +1,41 @@
+import os
+import pytest
+from pathlib import Path
+from dbt_generator.process_base_models import ProcessBaseModelsWithTransforms, ProcessBaseModelsBQ, load_transforms_file
+from dbt_generator.transform_rules import TransformRules
+from dbt_generator.transform_stages import Column, TransformsStage, ConventionsStage, BIGQUERY, SNOWFLAKE
+
+TEST_DATA_DIR = Path(__file__).resolve().parent / 'test_data'
+BQ_OPTIONS = {'split_columns': True, 'convert_timestamp': True, 'id_as_int': True}
+
+
+def test_column_has_no_instance_dict():
+    column = Column('ID')
+    with pytest.raises(AttributeError):
+        column.label = 'id'
+    assert column.sql() == 'ID'
+    column.alias = 'id_'
+    assert column.sql() == 'ID as id_'
+
+
+def test_stage_chain():
+    columns = [Column('ID'), Column('created_time'), Column('select', 'cast(x as int)'), Column('UPDATED_AT', data_type='TIMESTAMP_NTZ')]
+    TransformsStage(TransformRules({'created_time': {'name': 'created_at'}, 'ID': {'name': 'order_id', 'sql': 'ID'}}))(columns)
+    assert [column.sql() for column in columns] == ['ID as order_id', 'created_time as created_at', 'cast(x as int) as select', 'UPDATED_AT']
+    ConventionsStage(SNOWFLAKE, id_as_int=True, convert_timestamp=True, alias_reserved=True)(columns)
+    assert [column.sql() for column in columns] == [
+        'ID::integer as order_id', 'created_time::timestamp as created_at', 'cast(x as int) as select_', 'updated_at as UPDATED_AT']
+    assert BIGQUERY.quote_identifier('order') == '`order`' and SNOWFLAKE.quote_identifier('order') == '"ORDER"'
+
+
+def test_transforms_and_conventions_in_one_pass(tmp_path):
+    transforms_file = os.path.join(TEST_DATA_DIR, 'test_transform.yml')
+    ProcessBaseModelsWithTransforms(transforms_file, os.path.join(TEST_DATA_DIR, 'test_sql_file.sql'),
+                                    drop_metadata=True).process_base_models(str(tmp_path / 'first_pass.sql'))
+    ProcessBaseModelsBQ(str(tmp_path / 'first_pass.sql'), **BQ_OPTIONS).process_base_models(str(tmp_path / 'two_passes.sql'))
+
+    processor = ProcessBaseModelsBQ(os.path.join(TEST_DATA_DIR, 'test_sql_file.sql'), drop_metadata=True,
+                                    transforms=load_transforms_file(transforms_file), **BQ_OPTIONS)
+    processor.process_base_models(str(tmp_path / 'one_pass.sql'))
+    assert (tmp_path / 'one_pass.sql').read_text() == (tmp_path / 'two_passes.sql').read_text()
+    assert 'cast(CAST(customerid as varchar) as int64) as customer_id' in processor.columns
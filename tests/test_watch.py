@@ -0,0 +1,100 @@
+import os
+import sys
+import pytest
+from pathlib import Path
+from click.testing import CliRunner
+from dbt_generator.dbt_generator import dbt_generator
+from dbt_generator.process_base_models import ProcessBaseModelsBQ
+from dbt_generator.watch import TransformWatch, PollingWatcher, InotifyWatcher, wait_for_changes
+
+MODEL = '''with source as (
+
+    select * from {{{{ source('SHOP', '{table}') }}}}
+
+),
+
+renamed as (
+
+    select
+{columns}
+
+    from source
+
+)
+
+select * from renamed
+'''
+
+
+def write_model(path, table, columns):
+    path.write_text(MODEL.format(table=table, columns=',\n'.join('        ' + column for column in columns)))
+
+
+def make_project(tmp_path):
+    os.makedirs(tmp_path / 'models')
+    write_model(tmp_path / 'models' / 'orders.sql', 'ORDERS', ['id', 'created_time'])
+    write_model(tmp_path / 'models' / 'customers.sql', 'CUSTOMERS', ['id', 'name'])
+    (tmp_path / 'transforms.yml').write_text('created_time:\n  name: created_at\n')
+    return TransformWatch(str(tmp_path / 'models'), str(tmp_path / 'transforms.yml'), str(tmp_path / 'out'))
+
+
+def test_watch_transforms_affected_models_only(tmp_path):
+    transform_watch = make_project(tmp_path)
+    assert transform_watch.run_all() == ['customers.sql', 'orders.sql']
+    assert 'created_time as created_at' in (tmp_path / 'out' / 'orders.sql').read_text()
+
+    # a rule for a column only customers has re-transforms customers alone
+    transforms = str(tmp_path / 'transforms.yml')
+    (tmp_path / 'transforms.yml').write_text('created_time:\n  name: created_at\nname:\n  name: customer_name\n')
+    assert transform_watch.handle({transforms}) == ['customers.sql']
+    assert 'name as customer_name' in (tmp_path / 'out' / 'customers.sql').read_text()
+
+    # a changed model is re-parsed and transformed on its own
+    write_model(tmp_path / 'models' / 'orders.sql', 'ORDERS', ['id', 'created_time', 'name'])
+    assert transform_watch.handle({str(tmp_path / 'models' / 'orders.sql')}) == ['orders.sql']
+    assert 'name as customer_name' in (tmp_path / 'out' / 'orders.sql').read_text()
+
+    # broken transforms keep the previous rules
+    (tmp_path / 'transforms.yml').write_text('created_time: [\n')
+    assert transform_watch.handle({transforms}) == []
+    assert transform_watch.rules.match('name') == {'name': 'customer_name'}
+
+    os.remove(tmp_path / 'models' / 'customers.sql')
+    assert transform_watch.handle({str(tmp_path / 'models' / 'customers.sql')}) == []
+    assert list(transform_watch.models) == ['orders.sql']
+
+
+
+def test_watch_applies_warehouse_conventions(tmp_path):
+    make_project(tmp_path)
+    transform_watch = TransformWatch(str(tmp_path / 'models'), str(tmp_path / 'transforms.yml'), str(tmp_path / 'out'),
+                                     processor_class=ProcessBaseModelsBQ, processor_kwargs={'split_columns': False})
+    assert transform_watch.run_all() == ['customers.sql', 'orders.sql']
+    assert 'created_time as created_at' in (tmp_path / 'out' / 'orders.sql').read_text()
+    assert 'id as id' in (tmp_path / 'out' / 'orders.sql').read_text()
+
+    (tmp_path / 'transforms.yml').write_text('created_time:\n  name: created_at\nname:\n  name: customer_name\n')
+    assert transform_watch.handle({str(tmp_path / 'transforms.yml')}) == ['customers.sql']
+    assert 'name as customer_name' in (tmp_path / 'out' / 'customers.sql').read_text()
+
+
+@pytest.mark.parametrize('command', ['transform', 'bq-transform', 'sf-transform'])
+def test_watch_needs_transforms_path(tmp_path, command):
+    make_project(tmp_path)
+    result = CliRunner().invoke(dbt_generator, [command, '-m', str(tmp_path / 'models'), '-o', str(tmp_path / 'out'),
+                                                '--watch', 'True'])
+    assert result.exit_code == 2
+    assert '--transforms-path' in result.output
+
+@pytest.mark.parametrize('watcher_class', [PollingWatcher, InotifyWatcher])
+def test_watchers_report_changed_files(tmp_path, watcher_class):
+    if watcher_class is InotifyWatcher and not sys.platform.startswith('linux'):
+        pytest.skip('inotify is Linux only')
+    (tmp_path / 'orders.sql').write_text('select 1')
+    watcher = watcher_class([str(tmp_path)]) if watcher_class is InotifyWatcher else watcher_class([str(tmp_path)], 0.01)
+    try:
+        (tmp_path / 'orders.sql').write_text('select 2 -- changed')
+        (tmp_path / 'customers.sql').write_text('select 3')
+        assert wait_for_changes(watcher, 0.05) == {str(tmp_path / 'orders.sql'), str(tmp_path / 'customers.sql')}
+    finally:
+        watcher.close()